@@ -24,20 +24,13 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-
-def _parse_allowed_origins(raw_value: str | None) -> list[str]:
-    if not raw_value:
-        return ["http://localhost:5173", "http://127.0.0.1:5173"]
-    return [origin.strip() for origin in raw_value.split(",") if origin.strip()]
-
-
-allowed_origins = _parse_allowed_origins(os.getenv("TEXTWAVES_CORS_ORIGINS"))
+allowed_origins = list(settings.cors_origins)
 CORS(
     app,
     resources={r"/api/*": {"origins": allowed_origins}},
     supports_credentials=True,
     allow_headers=["Authorization", "Content-Type", "Accept", "Origin"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "Accept-Ranges", "Content-Range", "Content-Length", "ETag"],
 )
 
 # Aumentar timeout para vídeos longos (até 15 minutos)
@@ -45,7 +38,8 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 app.config['PROPAGATE_EXCEPTIONS'] = True
 
 # Configurações JWT
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'textwaves-secret-key-change-in-production')
+# Mesmo segredo do servidor de progresso assíncrono (utils/auth_tokens.py)
+app.config['JWT_SECRET_KEY'] = settings.jwt_secret_key
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
 
@@ -53,8 +47,7 @@ app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
 jwt = JWTManager(app)
 
 # Configuração do banco de dados
-default_db_path = settings.base_dir / 'instance' / 'textwaves.db'
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{default_db_path}')
+app.config['SQLALCHEMY_DATABASE_URI'] = settings.database_uri
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Inicializar banco de dados
@@ -75,8 +68,13 @@ app.register_blueprint(preview_bp, url_prefix='/api')
 app.register_blueprint(data_bp, url_prefix='/api')
 app.register_blueprint(videos_bp, url_prefix='/api')
 
-# Executar limpeza de sessões antigas na inicialização (> 24 horas)
-startup_cleanup(max_age_hours=24)
+# Executar limpeza de sessões antigas na inicialização (> 24 horas); com o
+# contexto da aplicação a limpeza também atualiza o histórico (VideoTask)
+with app.app_context():
+    startup_cleanup(max_age_hours=24)
+
+# Conferência periódica da disponibilidade de arquivos do histórico
+VideoTask.start_artifact_reconciler(app)
 
 # Diretório para armazenar os vídeos enviados
 app.config['UPLOAD_FOLDER'] = str(settings.upload_dir)
@@ -18,6 +18,36 @@ DEFAULT_PROFANITY_WORDS: Tuple[str, ...] = (
 )
 
 
+@dataclass(frozen=True, slots=True)
+class EncoderProfile:
+    """Video encoder settings applied when exporting rendered videos."""
+
+    codec: str = "libx264"
+    preset: str = "veryfast"
+    crf: int | None = 23
+    # 0 lets the encoder pick one thread per core
+    threads: int = 0
+    # None keeps the source frame rate
+    fps: float | None = None
+
+
+ENCODER_PROFILES: dict[str, EncoderProfile] = {
+    "draft": EncoderProfile(preset="ultrafast", crf=28),
+    "standard": EncoderProfile(preset="veryfast", crf=23),
+    "archive": EncoderProfile(preset="slow", crf=18),
+}
+
+
+MEDIA_DELIVERY_MODES: Tuple[str, ...] = ("direct", "x-accel", "x-sendfile")
+
+
+PROGRESS_BACKENDS: Tuple[str, ...] = ("memory", "sqlite")
+
+
+DEFAULT_JWT_SECRET_KEY = "textwaves-secret-key-change-in-production"
+DEFAULT_CORS_ORIGINS: Tuple[str, ...] = ("http://localhost:5173", "http://127.0.0.1:5173")
+
+
 def _parse_csv_list(raw_value: str | None) -> Tuple[str, ...]:
     if not raw_value:
         return tuple()
@@ -37,11 +67,74 @@ class Settings:
     profanity_words: Tuple[str, ...] = DEFAULT_PROFANITY_WORDS
     beep_frequency: int = 1000
     beep_volume: float = 0.4
+    render_workers: int = 0
+    render_segment_seconds: float = 30.0
+    render_min_segment_seconds: float = 10.0
+    render_segment_cache: bool = False
+    encoder_profile: str = "standard"
+    render_cache_max_bytes: int = 5 * 1024**3
+    preview_proxy_height: int = 480
+    media_delivery: str = "direct"
+    media_accel_prefix: str = "/protected-media/"
+    media_accel_root: Path | None = None
+    hls_enabled: bool = False
+    hls_segment_seconds: float = 4.0
+    thumbnail_interval: float = 5.0
+    database_url: str | None = None
+    progress_backend: str = "memory"
+    progress_db_path: Path | None = None
+    session_db_path: Path | None = None
+    session_cache_max_bytes: int = 64 * 1024**2
+    artifact_reconcile_hours: float = 24.0
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_mb: int = 32
+    sqlite_mmap_mb: int = 256
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    progress_flush_seconds: float = 1.0
+    progress_server_host: str = "127.0.0.1"
+    progress_server_port: int = 5001
+    progress_ticket_seconds: int = 60
+    jwt_secret_key: str = DEFAULT_JWT_SECRET_KEY
+    cors_origins: Tuple[str, ...] = DEFAULT_CORS_ORIGINS
 
     @property
     def subtitles_dir(self) -> Path:
         return (self.base_dir.parent / self.subtitles_dir_name).resolve()
 
+    @property
+    def render_cache_dir(self) -> Path:
+        return self.upload_dir / "render_cache"
+
+    @property
+    def media_root(self) -> Path:
+        """Directory exposed to the front web server as ``media_accel_prefix``."""
+        return self.media_accel_root or self.upload_dir
+
+    @property
+    def database_uri(self) -> str:
+        """SQLAlchemy URI of the main database (users and video history)."""
+        return self.database_url or f"sqlite:///{self.base_dir / 'instance' / 'textwaves.db'}"
+
+    @property
+    def progress_store_path(self) -> Path:
+        """SQLite file shared by all workers when ``progress_backend`` is sqlite."""
+        return self.progress_db_path or self.base_dir / "instance" / "progress.db"
+
+    @property
+    def session_store_path(self) -> Path:
+        """SQLite file holding the editor sessions (subtitles, beeps, metadata)."""
+        return self.session_db_path or self.base_dir / "instance" / "sessions.db"
+
+    def resolve_encoder_profile(self, name: str | None = None) -> EncoderProfile:
+        """Return the named encoder profile, defaulting to ``encoder_profile``."""
+
+        key = (name or self.encoder_profile).strip().lower()
+        try:
+            return ENCODER_PROFILES[key]
+        except KeyError:
+            raise ValueError(f"Unknown encoder profile: {key}") from None
+
     @classmethod
     def from_env(cls) -> "Settings":
         base_dir = Path(os.getenv("TEXTWAVES_BASE_DIR", Path(__file__).resolve().parent))
@@ -64,6 +157,92 @@ class Settings:
         beep_frequency = int(os.getenv("TEXTWAVES_BEEP_FREQUENCY", "1000"))
         beep_volume = float(os.getenv("TEXTWAVES_BEEP_VOLUME", "0.4"))
 
+        # 0 means one render worker per available CPU core
+        render_workers = int(os.getenv("TEXTWAVES_RENDER_WORKERS", "0"))
+        render_segment_seconds = float(os.getenv("TEXTWAVES_RENDER_SEGMENT_SECONDS", "30"))
+        render_min_segment_seconds = float(
+            os.getenv("TEXTWAVES_RENDER_MIN_SEGMENT_SECONDS", "10")
+        )
+        # Opt-in: each render pays a keyframe probe and per-segment encodes
+        render_segment_cache = os.getenv("TEXTWAVES_RENDER_SEGMENT_CACHE", "0").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        encoder_profile = os.getenv("TEXTWAVES_ENCODER_PROFILE", "standard").strip().lower()
+        if encoder_profile not in ENCODER_PROFILES:
+            encoder_profile = "standard"
+        # 0 disables the shared render output cache
+        render_cache_max_bytes = int(
+            float(os.getenv("TEXTWAVES_RENDER_CACHE_MAX_MB", "5120")) * 1024**2
+        )
+
+        # 0 disables the low-resolution preview proxy used by the editor
+        preview_proxy_height = int(os.getenv("TEXTWAVES_PREVIEW_PROXY_HEIGHT", "480"))
+
+        # direct: Flask streams the file; x-accel (nginx) / x-sendfile (lighttpd,
+        # Apache) hand the transfer to the front server after the auth check
+        media_delivery = os.getenv("TEXTWAVES_MEDIA_DELIVERY", "direct").strip().lower()
+        if media_delivery not in MEDIA_DELIVERY_MODES:
+            media_delivery = "direct"
+        media_accel_prefix = os.getenv("TEXTWAVES_MEDIA_ACCEL_PREFIX", "/protected-media/")
+        media_root_env = os.getenv("TEXTWAVES_MEDIA_ACCEL_ROOT")
+        media_accel_root = Path(media_root_env) if media_root_env else None
+
+        # Optional HLS (fMP4) packaging of preview proxies and final renders
+        hls_enabled = os.getenv("TEXTWAVES_HLS", "0").lower() in ("1", "true", "yes")
+        hls_segment_seconds = float(os.getenv("TEXTWAVES_HLS_SEGMENT_SECONDS", "4"))
+
+        # Seconds between timeline thumbnails; 0 disables sprites and poster
+        thumbnail_interval = float(os.getenv("TEXTWAVES_THUMBNAIL_INTERVAL", "5"))
+
+        # memory: progress lives in the worker process; sqlite: shared by all
+        # workers (gunicorn -w N) through a WAL database
+        progress_backend = os.getenv("TEXTWAVES_PROGRESS_BACKEND", "memory").strip().lower()
+        if progress_backend not in PROGRESS_BACKENDS:
+            progress_backend = "memory"
+        # Main database, shared by the Flask app and the async progress server
+        database_url = os.getenv("DATABASE_URL") or None
+        progress_db_env = os.getenv("TEXTWAVES_PROGRESS_DB")
+        progress_db_path = Path(progress_db_env) if progress_db_env else None
+
+        # Editor sessions, one row per subtitle/beep (session_*.json is export only)
+        session_db_env = os.getenv("TEXTWAVES_SESSION_DB")
+        session_db_path = Path(session_db_env) if session_db_env else None
+        # Serialized/compressed get_session bodies kept per worker; 0 disables
+        session_cache_max_bytes = int(
+            float(os.getenv("TEXTWAVES_SESSION_CACHE_MAX_MB", "64")) * 1024**2
+        )
+
+        # VideoTask.final_available/can_resume are kept by the pipeline and the
+        # cleaner; this pass re-checks the files to fix drift (0 disables)
+        artifact_reconcile_hours = float(os.getenv("TEXTWAVES_ARTIFACT_RECONCILE_HOURS", "24"))
+
+        # SQLite profile applied on every connection (SQLAlchemy and db_manager):
+        # WAL + synchronous=NORMAL, plus these waits and memory budgets per
+        # connection; mmap 0 disables memory-mapped reads
+        sqlite_busy_timeout_ms = int(os.getenv("TEXTWAVES_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        sqlite_cache_mb = int(os.getenv("TEXTWAVES_SQLITE_CACHE_MB", "32"))
+        sqlite_mmap_mb = int(os.getenv("TEXTWAVES_SQLITE_MMAP_MB", "256"))
+        # SQLAlchemy pool: connections kept open per worker, plus burst overflow
+        db_pool_size = max(1, int(os.getenv("TEXTWAVES_DB_POOL_SIZE", "10")))
+        db_max_overflow = max(0, int(os.getenv("TEXTWAVES_DB_MAX_OVERFLOW", "10")))
+
+        # VideoTask progress is coalesced in memory and written at most this
+        # often (terminal states are written at once); 0 writes through
+        progress_flush_seconds = float(os.getenv("TEXTWAVES_PROGRESS_FLUSH_SECONDS", "1"))
+
+        # Async SSE server (progress_server.py); needs the sqlite progress backend
+        progress_server_host = os.getenv("TEXTWAVES_PROGRESS_SERVER_HOST", "127.0.0.1")
+        progress_server_port = int(os.getenv("TEXTWAVES_PROGRESS_SERVER_PORT", "5001"))
+        # Lifetime of the single-video ticket that opens a progress stream; it
+        # travels in the EventSource URL, so it only needs to outlive the connect
+        progress_ticket_seconds = int(os.getenv("TEXTWAVES_PROGRESS_TICKET_SECONDS", "60"))
+
+        # Shared by the Flask app and the progress server to validate tokens
+        jwt_secret_key = os.getenv("JWT_SECRET_KEY", DEFAULT_JWT_SECRET_KEY)
+        cors_origins = _parse_csv_list(os.getenv("TEXTWAVES_CORS_ORIGINS")) or DEFAULT_CORS_ORIGINS
+
         settings = cls(
             base_dir=base_dir,
             upload_dir=upload_dir,
@@ -73,6 +252,36 @@ class Settings:
             profanity_words=profanity_words,
             beep_frequency=beep_frequency,
             beep_volume=beep_volume,
+            render_workers=render_workers,
+            render_segment_seconds=render_segment_seconds,
+            render_min_segment_seconds=render_min_segment_seconds,
+            render_segment_cache=render_segment_cache,
+            encoder_profile=encoder_profile,
+            render_cache_max_bytes=render_cache_max_bytes,
+            preview_proxy_height=preview_proxy_height,
+            media_delivery=media_delivery,
+            media_accel_prefix=media_accel_prefix,
+            media_accel_root=media_accel_root,
+            hls_enabled=hls_enabled,
+            hls_segment_seconds=hls_segment_seconds,
+            thumbnail_interval=thumbnail_interval,
+            database_url=database_url,
+            progress_backend=progress_backend,
+            progress_db_path=progress_db_path,
+            session_db_path=session_db_path,
+            session_cache_max_bytes=session_cache_max_bytes,
+            artifact_reconcile_hours=artifact_reconcile_hours,
+            sqlite_busy_timeout_ms=sqlite_busy_timeout_ms,
+            sqlite_cache_mb=sqlite_cache_mb,
+            sqlite_mmap_mb=sqlite_mmap_mb,
+            db_pool_size=db_pool_size,
+            db_max_overflow=db_max_overflow,
+            progress_flush_seconds=progress_flush_seconds,
+            progress_server_host=progress_server_host,
+            progress_server_port=progress_server_port,
+            progress_ticket_seconds=progress_ticket_seconds,
+            jwt_secret_key=jwt_secret_key,
+            cors_origins=cors_origins,
         )
 
         settings.upload_dir.mkdir(parents=True, exist_ok=True)
@@ -1,17 +1,88 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from .sqlite_profile import apply_sqlite_pragmas, is_sqlite_file_uri, sqlite_engine_options
 
 # Instância única do SQLAlchemy
 db = SQLAlchemy()
 
+
+def add_missing_columns():
+    """Acrescenta às tabelas existentes as colunas novas dos modelos.
+
+    ``create_all`` só cria tabelas que faltam; colunas adicionadas depois
+    (com ``server_default`` ou anuláveis) entram aqui via ``ALTER TABLE``.
+
+    Returns:
+        Lista ``tabela.coluna`` das colunas criadas.
+    """
+    inspector = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                print(f"Coluna {table.name}.{column.name} exige migração manual (NOT NULL sem default)")
+                continue
+            ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def add_missing_indexes():
+    """Cria nas tabelas existentes os índices declarados depois nos modelos.
+
+    Returns:
+        Lista com os nomes dos índices criados.
+    """
+    inspector = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                added.append(index.name)
+    return added
+
+
+def _on_sqlite_connect(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection)
+
+
 def init_database(app):
     """Inicializa o banco de dados com a aplicação Flask"""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if is_sqlite_file_uri(uri):
+        # Pool e timeout do perfil SQLite, sem sobrescrever o que já foi configurado
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        for key, value in sqlite_engine_options().items():
+            options.setdefault(key, value)
     db.init_app(app)
     
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            # Antes da primeira conexão: todas recebem o perfil (WAL, busy_timeout...)
+            event.listen(db.engine, 'connect', _on_sqlite_connect)
         try:
             db.create_all()
+            added = add_missing_columns()
+            if added:
+                print(f"Colunas adicionadas: {', '.join(added)}")
+            indexes = add_missing_indexes()
+            if indexes:
+                print(f"Índices criados: {', '.join(indexes)}")
             print("Banco de dados inicializado com sucesso!")
             return True
         except Exception as e:
             print(f"Erro ao inicializar banco de dados: {str(e)}")
-            return False
\ No newline at end of file
+            return False
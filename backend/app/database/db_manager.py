@@ -1,8 +1,11 @@
 import sqlite3
 import hashlib
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 
+from .sqlite_profile import apply_sqlite_pragmas
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DB_PATH = str((BASE_DIR / "instance" / "textwaves.db").resolve())
 
@@ -14,16 +17,42 @@ def _ensure_instance_dir():
 _ensure_instance_dir()
 
 
-@contextmanager
-def get_conn():
+# Uma conexão por thread, reaproveitada entre chamadas (perfil já aplicado)
+_local = threading.local()
+
+
+def _thread_conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_PATH:
+        return conn
+    if conn is not None:
+        conn.close()
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    apply_sqlite_pragmas(conn)
+    # Só o esquema do db_manager depende das chaves estrangeiras
     conn.execute("PRAGMA foreign_keys = ON")
+    _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+
+def close_conn():
+    """Fecha a conexão da thread atual (threads de vida curta, testes)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+@contextmanager
+def get_conn():
+    conn = _thread_conn()
     try:
         yield conn
         conn.commit()
-    finally:
-        conn.close()
+    except BaseException:
+        conn.rollback()
+        raise
 
 
 def create_db():
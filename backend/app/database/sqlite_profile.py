@@ -0,0 +1,62 @@
+"""Perfil de desempenho do SQLite aplicado a cada conexão.
+
+Por padrão o SQLite usa journal de rollback e ``synchronous=FULL``, e uma
+escrita bloqueia as leituras; sem ``busy_timeout`` a conexão concorrente
+falha na hora com "database is locked". O perfil abaixo vale para o engine
+do SQLAlchemy (``db_config``) e para as conexões de ``db_manager``:
+
+- ``journal_mode=WAL``: leitores não esperam o escritor (e vice-versa)
+- ``synchronous=NORMAL``: fsync só no checkpoint; seguro com WAL
+- ``busy_timeout``: espera o lock em vez de falhar
+- ``cache_size``/``mmap_size``/``temp_store``: páginas e temporários em memória
+"""
+from __future__ import annotations
+
+import sqlite3
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+
+
+def sqlite_pragmas() -> list[tuple[str, object]]:
+    """PRAGMAs do perfil, na ordem em que são aplicados."""
+    return [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("busy_timeout", settings.sqlite_busy_timeout_ms),
+        # Negativo = tamanho em KiB, não em páginas
+        ("cache_size", -settings.sqlite_cache_mb * 1024),
+        ("mmap_size", settings.sqlite_mmap_mb * 1024 * 1024),
+        ("temp_store", "MEMORY"),
+    ]
+
+
+def apply_sqlite_pragmas(conn: sqlite3.Connection) -> None:
+    """Aplica o perfil a uma conexão ``sqlite3`` recém-aberta."""
+    cursor = conn.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def is_sqlite_file_uri(uri: str) -> bool:
+    """URI de um SQLite em arquivo (banco em memória não usa pool nem WAL)."""
+    return uri.startswith("sqlite:") and uri not in ("sqlite://", "sqlite:///:memory:") and ":memory:" not in uri
+
+
+def sqlite_engine_options() -> dict:
+    """Opções do engine SQLAlchemy para SQLite em arquivo.
+
+    O pool mantém as conexões (e o perfil já aplicado) entre requisições; o
+    ``timeout`` do driver acompanha o ``busy_timeout``.
+    """
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": max(settings.sqlite_busy_timeout_ms / 1000, 1),
+        "connect_args": {"timeout": settings.sqlite_busy_timeout_ms / 1000},
+    }
@@ -6,8 +6,16 @@ import uuid
 # Importar a instância do banco
 from database.db_config import db
 
+# Campos públicos de User.to_dict (mesmo nome da coluna)
+USER_FIELDS = ('id', 'username', 'email', 'role', 'is_active', 'created_at', 'updated_at', 'last_login')
+
 class User(db.Model):
     __tablename__ = 'users'
+    # Listagem de usuários paginada por cursor (created_at, id), com e sem filtro de role
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        db.Index('ix_users_role_created_at_id', 'role', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -37,18 +45,12 @@ class User(db.Model):
         """Verifica se o usuário é admin"""
         return self.role == 'admin'
     
-    def to_dict(self, include_sensitive=False):
-        """Converte o usuário para dicionário"""
-        data = {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'role': self.role,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
-        }
+    def to_dict(self, include_sensitive=False, fields=None):
+        """Converte o usuário para dicionário (só os ``fields`` pedidos, se informados)"""
+        data = {}
+        for name in fields or USER_FIELDS:
+            value = getattr(self, name)
+            data[name] = value.isoformat() if isinstance(value, datetime) else value
         
         if include_sensitive:
             data['password_hash'] = self.password_hash
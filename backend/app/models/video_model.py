@@ -1,16 +1,184 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+from flask import Flask, current_app
+from sqlalchemy import or_, update
+
 from database.db_config import db
 from config import settings
+from utils.pagination import invalidate_counts
+from utils.session_store import get_session_store
+
+logger = logging.getLogger(__name__)
+
+# Estados finais: gravados na hora, nunca adiados
+TERMINAL_PROGRESS_STATES = frozenset({"completed", "error", "preview_ready"})
+
+
+class _ProgressWriteBehind:
+    """Agrupa atualizações de progresso por vídeo e grava em lote.
+
+    Cada vídeo guarda só o último estado pendente; uma thread grava todos os
+    pendentes numa única transação a cada ``progress_flush_seconds``. O
+    ``updated_at`` do estado vai na condição do UPDATE, então um lote atrasado
+    nunca sobrescreve uma gravação mais nova (conclusão, erro, reinício).
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._app: Flask | None = None
+
+    def add(self, video_hash: str, fields: dict) -> None:
+        with self._lock:
+            self._pending[video_hash] = {**self._pending.get(video_hash, {}), **fields}
+
+    def discard(self, video_hash: str) -> None:
+        with self._lock:
+            self._pending.pop(video_hash, None)
+
+    def flush(self, video_hashes: list[str] | None = None) -> None:
+        """Grava os pendentes (todos ou só ``video_hashes``) numa transação."""
+        with self._flush_lock:
+            with self._lock:
+                if video_hashes is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {h: self._pending.pop(h) for h in video_hashes if h in self._pending}
+            if not batch:
+                return
+            try:
+                for video_hash, fields in batch.items():
+                    db.session.execute(
+                        update(VideoTask)
+                        .where(
+                            VideoTask.video_hash == video_hash,
+                            or_(VideoTask.updated_at.is_(None), VideoTask.updated_at <= fields["updated_at"]),
+                        )
+                        .values(**fields)
+                    )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Devolve ao buffer sem passar por cima do que chegou depois
+                with self._lock:
+                    for video_hash, fields in batch.items():
+                        self._pending[video_hash] = {**fields, **self._pending.get(video_hash, {})}
+                raise
+
+    def start(self, app: Flask) -> None:
+        with self._lock:
+            self._app = app
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="progress-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(max(settings.progress_flush_seconds, 0.05))
+            if not self._pending:
+                continue
+            with self._app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Falha ao gravar progresso em lote")
+
+
+_progress_buffer = _ProgressWriteBehind()
+
+
+def _resolve(path_str: str) -> Path:
+    path = Path(path_str)
+    if not path.is_absolute():
+        path = settings.base_dir / path
+    return path
+
+
+class _ArtifactReconciler:
+    """Confere periodicamente ``final_available``/``can_resume`` com o disco.
+
+    As colunas são mantidas pelo pipeline e pela limpeza; esta passada (a
+    cada ``artifact_reconcile_hours``) corrige o que mudou por fora, como
+    arquivos apagados à mão ou uma limpeza rodando sem contexto da aplicação.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self, app: Flask) -> None:
+        if settings.artifact_reconcile_hours <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name="artifact-reconciler", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, app: Flask) -> None:
+        while True:
+            with app.app_context():
+                try:
+                    fixed = VideoTask.reconcile_artifacts()
+                    if fixed:
+                        logger.info("Disponibilidade de arquivos corrigida em %s vídeo(s)", fixed)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Falha ao conferir arquivos dos vídeos")
+                finally:
+                    db.session.remove()
+            time.sleep(settings.artifact_reconcile_hours * 3600)
+
+
+_artifact_reconciler = _ArtifactReconciler()
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+# Campos de VideoTask.to_dict e a coluna de onde cada um vem (fields=)
+VIDEO_FIELDS = {
+    "video_hash": ("video_hash", lambda t: t.video_hash),
+    "filename": ("original_filename", lambda t: t.original_filename),
+    "status": ("status", lambda t: t.status),
+    "stage": ("stage", lambda t: t.stage),
+    "progress": ("progress", lambda t: float(t.progress or 0.0)),
+    "message": ("message", lambda t: t.message),
+    "duration_seconds": (
+        "duration_seconds",
+        lambda t: float(t.duration_seconds) if t.duration_seconds else None,
+    ),
+    "final_available": ("final_available", lambda t: bool(t.final_available)),
+    "can_resume": ("can_resume", lambda t: bool(t.can_resume)),
+    "created_at": ("created_at", lambda t: _iso(t.created_at)),
+    "updated_at": ("updated_at", lambda t: _iso(t.updated_at)),
+    "completed_at": ("completed_at", lambda t: _iso(t.completed_at)),
+    "last_error": ("last_error", lambda t: t.last_error),
+    "is_deleted": ("is_deleted", lambda t: bool(t.is_deleted)),
+    "deleted_at": ("deleted_at", lambda t: _iso(t.deleted_at)),
+}
 
 
 class VideoTask(db.Model):
     """Representa o histórico de processamento de vídeos por usuário."""
 
     __tablename__ = "video_tasks"
+    # Histórico do usuário: filtro e ordenação (cursor) saem do mesmo índice
+    __table_args__ = (
+        db.Index("ix_video_tasks_user_history", "user_id", "is_deleted", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     video_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
@@ -23,6 +191,10 @@ class VideoTask(db.Model):
     duration_seconds = db.Column(db.Float)
     final_video_path = db.Column(db.String(255))
     session_file_path = db.Column(db.String(255))
+    # Disponibilidade dos arquivos, mantida pelo pipeline e pela limpeza: o
+    # histórico é listado sem consultar o disco (ver reconcile_artifacts)
+    final_available = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    can_resume = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     last_error = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -35,6 +207,7 @@ class VideoTask(db.Model):
     @classmethod
     def create_or_reset(cls, *, video_hash: str, user_id: str, filename: str, session_path: str) -> "VideoTask":
         """Cria ou reinicia o registro de processamento para um vídeo."""
+        _progress_buffer.discard(video_hash)
         task = cls.query.filter_by(video_hash=video_hash).first()
         now = datetime.utcnow()
         if task is None:
@@ -48,6 +221,8 @@ class VideoTask(db.Model):
                 progress=0.0,
                 message="Arquivo recebido",
                 last_error=None,
+                final_available=False,
+                can_resume=False,
                 is_deleted=False,
             )
             db.session.add(task)
@@ -60,6 +235,8 @@ class VideoTask(db.Model):
             task.progress = 0.0
             task.message = "Arquivo recebido"
             task.final_video_path = None
+            task.final_available = False
+            task.can_resume = False
             task.last_error = None
             task.completed_at = None
             task.duration_seconds = None
@@ -68,6 +245,7 @@ class VideoTask(db.Model):
         task.created_at = now
         task.updated_at = now
         db.session.commit()
+        invalidate_counts("videos", user_id)
         return task
 
     @classmethod
@@ -80,18 +258,34 @@ class VideoTask(db.Model):
         message: str | None = None,
         status: str | None = None,
     ) -> None:
-        """Atualiza informações de progresso do vídeo."""
-        task = cls.query.filter_by(video_hash=video_hash).first()
-        if not task:
-            return
-        task.stage = stage
-        task.progress = max(0.0, min(100.0, float(progress)))
+        """Atualiza informações de progresso do vídeo.
+
+        Estados intermediários entram no buffer de gravação em lote; estados
+        finais (ou ``progress_flush_seconds`` = 0) são gravados imediatamente.
+        """
+        fields = {
+            "stage": stage,
+            "progress": max(0.0, min(100.0, float(progress))),
+            "updated_at": datetime.utcnow(),
+        }
         if message is not None:
-            task.message = message
+            fields["message"] = message
         if status is not None:
-            task.status = status
-        task.updated_at = datetime.utcnow()
-        db.session.commit()
+            fields["status"] = status
+        _progress_buffer.add(video_hash, fields)
+        if (
+            settings.progress_flush_seconds <= 0
+            or stage in TERMINAL_PROGRESS_STATES
+            or status in TERMINAL_PROGRESS_STATES
+        ):
+            _progress_buffer.flush([video_hash])
+        else:
+            _progress_buffer.start(current_app._get_current_object())
+
+    @classmethod
+    def flush_progress(cls) -> None:
+        """Grava agora todo o progresso pendente no buffer."""
+        _progress_buffer.flush()
 
     @classmethod
     def update_metadata(cls, video_hash: str, *, duration_seconds: float | None = None) -> None:
@@ -107,6 +301,7 @@ class VideoTask(db.Model):
     @classmethod
     def mark_completed(cls, video_hash: str, final_path: str, message: str | None = None) -> None:
         """Marca o vídeo como concluído para download."""
+        _progress_buffer.discard(video_hash)
         task = cls.query.filter_by(video_hash=video_hash).first()
         if not task:
             return
@@ -115,6 +310,7 @@ class VideoTask(db.Model):
         task.progress = 100.0
         task.message = message or "Vídeo pronto para download!"
         task.final_video_path = final_path
+        task.final_available = True
         task.completed_at = datetime.utcnow()
         task.last_error = None
         task.updated_at = datetime.utcnow()
@@ -123,6 +319,8 @@ class VideoTask(db.Model):
     @classmethod
     def mark_error(cls, video_hash: str, error_message: str) -> None:
         """Marca o processamento com erro."""
+        # Mantém o último progresso conhecido junto do erro
+        _progress_buffer.flush([video_hash])
         task = cls.query.filter_by(video_hash=video_hash).first()
         if not task:
             return
@@ -141,9 +339,95 @@ class VideoTask(db.Model):
         if not task:
             return
         task.session_file_path = None
+        task.can_resume = False
         task.updated_at = datetime.utcnow()
         db.session.commit()
 
+    @classmethod
+    def mark_session_saved(cls, video_hash: str) -> None:
+        """A sessão do editor foi gravada: o vídeo pode ser retomado."""
+        # updated_at=cls.updated_at: sem o onupdate, o progresso pendente no buffer continua válido
+        db.session.execute(
+            update(cls).where(cls.video_hash == video_hash).values(can_resume=True, updated_at=cls.updated_at)
+        )
+        db.session.commit()
+
+    @classmethod
+    def mark_artifacts_removed(
+        cls,
+        *,
+        final_names: set[str] | None = None,
+        session_hashes: set[str] | None = None,
+    ) -> None:
+        """Registra arquivos apagados pela limpeza.
+
+        Args:
+            final_names: Nomes dos vídeos finais removidos (``final_<hash>.mp4``)
+            session_hashes: Hashes das sessões do editor removidas
+        """
+        if session_hashes:
+            db.session.execute(
+                update(cls)
+                .where(cls.video_hash.in_(session_hashes))
+                .values(can_resume=False, updated_at=cls.updated_at)
+            )
+        if final_names:
+            hashes = {name.split("_", 1)[1].split(".", 1)[0] for name in final_names if "_" in name}
+            rows = db.session.query(cls.id, cls.final_video_path).filter(
+                cls.video_hash.in_(hashes), cls.final_available.is_(True)
+            )
+            # Só conta se o removido é o arquivo atual (MP4 antigo x MKV novo)
+            stale = [row.id for row in rows if row.final_video_path and Path(row.final_video_path).name in final_names]
+            if stale:
+                db.session.execute(
+                    update(cls).where(cls.id.in_(stale)).values(final_available=False, updated_at=cls.updated_at)
+                )
+        db.session.commit()
+
+    @classmethod
+    def reconcile_artifacts(cls) -> int:
+        """Confere as colunas de disponibilidade com o disco e a base de sessões.
+
+        Returns:
+            Quantidade de vídeos corrigidos.
+        """
+        store = get_session_store()
+        rows = db.session.query(
+            cls.id, cls.video_hash, cls.final_video_path, cls.session_file_path, cls.final_available, cls.can_resume
+        ).all()
+        fixed = 0
+        for row in rows:
+            final_available = bool(row.final_video_path) and _resolve(row.final_video_path).exists()
+            # A sessão fica no banco; o arquivo só existe em sessões antigas
+            can_resume = bool(row.session_file_path) and (
+                store.exists(row.video_hash) or _resolve(row.session_file_path).exists()
+            )
+            if (final_available, can_resume) != (bool(row.final_available), bool(row.can_resume)):
+                db.session.execute(
+                    update(cls)
+                    .where(cls.id == row.id)
+                    .values(final_available=final_available, can_resume=can_resume, updated_at=cls.updated_at)
+                )
+                fixed += 1
+        db.session.commit()
+        return fixed
+
+    @classmethod
+    def start_artifact_reconciler(cls, app: Flask) -> None:
+        """Inicia a conferência periódica (``artifact_reconcile_hours``)."""
+        _artifact_reconciler.start(app)
+
+    @classmethod
+    def progress_visible_to(cls, video_hash: str, user_id: str) -> bool:
+        """Se ``user_id`` pode acompanhar o progresso de ``video_hash``.
+
+        O stream abre antes de o upload terminar, quando o registro ainda não
+        existe; só fica de fora o vídeo ativo de outro usuário (um registro
+        apagado volta para quem reenviar o arquivo).
+        """
+        task = cls.query.filter_by(video_hash=video_hash).first()
+        return task is None or task.is_deleted or task.user_id == str(user_id)
+
     @classmethod
     def get_for_user(
         cls,
@@ -173,37 +457,19 @@ class VideoTask(db.Model):
         task.deleted_at = datetime.utcnow()
         task.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_counts("videos", user_id)
         return True
 
-    def to_dict(self) -> dict[str, object]:
-        """Serializa o registro para consumo no frontend."""
-        base_dir = settings.base_dir
-        final_available = False
-        if self.final_video_path:
-            final_path = Path(self.final_video_path)
-            if not final_path.is_absolute():
-                final_path = base_dir / final_path
-            final_available = final_path.exists()
-        can_resume = False
-        if self.session_file_path:
-            session_path = Path(self.session_file_path)
-            if not session_path.is_absolute():
-                session_path = base_dir / session_path
-            can_resume = session_path.exists()
-        return {
-            "video_hash": self.video_hash,
-            "filename": self.original_filename,
-            "status": self.status,
-            "stage": self.stage,
-            "progress": float(self.progress or 0.0),
-            "message": self.message,
-            "duration_seconds": float(self.duration_seconds) if self.duration_seconds else None,
-            "final_available": final_available,
-            "can_resume": can_resume,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-            "last_error": self.last_error,
-            "is_deleted": bool(self.is_deleted),
-            "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None,
-        }
+    @classmethod
+    def columns_for(cls, fields: list[str] | None) -> list:
+        """Colunas a carregar para os ``fields`` pedidos (mais id e created_at do cursor)."""
+        names = {"id", "created_at"} | {VIDEO_FIELDS[name][0] for name in (fields or VIDEO_FIELDS)}
+        return [getattr(cls, name) for name in sorted(names)]
+
+    def to_dict(self, fields: list[str] | None = None) -> dict[str, object]:
+        """Serializa o registro para consumo no frontend (sem acessar o disco).
+
+        Com ``fields`` só esses campos são lidos, então o registro pode vir de
+        uma consulta com ``load_only(*VideoTask.columns_for(fields))``.
+        """
+        return {name: VIDEO_FIELDS[name][1](self) for name in (fields or VIDEO_FIELDS)}
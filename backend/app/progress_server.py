@@ -0,0 +1,334 @@
+"""Servidor assíncrono (asyncio) dos eventos de progresso (SSE).
+
+No Flask, cada EventSource aberto em ``/api/video_progress/<id>`` ocupa uma
+thread do worker durante todo o processamento. Este servidor atende a mesma
+rota com uma corrotina por conexão, então milhares de clientes ociosos custam
+só memória. Roda ao lado do Flask, como processo separado, e lê os eventos do
+backend de progresso compartilhado (``TEXTWAVES_PROGRESS_BACKEND=sqlite``):
+um único vigia consulta o banco só quando ele muda e distribui os eventos
+para as filas dos assinantes de cada sessão.
+
+A autenticação é a mesma do Flask (``utils.auth_tokens``): o ticket de
+``POST /api/progress_ticket/<id>`` (Flask) em ``?ticket=`` (o EventSource do
+navegador não envia cabeçalhos) ou o token de acesso no cabeçalho
+``Authorization: Bearer``. O stream pode abrir antes de o vídeo ser
+registrado; vídeos de outro usuário (``VideoTask.progress_visible_to``)
+respondem 404. Exemplo de nginx na frente dos dois::
+
+    location /api/video_progress/ {
+        proxy_pass http://127.0.0.1:5001;
+        proxy_buffering off;
+        proxy_read_timeout 1h;
+    }
+
+Uso (a partir de ``backend``): ``python -m app.progress_server``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from contextlib import suppress
+from typing import Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import jwt
+
+try:
+    from app.config import settings
+    from app.utils.auth_tokens import decode_access_token, decode_stream_ticket
+    from app.utils.progress_store import ProgressWatcher, SQLiteProgressStore, get_progress_store
+    from app.utils.progress_tracker import (
+        HEARTBEAT_SECONDS,
+        RETRY_MILLISECONDS,
+        STREAM_MAX_SECONDS,
+        format_sse_event,
+        get_progress,
+        is_terminal_state,
+    )
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+    from utils.auth_tokens import decode_access_token, decode_stream_ticket
+    from utils.progress_store import ProgressWatcher, SQLiteProgressStore, get_progress_store
+    from utils.progress_tracker import (
+        HEARTBEAT_SECONDS,
+        RETRY_MILLISECONDS,
+        STREAM_MAX_SECONDS,
+        format_sse_event,
+        get_progress,
+        is_terminal_state,
+    )
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_PATH_PREFIX = "/api/video_progress/"
+MAX_HEADER_BYTES = 16 * 1024
+HEADER_TIMEOUT_SECONDS = 10
+
+_REASONS = {
+    200: "OK",
+    204: "No Content",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+def _parse_head(raw: bytes) -> Tuple[str, str, Dict[str, str]]:
+    lines = raw.decode("latin-1").split("\r\n")
+    method, target, _version = lines[0].split(" ", 2)
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+def _cors_headers(origin: Optional[str]) -> Dict[str, str]:
+    if not origin or origin not in settings.cors_origins:
+        return {}
+    return {
+        "Access-Control-Allow-Origin": origin,
+        "Access-Control-Allow-Credentials": "true",
+        "Vary": "Origin",
+    }
+
+
+def _response_head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def progress_visibility_check() -> Callable[[str, str], bool]:
+    """``VideoTask.progress_visible_to`` no banco principal, sem subir as rotas do Flask.
+
+    Só o SQLAlchemy é inicializado, num app mínimo com a mesma URI
+    (``settings.database_uri``); a consulta roda fora do loop de eventos.
+    """
+    # Os modelos importam ``database`` e ``utils`` a partir da pasta app
+    app_dir = str(settings.base_dir)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    from flask import Flask
+
+    from database.db_config import init_database
+    from models.user_model import User  # noqa: F401 - registra o modelo referenciado por VideoTask
+    from models.video_model import VideoTask
+
+    flask_app = Flask(__name__)
+    flask_app.config["SQLALCHEMY_DATABASE_URI"] = settings.database_uri
+    flask_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    init_database(flask_app)
+
+    def can_follow(video_hash: str, user_id: str) -> bool:
+        with flask_app.app_context():
+            return VideoTask.progress_visible_to(video_hash, user_id)
+
+    return can_follow
+
+
+class ProgressServer:
+    """Assinaturas por sessão alimentadas por um único vigia do banco.
+
+    ``can_follow(video_hash, user_id)`` decide se o usuário autenticado pode
+    acompanhar a sessão; é chamada numa thread, pode consultar o banco.
+    """
+
+    def __init__(self, store: SQLiteProgressStore, can_follow: Callable[[str, str], bool]) -> None:
+        self.store = store
+        self.can_follow = can_follow
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watcher = ProgressWatcher(store, self._deliver_threadsafe)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        self._loop = asyncio.get_running_loop()
+        self._watcher.start()
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self) -> None:
+        self._watcher.stop()
+
+    def _deliver_threadsafe(self, event_id: int, session_id: str, state: Optional[Dict]) -> None:
+        # Chamado na thread do vigia: repassa para o loop de eventos
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, event_id, session_id, state)
+
+    def _dispatch(self, event_id: int, session_id: str, state: Optional[Dict]) -> None:
+        for queue in self._subscribers.get(session_id, ()):
+            queue.put_nowait((event_id, state))
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                raw = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), HEADER_TIMEOUT_SECONDS)
+                method, target, headers = _parse_head(raw)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+                return
+            await self._route(method, target, headers, writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception:
+            logger.exception("Erro no servidor de progresso")
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str], writer: asyncio.StreamWriter) -> None:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        cors = _cors_headers(headers.get("origin"))
+
+        if method == "OPTIONS":
+            cors.update({
+                "Access-Control-Allow-Methods": "GET, OPTIONS",
+                "Access-Control-Allow-Headers": "Authorization, Last-Event-ID, Cache-Control",
+                "Content-Length": "0",
+            })
+            writer.write(_response_head(204, cors))
+            return
+        if method != "GET":
+            await self._send_json(writer, 405, {"error": "Método não permitido"}, cors)
+            return
+        if url.path == "/healthz":
+            await self._send_json(writer, 200, {"status": "ok", "subscribers": self.subscriber_count}, cors)
+            return
+        if not url.path.startswith(PROGRESS_PATH_PREFIX) or len(url.path) == len(PROGRESS_PATH_PREFIX):
+            await self._send_json(writer, 404, {"error": "Rota não encontrada"}, cors)
+            return
+        session_id = unquote(url.path[len(PROGRESS_PATH_PREFIX):])
+
+        authorization = headers.get("authorization", "")
+        token = authorization[7:].strip() if authorization.lower().startswith("bearer ") else None
+        ticket = (query.get("ticket") or [None])[0]
+        try:
+            if ticket:
+                user_id = decode_stream_ticket(ticket, session_id)
+            elif token:
+                user_id = decode_access_token(token)
+            else:
+                raise jwt.InvalidTokenError("Token ausente")
+        except jwt.InvalidTokenError:
+            await self._send_json(writer, 401, {"msg": "Token inválido ou ausente"}, cors)
+            return
+        if not await asyncio.to_thread(self.can_follow, session_id, user_id):
+            await self._send_json(writer, 404, {"error": "Vídeo não encontrado"}, cors)
+            return
+
+        last_event_id = headers.get("last-event-id") or (query.get("lastEventId") or [None])[0]
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
+        await self._stream(writer, session_id, last_event_id, cors)
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: dict, cors: Dict[str, str]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        headers = {**cors, "Content-Type": "application/json", "Content-Length": str(len(body)), "Connection": "close"}
+        writer.write(_response_head(status, headers) + body)
+        await writer.drain()
+
+    async def _stream(
+        self,
+        writer: asyncio.StreamWriter,
+        session_id: str,
+        last_event_id: Optional[int],
+        cors: Dict[str, str],
+    ) -> None:
+        """Mesmo protocolo de ``progress_tracker.stream_progress``."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        try:
+            headers = {
+                **cors,
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                "Connection": "close",
+            }
+            writer.write(_response_head(200, headers))
+            writer.write(f"retry: {RETRY_MILLISECONDS}\n\n".encode("utf-8"))
+
+            history = await asyncio.to_thread(self.store.history, session_id)
+            if history and last_event_id is not None and last_event_id > history[-1][0]:
+                last_event_id = None
+            if last_event_id is None:
+                pending = history[-1:]
+            else:
+                pending = [event for event in history if event[0] > last_event_id]
+            if not history:
+                state = await asyncio.to_thread(get_progress, session_id)
+                writer.write(format_sse_event(state).encode("utf-8"))
+            elif not pending and is_terminal_state(history[-1][1]):
+                return
+            last_seen = pending[-1][0] if pending else (last_event_id or 0)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + STREAM_MAX_SECONDS
+            while True:
+                for event_id, state in pending:
+                    writer.write(format_sse_event(state, event_id).encode("utf-8"))
+                    if is_terminal_state(state):
+                        await writer.drain()
+                        return
+                await writer.drain()
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    event_id, state = await asyncio.wait_for(queue.get(), min(HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")
+                    pending = []
+                    continue
+                if state is None:
+                    return
+                pending = [(event_id, state)] if event_id > last_seen else []
+                if pending:
+                    last_seen = event_id
+        finally:
+            queues = self._subscribers.get(session_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[session_id]
+
+
+async def _serve_forever(store: SQLiteProgressStore) -> None:
+    server = ProgressServer(store, progress_visibility_check())
+    tcp_server = await server.start(settings.progress_server_host, settings.progress_server_port)
+    logger.info(
+        "Servidor de progresso em http://%s:%d", settings.progress_server_host, settings.progress_server_port
+    )
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        server.close()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=os.getenv("TEXTWAVES_LOG_LEVEL", "INFO"),
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+    store = get_progress_store()
+    if store is None:
+        raise SystemExit("O servidor de progresso requer TEXTWAVES_PROGRESS_BACKEND=sqlite")
+    asyncio.run(_serve_forever(store))
+
+
+if __name__ == "__main__":
+    main()
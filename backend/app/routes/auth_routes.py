@@ -8,6 +8,7 @@ import re
 from sqlalchemy import func
 
 from models.user_model import User, TokenBlacklist, db
+from utils.pagination import invalidate_counts
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -48,6 +49,7 @@ def register():
         user = User(username=username, email=email, password=password, role=role)
         db.session.add(user)
         db.session.commit()
+        invalidate_counts('users')
         return jsonify({'message': 'Usuario criado com sucesso', 'user': user.to_dict(), 'is_first_user': is_first_user}), 201
     except Exception as e:
         db.session.rollback()
@@ -1,6 +1,10 @@
+import jwt
 from flask import Blueprint, jsonify, request, Response
-from utils.progress_tracker import get_progress, generate_sse_message, cleanup_progress
-import json
+from flask_jwt_extended import get_jwt_identity, jwt_required, verify_jwt_in_request
+from config import settings
+from models.video_model import VideoTask
+from utils.auth_tokens import create_stream_ticket, decode_stream_ticket
+from utils.progress_tracker import cleanup_progress, stream_progress
 
 data_bp = Blueprint("data", __name__)
 
@@ -16,34 +20,54 @@ def fetch_data():
     data = [{"id": 1, "name": "Sample Data"}]
     return jsonify(data), 200
 
+@data_bp.route('/progress_ticket/<session_id>', methods=['POST'])
+@jwt_required()
+def video_progress_ticket(session_id):
+    """Ticket curto para abrir o stream de progresso de um vídeo.
+
+    Pode ser pedido antes do upload terminar (o registro do vídeo ainda não
+    existe); vídeos de outro usuário respondem 404.
+    """
+    user_id = str(get_jwt_identity())
+    if not VideoTask.progress_visible_to(session_id, user_id):
+        return jsonify({"error": "Vídeo não encontrado"}), 404
+    return jsonify({
+        "ticket": create_stream_ticket(user_id, session_id),
+        "expires_in": settings.progress_ticket_seconds,
+    }), 200
+
 @data_bp.route('/video_progress/<session_id>', methods=['GET'])
 def video_progress(session_id):
     """
     SSE endpoint para monitorar progresso de processamento de vídeo em tempo real.
-    Retorna EventStream que atualiza a cada 500ms até completar.
+    Envia um evento a cada mudança de estado (sem polling) e um heartbeat quando
+    não há novidades; ao reconectar, o EventSource manda Last-Event-ID e os
+    eventos perdidos são reenviados.
+
+    O EventSource do navegador não envia cabeçalhos: ele usa ``?ticket=`` de
+    ``POST /progress_ticket/<id>``; outros clientes podem mandar o token
+    de acesso em ``Authorization: Bearer``.
     """
-    def generate_progress():
-        max_attempts = 6000  # 50 minutos (6000 * 0.5s)
-        attempts = 0
-        
-        while attempts < max_attempts:
-            progress = get_progress(session_id)
-            
-            # Enviar progresso atual
-            yield generate_sse_message(session_id)
-            
-            # Se completou (100%) ou erro, parar stream
-            if progress.get('progress', 0) >= 100 or progress.get('error'):
-                cleanup_progress(session_id)
-                break
-            
-            attempts += 1
-            # Pequena pausa para não sobrecarregar conexão (500ms)
-            import time
-            time.sleep(0.5)
-    
+    ticket = request.args.get('ticket')
+    if ticket:
+        try:
+            user_id = decode_stream_ticket(ticket, session_id)
+        except jwt.InvalidTokenError:
+            return jsonify({"msg": "Ticket inválido ou expirado"}), 401
+    else:
+        verify_jwt_in_request()
+        user_id = str(get_jwt_identity())
+    if not VideoTask.progress_visible_to(session_id, user_id):
+        return jsonify({"error": "Vídeo não encontrado"}), 404
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
     return Response(
-        generate_progress(),
+        stream_progress(session_id, last_event_id),
         mimetype='text/event-stream',
         headers={
             'Cache-Control': 'no-cache',
@@ -53,7 +77,10 @@ def video_progress(session_id):
     )
 
 @data_bp.route('/video_progress/<session_id>', methods=['DELETE'])
+@jwt_required()
 def cleanup_video_progress(session_id):
     """Limpar progresso de uma sessão"""
+    if VideoTask.get_for_user(session_id, str(get_jwt_identity())) is None:
+        return jsonify({"error": "Vídeo não encontrado"}), 404
     cleanup_progress(session_id)
     return jsonify({"message": "Progress cleanup completed"}), 200
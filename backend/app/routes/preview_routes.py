@@ -5,7 +5,7 @@ import os
 import hashlib
 import uuid
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from werkzeug.utils import secure_filename
 
@@ -13,15 +13,22 @@ try:
     from app.config import settings
 except ImportError:  # pragma: no cover - fallback for script execution
     from config import settings
+from services.ffmpeg import probe_media
 from utils.audioExtract import extract_audio_from_video
 from utils.transcribeAudio import transcribe_audio
 from utils.profanity_filter import censor_segments
 from utils.session_cleaner import clean_session_by_hash
-from utils.CreateVideoWinthSubtitles import (
-    SubtitleRenderingOptions,
-    create_video_with_subtitles,
-)
+from utils.session_store import SessionConflict, get_session_store
+from utils.session_cache import SESSION_FORMS, etag_variants, send_session, session_etag
+from utils.CreateVideoWinthSubtitles import SubtitleRenderingOptions
+from utils.render_pipeline import STRATEGY_CACHED, STRATEGY_REUSED, OutputOptions, render_final_output
+from utils.preview_proxy import get_ready_proxy, start_preview_proxy
+from utils.media_delivery import content_etag, final_output_etag, send_bytes, send_media
+from utils.thumbnails import start_thumbnails
+from utils.waveform import build_waveform_peaks, read_waveform_level, waveform_path_for
+from utils.hls_packaging import hls_file_if_ready, hls_mimetype, hls_package_version, start_hls_packaging
 from utils.progress_tracker import initialize_progress, update_progress, set_error
+from utils.progress_eta import StageProgress
 from models.video_model import VideoTask
 
 preview_bp = Blueprint('preview', __name__)
@@ -46,6 +53,66 @@ def _parse_forbidden_words(raw_value: str | None) -> list[str] | None:
     return parsed if parsed else None
 
 
+def _load_session(video_hash: str) -> dict | None:
+    """Sessão do banco; uma sessão antiga ainda em JSON é migrada na primeira leitura."""
+    store = get_session_store()
+    session_data = store.load(video_hash)
+    if session_data is None:
+        legacy_file = os.path.join('uploads', f"session_{video_hash}.json")
+        if os.path.exists(legacy_file):
+            session_data = store.import_json(legacy_file)
+    return session_data
+
+
+def _session_etag(video_hash: str, version: int) -> str:
+    """ETag da sessão em ``version`` (formato completo, o de ``/get_session``)."""
+    revision = get_session_store().revision(video_hash)
+    created_at = revision[1] if revision else 0
+    return session_etag(video_hash, version, created_at)
+
+
+def _conflict_response(video_hash: str, conflict: SessionConflict):
+    """409 com a versão atual, para o cliente recarregar e reaplicar a edição."""
+    response = jsonify({
+        'status': 'error',
+        'message': str(conflict),
+        'version': conflict.current_version,
+    })
+    response.set_etag(_session_etag(video_hash, conflict.current_version))
+    return response, 409
+
+
+def _expected_version(video_hash: str, data: dict) -> int | None:
+    """Versão em que a edição se baseia: ``version`` no corpo ou ``If-Match``."""
+    if data.get('version') is not None:
+        try:
+            return int(data['version'])
+        except (TypeError, ValueError):
+            raise ValueError('version inválida') from None
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    revision = get_session_store().revision(video_hash)
+    if revision is None:
+        return None
+    # Vale o ETag de qualquer formato e codificação de /get_session da revisão atual
+    if not any(
+        request.if_match.contains(tag)
+        for form in SESSION_FORMS
+        for tag in etag_variants(session_etag(video_hash, *revision, form=form))
+    ):
+        raise SessionConflict(revision[0], 'A sessão foi alterada por outra edição')
+    return revision[0]
+
+
+def _session_video_path(video_hash: str) -> str | None:
+    """Só o caminho do vídeo, sem carregar legendas e beeps."""
+    video_path = get_session_store().video_path(video_hash)
+    if video_path is None:
+        session_data = _load_session(video_hash)
+        video_path = session_data['video_path'] if session_data else None
+    return video_path
+
+
 @preview_bp.route('/process_video_preview', methods=['POST'])
 @jwt_required()
 def process_video_preview():
@@ -74,6 +141,7 @@ def process_video_preview():
         with open(video_path, 'rb') as vf:
             video_hash = hashlib.sha256(vf.read()).hexdigest()[:10]
 
+        # A sessão fica no banco; este caminho é o da exportação em JSON
         session_file = os.path.join(upload_folder, f"session_{video_hash}.json")
         VideoTask.create_or_reset(
             video_hash=video_hash,
@@ -82,6 +150,10 @@ def process_video_preview():
             session_path=session_file,
         )
 
+        # Proxy leve, sprites de miniaturas e pôster, gerados em paralelo à transcrição
+        start_preview_proxy(video_hash, video_path)
+        start_thumbnails(video_hash, video_path)
+
         # Inicializar rastreamento de progresso
         initialize_progress(video_hash)
         VideoTask.record_progress(
@@ -91,45 +163,82 @@ def process_video_preview():
             message='Arquivo recebido',
             status='processing',
         )
-        update_progress(video_hash, 'extracting_audio', 10, 'Extraindo áudio do vídeo...')
         VideoTask.record_progress(
             video_hash,
             stage='extracting_audio',
-            progress=10,
+            progress=5,
             message='Extraindo áudio do vídeo...',
             status='processing',
         )
 
+        # Duração da mídia: base da previsão de tempo (ETA) de cada etapa
+        try:
+            media_seconds = probe_media(video_path).duration
+        except Exception:
+            media_seconds = None
+
         # Extrair áudio
         audio_path = os.path.join(upload_folder, f"temp_audio_{video_hash}.wav")
-        extract_audio_from_video(video_path, audio_path)
+        with StageProgress(
+            video_hash,
+            'extracting_audio',
+            'Extraindo áudio do vídeo...',
+            5,
+            15,
+            media_seconds=media_seconds,
+            following=('transcribing', 'censoring'),
+        ) as stage:
+            extract_audio_from_video(video_path, audio_path, on_progress=stage.update)
+
+        # Picos da forma de onda para o editor de beeps, a partir do mesmo WAV
+        try:
+            build_waveform_peaks(audio_path, waveform_path_for(video_hash, upload_folder))
+        except Exception as exc:
+            print(f"Falha ao gerar forma de onda: {exc}")
 
         # Transcrever áudio
-        update_progress(video_hash, 'transcribing', 40, 'Transcrevendo áudio com Whisper...')
         VideoTask.record_progress(
             video_hash,
             stage='transcribing',
-            progress=40,
+            progress=15,
             message='Transcrevendo áudio com Whisper...',
         )
-        transcribed_result = transcribe_audio(audio_path)
+        with StageProgress(
+            video_hash,
+            'transcribing',
+            'Transcrevendo áudio com Whisper...',
+            15,
+            90,
+            media_seconds=media_seconds,
+            following=('censoring',),
+        ) as stage:
+            transcribed_result = transcribe_audio(audio_path, on_progress=stage.update)
+        if transcribed_result is None:
+            raise RuntimeError('Falha ao transcrever o áudio')
         segments = transcribed_result['segments']
         VideoTask.update_metadata(
             video_hash,
             duration_seconds=transcribed_result.get('duration'),
         )
 
-        update_progress(video_hash, 'censoring', 70, 'Detectando palavras e gerando beeps...')
         VideoTask.record_progress(
             video_hash,
             stage='censoring',
-            progress=70,
+            progress=90,
             message='Detectando palavras e gerando beeps...',
         )
-        sanitized_subtitles, beep_intervals = censor_segments(
-            segments,
-            forbidden_words=forbidden_words,
-        )
+        with StageProgress(
+            video_hash,
+            'censoring',
+            'Detectando palavras e gerando beeps...',
+            90,
+            99,
+            media_seconds=media_seconds,
+        ):
+            sanitized_subtitles, beep_intervals = censor_segments(
+                segments,
+                forbidden_words=forbidden_words,
+            )
 
         # Criar estrutura de legendas
         subtitles = []
@@ -157,9 +266,8 @@ def process_video_preview():
             'beep_intervals': beep_intervals,
         }
 
-        session_file = os.path.join(upload_folder, f"session_{video_hash}.json")
-        with open(session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, ensure_ascii=False, indent=2)
+        get_session_store().save(session_data)
+        VideoTask.mark_session_saved(video_hash)
 
         # Limpar arquivo de áudio temporário
         if os.path.exists(audio_path):
@@ -210,35 +318,90 @@ def update_subtitles():
         if task is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
 
-        # Carregar sessão existente
-        session_file = os.path.join('uploads', f"session_{video_hash}.json")
-        if not os.path.exists(session_file):
+        if forbidden_words is not None:
+            forbidden_words = [str(word).strip() for word in forbidden_words if str(word).strip()]
+            if not forbidden_words:
+                forbidden_words = list(settings.profanity_words)
+
+        # Numa transação, grava só as legendas e beeps que mudaram
+        if not get_session_store().exists(video_hash) and _load_session(video_hash) is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
+        try:
+            version = get_session_store().update(
+                video_hash,
+                subtitles=updated_subtitles,
+                forbidden_words=forbidden_words,
+                beep_intervals=beep_intervals,
+                expected_version=_expected_version(video_hash, data),
+            )
+        except SessionConflict as conflict:
+            return _conflict_response(video_hash, conflict)
+        except ValueError as exc:
+            return jsonify({'status': 'error', 'message': str(exc)}), 400
+
+        response = jsonify({
+            'status': 'success',
+            'message': 'Legendas e beeps atualizados com sucesso',
+            'version': version,
+        })
+        response.set_etag(_session_etag(video_hash, version))
+        return response
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@preview_bp.route('/update_subtitles/<video_hash>', methods=['PATCH'])
+@jwt_required()
+def patch_subtitles(video_hash):
+    """Aplica só as legendas e beeps adicionados, alterados ou removidos.
+
+    Corpo::
+
+        {"version": 7,
+         "subtitles": {"added": [{...}], "changed": [{"id": 3, "text": "..."}], "deleted": [5]},
+         "beep_intervals": {"added": [[1.0, 1.2, "manual"]], "changed": [], "deleted": [12]},
+         "forbidden_words": [...]}
 
-        with open(session_file, 'r', encoding='utf-8') as f:
-            session_data = json.load(f)
+    A versão (ou ``If-Match`` com o ETag da sessão) precisa ser a atual;
+    senão a resposta é 409 com a versão atual e nada é gravado.
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'Dados incompletos'}), 400
+
+        task = VideoTask.get_for_user(video_hash, str(user_id))
+        if task is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
+        if not get_session_store().exists(video_hash) and _load_session(video_hash) is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
 
-        # Atualizar legendas
-        session_data['subtitles'] = updated_subtitles
+        forbidden_words = data.get('forbidden_words')
         if forbidden_words is not None:
-            filtered_words = [str(word).strip() for word in forbidden_words if str(word).strip()]
-            if filtered_words:
-                session_data['forbidden_words'] = filtered_words
-            else:
-                session_data['forbidden_words'] = list(settings.profanity_words)
-        
-        # Atualizar beep intervals se fornecidos
-        if beep_intervals is not None:
-            session_data['beep_intervals'] = beep_intervals
-
-        # Salvar sessão atualizada
-        with open(session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, ensure_ascii=False, indent=2)
+            forbidden_words = [str(word).strip() for word in forbidden_words if str(word).strip()]
+            if not forbidden_words:
+                forbidden_words = list(settings.profanity_words)
 
-        return jsonify({
-            'status': 'success',
-            'message': 'Legendas e beeps atualizados com sucesso'
-        })
+        try:
+            version = get_session_store().apply_patch(
+                video_hash,
+                subtitles=data.get('subtitles'),
+                beep_intervals=data.get('beep_intervals'),
+                forbidden_words=forbidden_words,
+                expected_version=_expected_version(video_hash, data),
+            )
+        except SessionConflict as conflict:
+            return _conflict_response(video_hash, conflict)
+        except ValueError as exc:
+            return jsonify({'status': 'error', 'message': str(exc)}), 400
+        if version is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
+
+        response = jsonify({'status': 'success', 'version': version})
+        response.set_etag(_session_etag(video_hash, version))
+        return response
 
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -259,6 +422,11 @@ def render_final_video():
         if not video_hash:
             return jsonify({'status': 'error', 'message': 'Hash do vídeo é obrigatório'}), 400
 
+        try:
+            output_options = OutputOptions.from_subtitle_config(subtitle_config)
+        except ValueError as exc:
+            return jsonify({'status': 'error', 'message': str(exc)}), 400
+
         # Inicializar rastreamento de progresso
         initialize_progress(video_hash)
         update_progress(video_hash, 'loading_session', 5, 'Carregando sessão...')
@@ -276,13 +444,10 @@ def render_final_video():
         )
 
         # Carregar sessão
-        session_file = os.path.join('uploads', f"session_{video_hash}.json")
-        if not os.path.exists(session_file):
+        session_data = _load_session(video_hash)
+        if session_data is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
 
-        with open(session_file, 'r', encoding='utf-8') as f:
-            session_data = json.load(f)
-
         video_path = session_data['video_path']
         subtitles = session_data['subtitles']
         session_words = session_data.get('forbidden_words', list(settings.profanity_words))
@@ -295,11 +460,11 @@ def render_final_video():
             forbidden_words = session_words
 
         # Usar beeps editados se fornecidos, senão recalcular
-        update_progress(video_hash, 'processing_beeps', 20, 'Processando beeps...')
+        update_progress(video_hash, 'processing_beeps', 10, 'Processando beeps...')
         VideoTask.record_progress(
             video_hash,
             stage='processing_beeps',
-            progress=20,
+            progress=10,
             message='Processando beeps...',
         )
         if custom_beep_intervals is not None and isinstance(custom_beep_intervals, list):
@@ -329,40 +494,56 @@ def render_final_video():
         subtitle_tuples = [(sub['start'], sub['end'], sub['text']) for sub in subtitles]
 
         # Caminho do vídeo final
-        output_video_name = f"final_{video_hash}.mp4"
+        output_video_name = f"final_{video_hash}{output_options.extension}"
         output_video_path = os.path.join('uploads', output_video_name)
 
         # Renderizar vídeo
-        update_progress(video_hash, 'rendering_video', 40, 'Renderizando vídeo com efeitos...')
         VideoTask.record_progress(
             video_hash,
             stage='rendering_video',
-            progress=40,
+            progress=10,
             message='Renderizando vídeo com efeitos...',
         )
         subtitle_options = SubtitleRenderingOptions(font_path=str(settings.font_path))
-        create_video_with_subtitles(
-            video_path,
-            subtitle_tuples,
-            output_video_path,
-            subtitle_options,
-            beep_intervals=beep_intervals,
-            beep_frequency=settings.beep_frequency,
-            beep_volume=settings.beep_volume,
-        )
+        # Reaproveita a trilha que não mudou desde a última renderização ou uma
+        # saída idêntica do cache (o hash do vídeo é o digest do conteúdo)
+        with StageProgress(
+            video_hash,
+            'rendering_video',
+            'Renderizando vídeo com efeitos...',
+            10,
+            95,
+            media_seconds=(session_data.get('video_info') or {}).get('duration'),
+        ) as stage:
+            strategy = render_final_output(
+                video_path,
+                subtitle_tuples,
+                output_video_path,
+                subtitle_options,
+                beep_intervals=beep_intervals,
+                beep_frequency=settings.beep_frequency,
+                beep_volume=settings.beep_volume,
+                output_options=output_options,
+                source_hash=video_hash,
+                on_progress=stage.update,
+            )
+            if strategy in (STRATEGY_REUSED, STRATEGY_CACHED):
+                stage.discard_timing()
 
-        update_progress(video_hash, 'finalizing', 90, 'Finalizando arquivo...')
+        update_progress(video_hash, 'finalizing', 95, 'Finalizando arquivo...')
         VideoTask.record_progress(
             video_hash,
             stage='finalizing',
-            progress=90,
+            progress=95,
             message='Finalizando arquivo...',
         )
 
-        # Limpar sessão e arquivos temporários após renderização
-        # (mantém apenas o vídeo final por 24h para download)
-        clean_session_by_hash(video_hash, keep_final_video=True)
-        VideoTask.clear_session_reference(video_hash)
+        # Limpar arquivos temporários após renderização. A sessão e o vídeo
+        # final ficam disponíveis (até a limpeza de 24h) para re-renderizações.
+        clean_session_by_hash(video_hash, keep_final_video=True, keep_session=True)
+
+        # Pacote HLS do resultado para o histórico (em segundo plano, se habilitado)
+        start_hls_packaging(output_video_path)
 
         update_progress(video_hash, 'completed', 100, 'Vídeo pronto para download!')
         VideoTask.mark_completed(
@@ -371,7 +552,12 @@ def render_final_video():
             message='Vídeo pronto para download!',
         )
 
-        return send_file(output_video_path, as_attachment=False, mimetype='video/mp4')
+        # O ETag permite montar a URL versionada (?v=) de download com cache longo
+        return send_media(
+            output_video_path,
+            mimetype=output_options.mimetype,
+            etag=final_output_etag(output_video_path),
+        )
 
     except Exception as e:
         print(f"Erro na renderização: {str(e)}")
@@ -384,23 +570,53 @@ def render_final_video():
 @preview_bp.route('/get_session/<video_hash>', methods=['GET'])
 @jwt_required()
 def get_session(video_hash):
-    """Recupera dados da sessão"""
+    """Recupera dados da sessão
+
+    ``?form=columnar`` devolve legendas e beeps como listas paralelas
+    (``start``/``end``/``text``...) em vez de um objeto por item. O corpo vem
+    do cache de respostas, comprimido conforme ``Accept-Encoding``; o ETag
+    (que o PATCH de legendas aceita em ``If-Match``) permite 304.
+    """
     try:
         user_id = get_jwt_identity()
         task = VideoTask.get_for_user(video_hash, str(user_id))
         if task is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
-        session_file = os.path.join('uploads', f"session_{video_hash}.json")
-        if not os.path.exists(session_file):
+        form = request.args.get('form', 'full')
+        if form not in SESSION_FORMS:
+            return jsonify({'status': 'error', 'message': f'form inválido: {form}'}), 400
+        store = get_session_store()
+        if not store.exists(video_hash) and _load_session(video_hash) is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
 
-        with open(session_file, 'r', encoding='utf-8') as f:
-            session_data = json.load(f)
+        response = send_session(store, video_hash, form)
+        if response is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
+        return response
 
-        return jsonify({
-            'status': 'success',
-            'data': session_data
-        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@preview_bp.route('/get_session/<video_hash>/export', methods=['GET'])
+@jwt_required()
+def export_session(video_hash):
+    """Baixa a sessão no formato JSON antigo (exportação/backup)"""
+    try:
+        user_id = get_jwt_identity()
+        task = VideoTask.get_for_user(video_hash, str(user_id))
+        if task is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
+        session_data = _load_session(video_hash)
+        if session_data is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
+
+        response = Response(
+            json.dumps(session_data, ensure_ascii=False, indent=2),
+            mimetype='application/json',
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="session_{video_hash}.json"'
+        return response
 
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -409,24 +625,81 @@ def get_session(video_hash):
 @preview_bp.route('/get_video/<video_hash>', methods=['GET'])
 @jwt_required()
 def get_video(video_hash):
-    """Serve o vídeo original para preview"""
+    """Serve o proxy de preview (ou o vídeo original enquanto ele não fica pronto)"""
     try:
         user_id = get_jwt_identity()
         task = VideoTask.get_for_user(video_hash, str(user_id))
         if task is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
-        session_file = os.path.join('uploads', f"session_{video_hash}.json")
-        if not os.path.exists(session_file):
+        video_path = _session_video_path(video_hash)
+        if video_path is None:
             return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
 
-        with open(session_file, 'r', encoding='utf-8') as f:
-            session_data = json.load(f)
-
-        video_path = session_data.get('video_path')
         if not video_path or not os.path.exists(video_path):
             return jsonify({'status': 'error', 'message': 'Vídeo não encontrado'}), 404
 
-        return send_file(video_path, mimetype='video/mp4')
+        # O hash do vídeo já identifica o conteúdo; a variante distingue proxy e original
+        proxy_path = get_ready_proxy(video_hash, video_path)
+        if proxy_path is not None:
+            return send_media(proxy_path, mimetype='video/mp4', etag=content_etag(video_hash, 'proxy'))
+        return send_media(video_path, mimetype='video/mp4', etag=content_etag(video_hash, 'original'))
 
     except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@preview_bp.route('/get_video/<video_hash>/hls/<filename>', methods=['GET'])
+@jwt_required()
+def get_video_hls(video_hash, filename):
+    """Serve a playlist/segmentos HLS do proxy de preview (404 enquanto não existem)"""
+    try:
+        user_id = get_jwt_identity()
+        task = VideoTask.get_for_user(video_hash, str(user_id))
+        if task is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
+        video_path = _session_video_path(video_hash)
+        if video_path is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada'}), 404
+
+        proxy_path = get_ready_proxy(video_hash, video_path) if video_path else None
+        hls_file = hls_file_if_ready(proxy_path, filename) if proxy_path else None
+        if hls_file is None:
+            return jsonify({'status': 'error', 'message': 'HLS indisponível'}), 404
+
+        etag = content_etag(video_hash, 'proxy', hls_package_version(proxy_path), filename)
+        return send_media(hls_file, mimetype=hls_mimetype(filename), etag=etag)
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@preview_bp.route('/get_waveform/<video_hash>', methods=['GET'])
+@jwt_required()
+def get_waveform(video_hash):
+    """Serve um nível da pirâmide de picos da forma de onda (binário, ver utils.waveform)"""
+    try:
+        user_id = get_jwt_identity()
+        task = VideoTask.get_for_user(video_hash, str(user_id))
+        if task is None:
+            return jsonify({'status': 'error', 'message': 'Sessão não encontrada para este usuário'}), 404
+
+        try:
+            zoom = int(request.args.get('zoom', 0))
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'zoom inválido'}), 400
+
+        waveform_file = waveform_path_for(video_hash, 'uploads')
+        if not waveform_file.exists():
+            return jsonify({'status': 'error', 'message': 'Forma de onda indisponível'}), 404
+
+        level = read_waveform_level(waveform_file, zoom)
+        # O hash é o digest do conteúdo enviado: os picos de um nível nunca mudam
+        return send_bytes(
+            level.to_bytes(),
+            mimetype='application/octet-stream',
+            etag=content_etag(video_hash, 'waveform', level.zoom),
+            immutable=True,
+        )
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
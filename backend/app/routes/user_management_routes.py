@@ -2,9 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from functools import wraps
+from math import ceil
+
+from sqlalchemy.orm import load_only
 
 # Importe o modelo de usuário
-from models.user_model import User, db
+from models.user_model import USER_FIELDS, User, db
+from utils.pagination import cached_count, invalidate_counts, keyset_page, parse_fields, parse_page_size
 
 # Blueprint para gerenciamento de usuários
 users_bp = Blueprint('users', __name__)
@@ -26,12 +30,22 @@ def admin_required(f):
 @users_bp.route('/users', methods=['GET'])
 @admin_required
 def get_all_users():
-    """Lista todos os usuários (apenas admin)"""
+    """Lista todos os usuários (apenas admin)
+
+    Por padrão a paginação é por página (``page``/``per_page``, total em
+    cache). Com ``cursor`` ou ``limit`` é por cursor, como em ``/videos``:
+    ``next_cursor`` na resposta e ``total`` só se ``include_total=1``.
+    ``fields`` escolhe os campos de cada usuário.
+    """
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
         search = request.args.get('search', '', type=str)
         role_filter = request.args.get('role', '', type=str)
+        try:
+            per_page = parse_page_size(request.args.get('per_page') or request.args.get('limit'), default=10)
+            fields = parse_fields(request.args.get('fields'), USER_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Construir query
         query = User.query
@@ -46,29 +60,48 @@ def get_all_users():
         # Filtro de role
         if role_filter:
             query = query.filter(User.role == role_filter)
-        
-        # Ordenação
-        query = query.order_by(User.created_at.desc())
-        
-        # Paginação
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
-        
-        users = [user.to_dict() for user in pagination.items]
-        
-        return jsonify({
-            'users': users,
-            'pagination': {
+
+        count_key = ('users', search, role_filter)
+        columns = {'id', 'created_at', *(fields or USER_FIELDS)}
+        rows = query.options(load_only(*(getattr(User, name) for name in sorted(columns))))
+
+        if 'cursor' not in request.args and 'limit' not in request.args:
+            # Paginação por página (OFFSET); o total vem do cache
+            page = max(page, 1)
+            total = cached_count(count_key, query)
+            pages = ceil(total / per_page) if total else 0
+            items = (
+                rows.order_by(User.created_at.desc(), User.id.desc())
+                .offset((page - 1) * per_page)
+                .limit(per_page)
+                .all()
+            )
+            pagination = {
                 'page': page,
-                'pages': pagination.pages,
+                'pages': pages,
                 'per_page': per_page,
-                'total': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
+                'total': total,
+                'has_next': page < pages,
+                'has_prev': page > 1
             }
+        else:
+            try:
+                items, next_cursor = keyset_page(
+                    rows, User.created_at, User.id, cursor=request.args.get('cursor'), limit=per_page
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            }
+            if request.args.get('include_total') in ('1', 'true'):
+                pagination['total'] = cached_count(count_key, query)
+        
+        return jsonify({
+            'users': [user.to_dict(fields=fields) for user in items],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -128,6 +161,7 @@ def create_user():
         
         db.session.add(user)
         db.session.commit()
+        invalidate_counts('users')
         
         return jsonify({
             'message': 'Usuário criado com sucesso',
@@ -176,6 +210,7 @@ def update_user(user_id):
         
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_counts('users')
         
         return jsonify({
             'message': 'Usuário atualizado com sucesso',
@@ -210,6 +245,7 @@ def delete_user(user_id):
         
         db.session.delete(user)
         db.session.commit()
+        invalidate_counts('users')
         
         return jsonify({'message': 'Usuário deletado com sucesso'}), 200
         
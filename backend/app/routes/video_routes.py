@@ -2,11 +2,16 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from flask import Blueprint, jsonify, send_file
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.orm import load_only
 
 from config import settings
-from models.video_model import VideoTask
+from models.video_model import VIDEO_FIELDS, VideoTask
+from utils.hls_packaging import hls_file_if_ready, hls_mimetype, hls_package_version
+from utils.media_delivery import content_etag, final_output_etag, send_media
+from utils.pagination import cached_count, keyset_page, parse_fields, parse_page_size
+from utils.thumbnails import POSTER_NAME, thumbnail_file
 
 videos_bp = Blueprint("videos", __name__)
 
@@ -21,14 +26,39 @@ def _resolve_path(path_str: str) -> Path:
 @videos_bp.route("/videos", methods=["GET"])
 @jwt_required()
 def list_videos():
-    """Retorna o histórico de vídeos do usuário autenticado."""
+    """Retorna o histórico de vídeos do usuário autenticado.
+
+    Parâmetros opcionais:
+        limit, cursor: paginação por cursor; a resposta traz ``next_cursor``
+            (None na última página). Sem eles vem o histórico inteiro.
+        fields: campos de cada vídeo, separados por vírgula; só as colunas
+            correspondentes são lidas do banco.
+        include_total: ``1`` inclui ``total`` (contagem em cache).
+    """
     user_id = str(get_jwt_identity())
-    tasks = (
-        VideoTask.query.filter_by(user_id=user_id, is_deleted=False)
-        .order_by(VideoTask.created_at.desc())
-        .all()
-    )
-    return jsonify({"videos": [task.to_dict() for task in tasks]})
+    try:
+        fields = parse_fields(request.args.get("fields"), VIDEO_FIELDS)
+        limit = parse_page_size(request.args.get("limit"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    base = VideoTask.query.filter_by(user_id=user_id, is_deleted=False)
+    query = base.options(load_only(*VideoTask.columns_for(fields)))
+    payload: dict[str, object] = {}
+    if "limit" in request.args or "cursor" in request.args:
+        try:
+            tasks, next_cursor = keyset_page(
+                query, VideoTask.created_at, VideoTask.id, cursor=request.args.get("cursor"), limit=limit
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        payload["next_cursor"] = next_cursor
+    else:
+        tasks = query.order_by(VideoTask.created_at.desc(), VideoTask.id.desc()).all()
+    payload["videos"] = [task.to_dict(fields) for task in tasks]
+    if request.args.get("include_total") in ("1", "true"):
+        payload["total"] = cached_count(("videos", user_id), base)
+    return jsonify(payload)
 
 
 @videos_bp.route("/videos/<string:video_hash>", methods=["GET"])
@@ -45,7 +75,11 @@ def get_video_task(video_hash: str):
 @videos_bp.route("/videos/<string:video_hash>/download", methods=["GET"])
 @jwt_required()
 def download_final_video(video_hash: str):
-    """Permite baixar o vídeo finalizado."""
+    """Permite baixar o vídeo finalizado.
+
+    Suporta Range (download retomável) e GET condicional. Com ``?v=<etag>``
+    igual à versão atual, a resposta é cacheável por um ano (``immutable``).
+    """
     user_id = str(get_jwt_identity())
     task = VideoTask.get_for_user(video_hash, user_id)
     if task is None or not task.final_video_path:
@@ -55,8 +89,68 @@ def download_final_video(video_hash: str):
     if not file_path.exists():
         return jsonify({"error": "Arquivo não encontrado"}), 404
 
-    download_name = f"{Path(task.original_filename).stem}_textwaves.mp4"
-    return send_file(file_path, as_attachment=True, download_name=download_name, mimetype="video/mp4")
+    extension = file_path.suffix.lower() or ".mp4"
+    mimetype = "video/x-matroska" if extension == ".mkv" else "video/mp4"
+    download_name = f"{Path(task.original_filename).stem}_textwaves{extension}"
+    etag = final_output_etag(file_path)
+    return send_media(
+        file_path,
+        mimetype=mimetype,
+        etag=etag,
+        immutable=request.args.get("v") == etag,
+        as_attachment=True,
+        download_name=download_name,
+    )
+
+
+@videos_bp.route("/videos/<string:video_hash>/hls/<string:filename>", methods=["GET"])
+@jwt_required()
+def get_final_video_hls(video_hash: str, filename: str):
+    """Serve a playlist/segmentos HLS do vídeo finalizado."""
+    user_id = str(get_jwt_identity())
+    task = VideoTask.get_for_user(video_hash, user_id)
+    if task is None or not task.final_video_path:
+        return jsonify({"error": "Vídeo indisponível"}), 404
+
+    file_path = _resolve_path(task.final_video_path)
+    hls_file = hls_file_if_ready(file_path, filename)
+    if hls_file is None:
+        return jsonify({"error": "HLS indisponível"}), 404
+
+    etag = content_etag(video_hash, hls_package_version(file_path), filename)
+    return send_media(hls_file, mimetype=hls_mimetype(filename), etag=etag)
+
+
+def _upload_dir_for(task: VideoTask) -> Path:
+    if task.session_file_path:
+        return _resolve_path(task.session_file_path).parent
+    return settings.upload_dir
+
+
+@videos_bp.route("/videos/<string:video_hash>/thumbnails/<string:filename>", methods=["GET"])
+@jwt_required()
+def get_video_thumbnails(video_hash: str, filename: str):
+    """Serve o índice e as folhas de miniaturas da linha do tempo."""
+    user_id = str(get_jwt_identity())
+    task = VideoTask.get_for_user(video_hash, user_id)
+    if task is None:
+        return jsonify({"error": "Vídeo não encontrado"}), 404
+
+    thumb = thumbnail_file(video_hash, _upload_dir_for(task), filename)
+    if thumb is None:
+        return jsonify({"error": "Miniaturas indisponíveis"}), 404
+
+    # Geradas uma única vez a partir do conteúdo (hash): podem ficar em cache
+    mimetype = "application/json" if thumb.suffix == ".json" else "image/jpeg"
+    etag = content_etag(video_hash, "thumbs", filename)
+    return send_media(thumb, mimetype=mimetype, etag=etag, immutable=True)
+
+
+@videos_bp.route("/videos/<string:video_hash>/poster", methods=["GET"])
+@jwt_required()
+def get_video_poster(video_hash: str):
+    """Serve o pôster do vídeo para a lista do histórico."""
+    return get_video_thumbnails(video_hash, POSTER_NAME)
 
 
 @videos_bp.route("/videos/<string:video_hash>", methods=["DELETE"])
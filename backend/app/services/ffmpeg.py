@@ -1,2 +1,325 @@
-# Caminho para o executável do FFmpeg dentro do projeto
+"""Chamadas diretas ao FFmpeg usadas quando o MoviePy não é necessário."""
+from __future__ import annotations
 
+import logging
+import os
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Codecs de áudio que podem ser copiados para um contêiner MP4 sem reencode
+MP4_COPYABLE_AUDIO_CODECS = frozenset({"aac", "mp3", "alac", "ac3", "eac3", "opus"})
+
+_STREAM_RE = re.compile(r"Stream #\d+:(\d+)[^:]*: (Video|Audio|Subtitle): (\w+)")
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_FPS_RE = re.compile(r"Stream #[^\n]*Video:[^\n]*?, (\d+(?:\.\d+)?) fps")
+_PTS_TIME_RE = re.compile(r"pts_time:(-?\d+(?:\.\d+)?)")
+
+
+class FFmpegError(RuntimeError):
+    """Falha ao executar o FFmpeg."""
+
+
+def get_ffmpeg_binary() -> str:
+    """Resolve o executável do FFmpeg (variável de ambiente, MoviePy ou PATH)."""
+    env_binary = os.environ.get("FFMPEG_BINARY")
+    if env_binary and env_binary not in ("ffmpeg-imageio", "auto-detect"):
+        return env_binary
+    try:
+        from moviepy.config import FFMPEG_BINARY
+    except ImportError:  # pragma: no cover - MoviePy ausente
+        return "ffmpeg"
+    return FFMPEG_BINARY or "ffmpeg"
+
+
+def _run_with_progress(command: list[str], on_progress: Callable[[float], None]) -> subprocess.CompletedProcess:
+    """Roda o FFmpeg lendo ``-progress pipe:1``; a duração vem do próprio stderr."""
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    stderr_lines: list[str] = []
+    duration: list[float] = []
+
+    def read_stderr() -> None:
+        for line in process.stderr:
+            stderr_lines.append(line)
+            if not duration:
+                match = _DURATION_RE.search(line)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    duration.append(int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+
+    reader = threading.Thread(target=read_stderr, daemon=True)
+    reader.start()
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        if key == "out_time_us" and value.isdigit() and duration and duration[0] > 0:
+            on_progress(min(1.0, int(value) / 1_000_000 / duration[0]))
+        elif key == "progress" and value == "end":
+            on_progress(1.0)
+    returncode = process.wait()
+    reader.join()
+    return subprocess.CompletedProcess(command, returncode, "", "".join(stderr_lines))
+
+
+def run_ffmpeg(
+    args: Sequence[str],
+    *,
+    check: bool = True,
+    on_progress: Callable[[float], None] | None = None,
+) -> subprocess.CompletedProcess:
+    """Executa o FFmpeg com ``args`` e retorna o processo concluído.
+
+    Com ``on_progress``, recebe a fração do tempo de saída já processado
+    (``-progress`` do FFmpeg) em relação à duração da primeira entrada.
+    """
+    if on_progress is not None:
+        command = [get_ffmpeg_binary(), "-hide_banner", "-nostats", "-progress", "pipe:1", *args]
+        logger.debug("Executando FFmpeg: %s", " ".join(command))
+        result = _run_with_progress(command, on_progress)
+    else:
+        command = [get_ffmpeg_binary(), "-hide_banner", *args]
+        logger.debug("Executando FFmpeg: %s", " ".join(command))
+        result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+    if check and result.returncode != 0:
+        tail = "\n".join(result.stderr.strip().splitlines()[-5:])
+        raise FFmpegError(f"FFmpeg falhou ({result.returncode}): {tail}")
+    return result
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    video_codec: str | None
+    audio_codec: str | None
+    subtitle_codecs: tuple[str, ...] = ()
+    duration: float | None = None
+    fps: float | None = None
+
+
+def probe_media(path: str | os.PathLike) -> MediaInfo:
+    """Lê os codecs das trilhas de ``path`` a partir da saída de ``ffmpeg -i``."""
+    result = run_ffmpeg(["-i", str(path)], check=False)
+    video_codec = audio_codec = None
+    subtitle_codecs: list[str] = []
+    for _index, kind, codec in _STREAM_RE.findall(result.stderr):
+        if kind == "Video" and video_codec is None:
+            video_codec = codec
+        elif kind == "Audio" and audio_codec is None:
+            audio_codec = codec
+        elif kind == "Subtitle":
+            subtitle_codecs.append(codec)
+
+    duration = None
+    duration_match = _DURATION_RE.search(result.stderr)
+    if duration_match:
+        hours, minutes, seconds = duration_match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    fps_match = _FPS_RE.search(result.stderr)
+    fps = float(fps_match.group(1)) if fps_match else None
+    return MediaInfo(video_codec, audio_codec, tuple(subtitle_codecs), duration, fps)
+
+
+def probe_keyframes(path: str | os.PathLike) -> list[float]:
+    """Lista os instantes (s) dos keyframes de vídeo, decodificando só os keyframes."""
+    result = run_ffmpeg(
+        ["-skip_frame", "nokey", "-i", str(path), "-an", "-sn", "-vf", "showinfo", "-f", "null", "-"],
+        check=False,
+    )
+    times = sorted({round(float(value), 6) for value in _PTS_TIME_RE.findall(result.stderr)})
+    return [value for value in times if value >= 0]
+
+
+def concat_files(
+    segment_paths: Sequence[str | os.PathLike],
+    output_path: str | os.PathLike,
+    *,
+    list_path: str | os.PathLike | None = None,
+) -> Path:
+    """Une arquivos com os mesmos parâmetros via concat demuxer (sem reencode)."""
+    output = Path(output_path)
+    list_file = Path(list_path) if list_path else output.with_name(output.name + ".concat.txt")
+    lines = []
+    for segment in segment_paths:
+        escaped = Path(segment).resolve().as_posix().replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+    list_file.write_text("".join(lines), encoding="utf-8")
+    try:
+        run_ffmpeg(
+            ["-y", "-f", "concat", "-safe", "0", "-i", str(list_file), "-c", "copy", str(output)]
+        )
+    finally:
+        try:
+            list_file.unlink()
+        except OSError:
+            pass
+    return output
+
+
+def can_copy_audio_to_mp4(path: str | os.PathLike) -> bool:
+    """Indica se a trilha de áudio de ``path`` pode ir para um MP4 via stream copy."""
+    return probe_media(path).audio_codec in MP4_COPYABLE_AUDIO_CODECS
+
+
+def mux_streams(
+    video_source: str | os.PathLike,
+    audio_source: str | os.PathLike | None,
+    output_path: str | os.PathLike,
+    *,
+    audio_codec: str = "copy",
+    on_progress: Callable[[float], None] | None = None,
+) -> Path:
+    """Combina o vídeo de ``video_source`` com o áudio de ``audio_source``.
+
+    O vídeo é sempre copiado (sem reencode). O áudio é copiado por padrão;
+    ``audio_codec`` permite reencodar apenas essa trilha quando necessário.
+    """
+    args = ["-y", "-i", str(video_source)]
+    if audio_source is not None:
+        args += ["-i", str(audio_source)]
+    args += ["-map", "0:v:0"]
+    if audio_source is not None:
+        args += ["-map", "1:a:0?", "-c:a", audio_codec]
+    args += ["-c:v", "copy", "-movflags", "+faststart", "-shortest", str(output_path)]
+    run_ffmpeg(args, on_progress=on_progress)
+    return Path(output_path)
+
+
+def mux_soft_subtitles(
+    video_source: str | os.PathLike,
+    audio_source: str | os.PathLike | None,
+    subtitle_file: str | os.PathLike,
+    output_path: str | os.PathLike,
+    *,
+    subtitle_codec: str,
+    audio_codec: str = "copy",
+    language: str = "por",
+    on_progress: Callable[[float], None] | None = None,
+) -> Path:
+    """Gera ``output_path`` com vídeo copiado e uma trilha de legenda selecionável."""
+    args = ["-y", "-i", str(video_source)]
+    inputs = 1
+    if audio_source is not None:
+        args += ["-i", str(audio_source)]
+        inputs += 1
+    args += ["-i", str(subtitle_file), "-map", "0:v:0"]
+    if audio_source is not None:
+        args += ["-map", "1:a:0?", "-c:a", audio_codec]
+    args += [
+        "-map", f"{inputs}:s:0",
+        "-c:v", "copy",
+        "-c:s", subtitle_codec,
+        "-metadata:s:s:0", f"language={language}",
+        "-disposition:s:0", "default",
+    ]
+    if Path(output_path).suffix.lower() in (".mp4", ".m4v", ".mov"):
+        args += ["-movflags", "+faststart"]
+    args.append(str(output_path))
+    run_ffmpeg(args, on_progress=on_progress)
+    return Path(output_path)
+
+
+def transcode_preview_proxy(
+    source: str | os.PathLike,
+    output_path: str | os.PathLike,
+    *,
+    height: int = 480,
+    keyframe_interval: float = 0.5,
+    crf: int = 28,
+) -> Path:
+    """Gera uma cópia leve de ``source`` para o player do editor.
+
+    A imagem é reduzida para até ``height`` linhas (sem ampliar) e recebe um
+    keyframe a cada ``keyframe_interval`` segundos, então qualquer posição
+    da linha do tempo é alcançada decodificando poucos quadros.
+    """
+    args = [
+        "-y", "-i", str(source),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:'min({int(height)},ih)',setsar=1",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", str(crf),
+        "-pix_fmt", "yuv420p",
+        "-force_key_frames", f"expr:gte(t,n_forced*{keyframe_interval})",
+        "-sc_threshold", "0",
+        "-c:a", "aac", "-b:a", "128k", "-ac", "2",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+    run_ffmpeg(args)
+    return Path(output_path)
+
+
+def package_hls(
+    source: str | os.PathLike,
+    output_dir: str | os.PathLike,
+    *,
+    segment_seconds: float = 4.0,
+    playlist_name: str = "index.m3u8",
+) -> Path:
+    """Empacota ``source`` em HLS com segmentos fMP4, sem reencode.
+
+    Os cortes caem nos keyframes da origem, então o tamanho real de cada
+    segmento depende do GOP. Retorna o caminho da playlist.
+    """
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    playlist = directory / playlist_name
+    run_ffmpeg([
+        "-y", "-i", str(source),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", f"{segment_seconds:g}",
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", str(directory / "seg_%05d.m4s"),
+        str(playlist),
+    ])
+    return playlist
+
+
+def extract_thumbnails(
+    source: str | os.PathLike,
+    output_dir: str | os.PathLike,
+    *,
+    interval: float,
+    tile_width: int,
+    tile_height: int,
+    columns: int,
+    rows: int,
+    poster_time: float,
+    poster_width: int = 640,
+) -> Path:
+    """Gera sprites de miniaturas e o pôster numa única decodificação.
+
+    Um quadro a cada ``interval`` segundos vira uma miniatura de
+    ``tile_width`` x ``tile_height`` (com barras, preservando a proporção),
+    agrupadas em folhas ``sprite_NNN.jpg`` de ``columns`` x ``rows``. O
+    primeiro quadro a partir de ``poster_time`` vira ``poster.jpg``.
+    """
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    graph = (
+        "[0:v]split=2[thumbs][poster];"
+        f"[thumbs]fps=1/{interval:g},"
+        f"scale={tile_width}:{tile_height}:force_original_aspect_ratio=decrease,"
+        f"pad={tile_width}:{tile_height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"tile={columns}x{rows}[sheets];"
+        f"[poster]trim=start={poster_time:.3f},trim=end_frame=1,scale={poster_width}:-2,setsar=1[cover]"
+    )
+    run_ffmpeg([
+        "-y", "-i", str(source),
+        "-filter_complex", graph,
+        "-map", "[sheets]", "-q:v", "5", str(directory / "sprite_%03d.jpg"),
+        "-map", "[cover]", "-frames:v", "1", "-q:v", "3", str(directory / "poster.jpg"),
+    ])
+    return directory
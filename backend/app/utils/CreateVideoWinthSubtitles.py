@@ -1,19 +1,20 @@
 import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Iterable, Sequence, Tuple
+from typing import Callable, Iterable, Sequence, Tuple
 
 import numpy as np
-import moviepy.audio.fx.all as afx
 import moviepy.editor as mp
-from moviepy.audio.AudioClip import AudioClip, CompositeAudioClip
 from moviepy.video.tools.subtitles import SubtitlesClip
 
+from .beep_intervals import BeepIntervalIndex, get_tone_table, render_beep_signal
+from .progress_eta import MoviePyProgressLogger
+
 try:
-    from app.config import settings
+    from app.config import EncoderProfile, settings
 except ImportError:  # pragma: no cover - fallback for script execution
-    from config import settings
+    from config import EncoderProfile, settings
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +53,21 @@ class SubtitleRenderingOptions:
     stroke_width: int = 0
 
 
+def encoder_write_options(encoder: EncoderProfile) -> dict:
+    """Argumentos de ``write_videofile`` para o perfil de encoder."""
+    ffmpeg_params: list[str] = []
+    if encoder.crf is not None and encoder.codec in ("libx264", "libx265"):
+        ffmpeg_params += ["-crf", str(encoder.crf)]
+    # moov atom no início: o player começa a tocar antes do download terminar
+    ffmpeg_params += ["-movflags", "+faststart"]
+    return {
+        "codec": encoder.codec,
+        "preset": encoder.preset,
+        "threads": encoder.threads or None,
+        "ffmpeg_params": ffmpeg_params,
+    }
+
+
 def calculate_subtitle_parameters(video_width, video_height):
     """Calcula parâmetros dinâmicos para as legendas baseados nas proporções do vídeo."""
     aspect_ratio = video_width / video_height
@@ -123,6 +139,71 @@ def _resolve_font_path(preferred_font: str | None) -> str | None:
     return None
 
 
+def build_censored_audio(
+    audio_clip,
+    clip_duration: float,
+    beep_intervals: Iterable[Tuple[float, float]] | None,
+    beep_frequency: int = 1000,
+    beep_volume: float = 0.6,
+    ducking_volume: float | None = 0.12,
+):
+    """Aplica ducking e beeps sobre ``audio_clip``; sem beeps retorna o próprio clipe."""
+
+    # Beeps sobrepostos ou colados viram um único intervalo (e um único tom)
+    beep_index = BeepIntervalIndex.from_intervals(
+        beep_intervals or [],
+        pad_seconds=0.02,
+        clip_duration=clip_duration,
+        join_gap=0.01,
+        min_duration=0.05,
+    )
+
+    if not len(beep_index):
+        return audio_clip
+
+    tone_table = get_tone_table(int(beep_frequency), float(beep_volume), fps=44100)
+    duck_level = None
+    if ducking_volume is not None:
+        duck_level = max(0.0, min(1.0, ducking_volume))
+    buffers: dict[str, np.ndarray] = {}
+
+    def apply_beeps(get_frame, t):
+        # Ducking e tom calculados numa só passada sobre o índice ordenado
+        frame = get_frame(t)
+        scalar = np.isscalar(t)
+        beep = render_beep_signal(beep_index, t, tone_table, out=buffers.get("beep"))
+        if duck_level is not None:
+            gain = beep_index.gain_envelope(t, duck_level, out=buffers.get("gain"))
+        else:
+            gain = None
+        if scalar:
+            result = frame * (gain[0] if gain is not None else 1.0)
+            return result + beep[0]
+
+        buffers["beep"] = beep
+        if gain is not None:
+            buffers["gain"] = gain
+        # Frame stereo (N, 2) recebe o mesmo sinal em todos os canais
+        if frame.ndim == 2:
+            beep_column = beep[:, np.newaxis]
+            gain_column = gain[:, np.newaxis] if gain is not None else None
+        else:
+            beep_column = beep
+            gain_column = gain
+
+        # Operações in-place quando o bloco é uma cópia própria do leitor
+        if frame.dtype.kind == "f" and frame.flags.owndata and frame.flags.writeable:
+            if gain_column is not None:
+                np.multiply(frame, gain_column, out=frame)
+            np.add(frame, beep_column, out=frame)
+            return frame
+        if gain_column is not None:
+            frame = frame * gain_column
+        return frame + beep_column
+
+    return audio_clip.fl(apply_beeps)
+
+
 def create_video_with_subtitles(
     video_path: str,
     subtitles: Sequence[Tuple[float, float, str]],
@@ -132,13 +213,30 @@ def create_video_with_subtitles(
     beep_frequency: int = 1000,
     beep_volume: float = 0.6,
     ducking_volume: float | None = 0.12,
-    codec: str = "libx264",
-    fps: int = 24,
+    codec: str | None = None,
+    fps: float | None = None,
+    include_audio: bool = True,
+    subclip: Tuple[float, float] | None = None,
+    encoder: EncoderProfile | None = None,
+    on_progress: Callable[[float], None] | None = None,
 ):
-    """Renderiza um vídeo com legendas e, opcionalmente, insere beeps nos trechos proibidos."""
+    """Renderiza um vídeo com legendas e, opcionalmente, insere beeps nos trechos proibidos.
+
+    ``encoder`` define codec, preset, CRF e threads (padrão: o perfil de
+    ``settings.encoder_profile``); ``codec`` e ``fps`` sobrescrevem o perfil.
+    Sem ``fps`` explícito a taxa de quadros da origem é mantida.
+
+    Com ``include_audio=False`` apenas a imagem é exportada, para que o áudio
+    seja copiado ou renderizado à parte e combinado depois. ``subclip`` limita a
+    renderização a ``(start, end)`` do vídeo de origem; os tempos das legendas
+    devem então ser relativos a ``start``. ``on_progress`` recebe a fração
+    dos quadros já gravados.
+    """
 
     logger.info("Iniciando processamento de legendas para %s", video_path)
-    video_clip = mp.VideoFileClip(video_path)
+    video_clip = mp.VideoFileClip(video_path, audio=include_audio)
+    if subclip is not None:
+        video_clip = video_clip.subclip(*subclip)
     video_width, video_height = video_clip.size
 
     params = calculate_subtitle_parameters(video_width, video_height)
@@ -176,104 +274,86 @@ def create_video_with_subtitles(
         ((float(start), float(end)), str(text))
         for start, end, text in subtitles
     ]
-    subtitle_clip = SubtitlesClip(formatted_subtitles, _make_textclip)
-    subtitle_clip = subtitle_clip.set_position(
-        ("center", video_height - params["subtitle_height"] - params["bottom_margin"])
-    )
-
-    final_video = mp.CompositeVideoClip([video_clip, subtitle_clip])
+    if formatted_subtitles:
+        subtitle_clip = SubtitlesClip(formatted_subtitles, _make_textclip)
+        subtitle_clip = subtitle_clip.set_position(
+            ("center", video_height - params["subtitle_height"] - params["bottom_margin"])
+        )
+        final_video = mp.CompositeVideoClip([video_clip, subtitle_clip])
+    else:
+        final_video = video_clip
 
     # Preparar áudio com beeps
     audio_clip = video_clip.audio
 
-    def _normalize_interval(item: Iterable[float]) -> Tuple[float, float] | None:
-        try:
-            start, end = float(item[0]), float(item[1])
-        except (TypeError, ValueError, IndexError):
-            return None
-        if end <= start:
-            return None
-        return start, end
-
-    raw_beep_items = [_normalize_interval(item) for item in (beep_intervals or [])]
-    beep_items: list[Tuple[float, float]] = [item for item in raw_beep_items if item]
-
-    if audio_clip and beep_items:
-        pad_seconds = 0.02
-        clip_duration = float(video_clip.duration)
-        padded_beep_items: list[Tuple[float, float]] = []
-
-        for start, end in beep_items:
-            padded_start = max(0.0, start - pad_seconds)
-            padded_end = min(clip_duration, end + pad_seconds)
-            if padded_end - padded_start <= 0:
-                continue
-            padded_beep_items.append((padded_start, padded_end))
-
-        base_audio = audio_clip
-        if ducking_volume is not None:
-            clamped_duck = max(0.0, min(1.0, ducking_volume))
-
-            def volume_curve(t):
-                # t pode ser escalar ou array, tratar ambos
-                t_array = np.atleast_1d(t)
-                result = np.ones_like(t_array, dtype=float)
-                for start, end in padded_beep_items:
-                    mask = (t_array >= start) & (t_array <= end)
-                    result[mask] = clamped_duck
-                # Retornar como escalar ou array dependendo da entrada
-                if np.isscalar(t):
-                    return float(result[0])
-                return result
-
-            def apply_ducking(get_frame, t):
-                frame = get_frame(t)
-                curve = volume_curve(t)
-                # Se frame é stereo (shape N,2) e curve é (N,), expandir curve
-                if frame.ndim == 2 and curve.ndim == 1:
-                    curve = curve[:, np.newaxis]
-                return frame * curve
-
-            base_audio = audio_clip.fl(apply_ducking)
-
-        # Detectar número de canais do áudio original
-        test_frame = audio_clip.get_frame(0)
-        nchannels = 2 if test_frame.ndim == 1 or getattr(test_frame, "shape", (0,))[0] == 2 else 1
-
-        def make_beep(duration: float) -> AudioClip:
-            def _tone(t: float | np.ndarray) -> np.ndarray:
-                mono_signal = beep_volume * np.sin(2 * np.pi * beep_frequency * t)
-                if nchannels == 2:
-                    if np.isscalar(t):
-                        return np.array([mono_signal, mono_signal])
-                    return np.column_stack([mono_signal, mono_signal])
-                return mono_signal
-
-            clip = AudioClip(_tone, duration=duration, fps=44100)
-            # Fade-in/out rápido evita cliques audíveis
-            clip = clip.fx(afx.audio_fadein, 0.01).fx(afx.audio_fadeout, 0.02)
-            return clip
-
-        beep_clips = []
-        for start, end in padded_beep_items:
-            duration = max(0.05, end - start)
-            beep_clip = make_beep(duration).set_start(start)
-            beep_clips.append(beep_clip)
-
-        composite_parts: list[AudioClip] = [base_audio, *beep_clips]
-        composite_audio: AudioClip = CompositeAudioClip(composite_parts)
-    else:
-        composite_audio = audio_clip
+    composite_audio = None
+    if audio_clip and include_audio:
+        composite_audio = build_censored_audio(
+            audio_clip,
+            float(video_clip.duration),
+            beep_intervals,
+            beep_frequency=beep_frequency,
+            beep_volume=beep_volume,
+            ducking_volume=ducking_volume,
+        )
 
     if composite_audio:
         composite_audio = composite_audio.set_duration(final_video.duration)
         final_video = final_video.set_audio(composite_audio)
 
+    encoder = encoder or settings.resolve_encoder_profile()
+    if codec:
+        encoder = replace(encoder, codec=codec)
+    output_fps = fps or encoder.fps or video_clip.fps or 24
+
     logger.info("Exportando vídeo legendado para %s", output_video_path)
-    final_video.write_videofile(output_video_path, codec=codec, fps=fps)
+    final_video.write_videofile(
+        output_video_path,
+        fps=output_fps,
+        audio=composite_audio is not None,
+        logger=MoviePyProgressLogger(on_progress, bar="t") if on_progress else "bar",
+        **encoder_write_options(encoder),
+    )
     return final_video
 
 
+def render_censored_audio(
+    video_path: str,
+    output_audio_path: str,
+    beep_intervals: Iterable[Tuple[float, float]] | None = None,
+    beep_frequency: int = 1000,
+    beep_volume: float = 0.6,
+    ducking_volume: float | None = 0.12,
+    audio_codec: str = "aac",
+    audio_bitrate: str = "192k",
+    on_progress: Callable[[float], None] | None = None,
+) -> str:
+    """Renderiza apenas a trilha de áudio com beeps, sem decodificar o vídeo."""
+
+    logger.info("Renderizando somente o áudio de %s", video_path)
+    audio_clip = mp.AudioFileClip(video_path)
+    try:
+        censored = build_censored_audio(
+            audio_clip,
+            float(audio_clip.duration),
+            beep_intervals,
+            beep_frequency=beep_frequency,
+            beep_volume=beep_volume,
+            ducking_volume=ducking_volume,
+        )
+        censored = censored.set_duration(audio_clip.duration)
+        censored.write_audiofile(
+            output_audio_path,
+            fps=44100,
+            codec=audio_codec,
+            bitrate=audio_bitrate,
+            logger=MoviePyProgressLogger(on_progress, bar="chunk") if on_progress else None,
+        )
+    finally:
+        audio_clip.close()
+    return output_audio_path
+
+
 
 
 
@@ -1,7 +1,14 @@
 from moviepy.editor import VideoFileClip
 
-def extract_audio_from_video(video_path, audio_path):
-    """Extrai áudio de um vídeo e salva no formato WAV."""
+from .progress_eta import MoviePyProgressLogger
+
+
+def extract_audio_from_video(video_path, audio_path, on_progress=None):
+    """Extrai áudio de um vídeo e salva no formato WAV.
+
+    ``on_progress`` recebe a fração dos blocos de áudio já gravados.
+    """
     video = VideoFileClip(video_path)
     audio = video.audio
-    audio.write_audiofile(audio_path, codec='pcm_s16le')  # Forçando o codec WAV adequado
+    logger = MoviePyProgressLogger(on_progress, bar="chunk") if on_progress else "bar"
+    audio.write_audiofile(audio_path, codec='pcm_s16le', logger=logger)  # Forçando o codec WAV adequado
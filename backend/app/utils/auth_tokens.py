@@ -0,0 +1,74 @@
+"""Validação de JWT compartilhada pelo Flask e pelo servidor de progresso.
+
+O Flask valida os tokens com ``flask_jwt_extended`` usando
+``settings.jwt_secret_key``; processos que não rodam o Flask (como o
+``progress_server.py``) validam o mesmo token de acesso aqui, sem contexto de
+aplicação, com o mesmo segredo e algoritmo.
+
+O EventSource do navegador não envia cabeçalhos, então o stream de progresso
+é aberto com um ticket na URL em vez do token de acesso (24 h), que acabaria
+nos logs de proxy: o ticket vale só para um vídeo e por
+``progress_ticket_seconds``.
+"""
+from __future__ import annotations
+
+import time
+
+import jwt
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+
+# Padrão do flask_jwt_extended (JWT_ALGORITHM)
+JWT_ALGORITHM = "HS256"
+# Tipo dos tickets: o flask_jwt_extended e decode_access_token os recusam
+STREAM_TICKET_TYPE = "progress_stream"
+
+
+def decode_access_token(token: str) -> str:
+    """Valida um token de acesso e retorna a identidade (``sub``).
+
+    Levanta ``jwt.InvalidTokenError`` se o token for inválido, expirado ou
+    não for de acesso (um refresh token, por exemplo).
+    """
+    claims = jwt.decode(
+        token,
+        settings.jwt_secret_key,
+        algorithms=[JWT_ALGORITHM],
+        options={"require": ["exp", "sub"]},
+    )
+    if claims.get("type") != "access":
+        raise jwt.InvalidTokenError("Token não é de acesso")
+    return str(claims["sub"])
+
+
+def create_stream_ticket(user_id: str, video_hash: str) -> str:
+    """Ticket que abre só o stream de progresso de ``video_hash``."""
+    now = int(time.time())
+    claims = {
+        "sub": str(user_id),
+        "type": STREAM_TICKET_TYPE,
+        "video": video_hash,
+        "iat": now,
+        "exp": now + settings.progress_ticket_seconds,
+    }
+    return jwt.encode(claims, settings.jwt_secret_key, algorithm=JWT_ALGORITHM)
+
+
+def decode_stream_ticket(ticket: str, video_hash: str) -> str:
+    """Valida um ticket para o stream de ``video_hash`` e retorna a identidade.
+
+    Levanta ``jwt.InvalidTokenError`` se o ticket for inválido, expirado ou de
+    outro vídeo.
+    """
+    claims = jwt.decode(
+        ticket,
+        settings.jwt_secret_key,
+        algorithms=[JWT_ALGORITHM],
+        options={"require": ["exp", "sub", "video"]},
+    )
+    if claims.get("type") != STREAM_TICKET_TYPE or claims.get("video") != video_hash:
+        raise jwt.InvalidTokenError("Ticket não é deste stream")
+    return str(claims["sub"])
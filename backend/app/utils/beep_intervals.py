@@ -0,0 +1,212 @@
+"""Índice ordenado de intervalos de beep e síntese da trilha de beeps."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_interval(item: Sequence[float]) -> Tuple[float, float] | None:
+    """Converte ``(start, end, ...)`` em ``(start, end)`` válido ou ``None``."""
+    try:
+        start, end = float(item[0]), float(item[1])
+    except (TypeError, ValueError, IndexError):
+        return None
+    if end <= start:
+        return None
+    return start, end
+
+
+def merge_intervals(
+    intervals: Iterable[Tuple[float, float]],
+    *,
+    pad_seconds: float = 0.0,
+    clip_duration: float | None = None,
+    join_gap: float = 0.0,
+    min_duration: float = 0.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Aplica padding, ordena e une intervalos sobrepostos ou adjacentes.
+
+    Args:
+        intervals: pares ``(start, end)`` em segundos.
+        pad_seconds: margem aplicada antes e depois de cada intervalo.
+        clip_duration: limite superior (duração do clipe), se conhecido.
+        join_gap: intervalos separados por até ``join_gap`` segundos são unidos.
+        min_duration: duração mínima de cada intervalo antes da união.
+
+    Returns:
+        Arrays ``(starts, ends)`` ordenados e sem sobreposição.
+    """
+    padded: list[Tuple[float, float]] = []
+    for start, end in intervals:
+        padded_start = max(0.0, start - pad_seconds)
+        padded_end = max(end + pad_seconds, padded_start + min_duration)
+        if clip_duration is not None:
+            padded_end = min(clip_duration, padded_end)
+        if padded_end - padded_start <= 0:
+            continue
+        padded.append((padded_start, padded_end))
+
+    if not padded:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty.copy()
+
+    padded.sort()
+    merged: list[list[float]] = [list(padded[0])]
+    for start, end in padded[1:]:
+        last = merged[-1]
+        if start <= last[1] + join_gap:
+            last[1] = max(last[1], end)
+        else:
+            merged.append([start, end])
+
+    bounds = np.asarray(merged, dtype=np.float64)
+    return np.ascontiguousarray(bounds[:, 0]), np.ascontiguousarray(bounds[:, 1])
+
+
+class BeepIntervalIndex:
+    """Intervalos de beep unidos e ordenados, consultáveis via ``searchsorted``.
+
+    O índice é montado uma única vez por renderização; cada bloco de áudio é
+    resolvido com uma busca binária vetorizada em vez de um laço por beep.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray) -> None:
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_intervals(
+        cls,
+        intervals: Iterable[Sequence[float]],
+        *,
+        pad_seconds: float = 0.0,
+        clip_duration: float | None = None,
+        join_gap: float = 0.0,
+        min_duration: float = 0.0,
+    ) -> "BeepIntervalIndex":
+        normalized = (normalize_interval(item) for item in intervals)
+        starts, ends = merge_intervals(
+            (item for item in normalized if item),
+            pad_seconds=pad_seconds,
+            clip_duration=clip_duration,
+            join_gap=join_gap,
+            min_duration=min_duration,
+        )
+        return cls(starts, ends)
+
+    def __len__(self) -> int:
+        return int(self.starts.size)
+
+    def __iter__(self):
+        return iter(zip(self.starts.tolist(), self.ends.tolist()))
+
+    def locate(self, t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Retorna ``(idx, inside)``: intervalo candidato e máscara de pertinência."""
+        idx = np.searchsorted(self.starts, t, side="right")
+        idx -= 1
+        np.maximum(idx, 0, out=idx)
+        inside = t <= self.ends[idx]
+        inside &= t >= self.starts[idx]
+        return idx, inside
+
+    def contains(self, t: np.ndarray) -> np.ndarray:
+        """Máscara booleana indicando quais instantes caem dentro de um beep."""
+        t_array = np.asarray(t, dtype=np.float64)
+        if not len(self):
+            return np.zeros(t_array.shape, dtype=bool)
+        return self.locate(t_array)[1]
+
+    def gain_envelope(self, t, duck_level: float, out: np.ndarray | None = None) -> np.ndarray:
+        """Envelope de ganho: ``duck_level`` dentro dos beeps e ``1.0`` fora."""
+        t_array = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        if out is None or out.shape != t_array.shape:
+            out = np.empty(t_array.shape, dtype=np.float64)
+        out.fill(1.0)
+        if len(self):
+            inside = self.locate(t_array)[1]
+            out[inside] = duck_level
+        return out
+
+
+@dataclass(frozen=True)
+class BeepToneTable:
+    """Tabelas pré-calculadas de tom e rampas de fade para um beep."""
+
+    fps: int
+    tone: np.ndarray
+    fade_in: np.ndarray
+    fade_out: np.ndarray
+
+
+@lru_cache(maxsize=8)
+def get_tone_table(
+    frequency: int,
+    volume: float,
+    fps: int = 44100,
+    fade_in: float = 0.01,
+    fade_out: float = 0.02,
+) -> BeepToneTable:
+    """Retorna (com cache) as tabelas para a combinação frequência/volume.
+
+    Com frequência inteira, um segundo de amostras contém um número inteiro de
+    ciclos, então o tom em qualquer instante é ``tone[n % fps]``.
+    """
+    samples = np.arange(fps, dtype=np.float64)
+    tone = (float(volume) * np.sin(2 * np.pi * int(frequency) * samples / fps)).astype(np.float32)
+
+    def _ramp(seconds: float) -> np.ndarray:
+        length = max(1, int(round(seconds * fps)))
+        ramp = np.linspace(0.0, 1.0, length + 1, dtype=np.float32)
+        ramp.setflags(write=False)
+        return ramp
+
+    tone.setflags(write=False)
+    return BeepToneTable(fps=fps, tone=tone, fade_in=_ramp(fade_in), fade_out=_ramp(fade_out))
+
+
+def render_beep_signal(
+    index: BeepIntervalIndex,
+    t,
+    table: BeepToneTable,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Sintetiza a trilha de beeps (mono, float32) para os instantes ``t``.
+
+    Os intervalos do índice já estão unidos, então cada amostra pertence a no
+    máximo um beep e o sinal é montado numa única passada vetorizada.
+    """
+    t_array = np.atleast_1d(np.asarray(t, dtype=np.float64))
+    if out is None or out.shape != t_array.shape:
+        out = np.empty(t_array.shape, dtype=np.float32)
+    out.fill(0.0)
+    if not len(index):
+        return out
+
+    idx, inside = index.locate(t_array)
+    if not inside.any():
+        return out
+
+    times = t_array[inside]
+    active = idx[inside]
+    fps = table.fps
+
+    sample_index = np.rint(times * fps).astype(np.int64)
+    signal = table.tone[sample_index % fps]
+
+    last_in = table.fade_in.size - 1
+    from_start = np.rint((times - index.starts[active]) * fps).astype(np.int64)
+    np.clip(from_start, 0, last_in, out=from_start)
+    signal = signal * table.fade_in[from_start]
+
+    last_out = table.fade_out.size - 1
+    to_end = np.rint((index.ends[active] - times) * fps).astype(np.int64)
+    np.clip(to_end, 0, last_out, out=to_end)
+    signal *= table.fade_out[to_end]
+
+    out[inside] = signal
+    return out
@@ -0,0 +1,133 @@
+"""Empacotamento HLS (segmentos fMP4) do proxy de preview e dos vídeos finais.
+
+Com HLS o player começa a tocar depois de baixar a playlist e o primeiro
+segmento, qualquer que seja a duração do vídeo, e o seek vira o download de
+um segmento em vez de requisições Range sobre o MP4 inteiro. O pacote de
+``<dir>/<nome>.mp4`` fica em ``<dir>/hls/<nome>/`` junto de um marcador com
+a identidade do arquivo de origem; se a origem muda (nova renderização), o
+pacote antigo deixa de ser servido até ser refeito.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict
+
+try:
+    from app.config import settings
+    from app.services.ffmpeg import package_hls
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+    from services.ffmpeg import package_hls
+
+logger = logging.getLogger(__name__)
+
+HLS_PLAYLIST = "index.m3u8"
+_SOURCE_MARKER = "source.json"
+_HLS_FILE_RE = re.compile(r"^(index\.m3u8|init\.mp4|seg_\d{5}\.m4s)$")
+_MIMETYPES = {".m3u8": "application/vnd.apple.mpegurl", ".mp4": "video/mp4", ".m4s": "video/iso.segment"}
+
+# Só stream copy: uma thread e o processo do FFmpeg dão conta
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hls-packaging")
+_jobs: Dict[str, Future] = {}
+_jobs_lock = Lock()
+
+
+def hls_dir_for(media_path: str | os.PathLike) -> Path:
+    media = Path(media_path)
+    return media.parent / "hls" / media.stem
+
+
+def hls_mimetype(filename: str) -> str:
+    return _MIMETYPES.get(Path(filename).suffix.lower(), "application/octet-stream")
+
+
+def _source_identity(media_path: Path) -> dict:
+    stat = media_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_marker(package_dir: Path) -> dict | None:
+    try:
+        with (package_dir / _SOURCE_MARKER).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def package_media(media_path: str | os.PathLike) -> Path:
+    """Gera (ou refaz) o pacote HLS de ``media_path`` e retorna a playlist."""
+    media = Path(media_path)
+    target = hls_dir_for(media)
+    identity = _source_identity(media)
+    staging = target.with_name(f"{target.name}.partial-{uuid.uuid4().hex[:8]}")
+    try:
+        package_hls(media, staging, segment_seconds=settings.hls_segment_seconds)
+        with (staging / _SOURCE_MARKER).open("w", encoding="utf-8") as f:
+            json.dump(identity, f)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+    logger.info("Pacote HLS pronto: %s", target)
+    return target / HLS_PLAYLIST
+
+
+def _package_logged(media_path: str) -> Path:
+    try:
+        return package_media(media_path)
+    except Exception:
+        logger.exception("Falha ao empacotar HLS de %s", media_path)
+        raise
+
+
+def start_hls_packaging(media_path: str | os.PathLike) -> Future | None:
+    """Agenda o empacotamento HLS em segundo plano, se habilitado."""
+    if not settings.hls_enabled:
+        return None
+    media = Path(media_path)
+    # A versão entra na chave: uma nova renderização enfileira um novo pacote
+    key = f"{media.resolve()}:{hls_package_version(media)}"
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None and not job.done():
+            return job
+        job = _executor.submit(_package_logged, str(media_path))
+        _jobs[key] = job
+    job.add_done_callback(lambda _job: _forget_job(key, _job))
+    return job
+
+
+def _forget_job(key: str, job: Future) -> None:
+    with _jobs_lock:
+        if _jobs.get(key) is job:
+            _jobs.pop(key, None)
+
+
+def hls_file_if_ready(media_path: str | os.PathLike, filename: str) -> Path | None:
+    """Arquivo ``filename`` do pacote de ``media_path``, se estiver atualizado."""
+    if not _HLS_FILE_RE.match(filename):
+        return None
+    media = Path(media_path)
+    if not media.exists():
+        return None
+    package_dir = hls_dir_for(media)
+    if _read_marker(package_dir) != _source_identity(media):
+        return None
+    candidate = package_dir / filename
+    return candidate if candidate.exists() else None
+
+
+def hls_package_version(media_path: str | os.PathLike) -> str:
+    """Identifica a versão do pacote (para o ETag dos arquivos HLS)."""
+    identity = _source_identity(Path(media_path))
+    return f"{identity['size']}-{identity['mtime_ns']}"
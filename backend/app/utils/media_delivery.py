@@ -0,0 +1,160 @@
+"""Entrega de arquivos de vídeo com Range, ETag forte e GET condicional.
+
+``send_file`` do Flask já responde ``206``/``304``/``416`` quando recebe um
+ETag; aqui o ETag vem da identidade do conteúdo (hash do upload ou
+impressões digitais da renderização) em vez de data e tamanho, e o
+``Cache-Control`` é ajustado ao tipo de arquivo: ``private`` sempre, por
+causa do JWT, e ``immutable`` só quando a URL identifica a versão.
+
+Com ``TEXTWAVES_MEDIA_DELIVERY=x-accel`` (nginx) ou ``x-sendfile``
+(lighttpd/Apache), a rota continua validando o JWT e a posse do vídeo, mas
+devolve só um cabeçalho de redirecionamento interno e o servidor da frente
+envia os bytes (com Range próprio), sem ocupar um worker Python. Exemplo
+para nginx com a raiz padrão (``settings.media_root``)::
+
+    location /protected-media/ {
+        internal;
+        alias /caminho/para/backend/app/uploads/;
+    }
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import unicodedata
+from pathlib import Path
+from urllib.parse import quote
+
+from flask import Response, request, send_file
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+from .render_pipeline import load_manifest
+
+logger = logging.getLogger(__name__)
+
+# Um ano: o máximo que os navegadores respeitam na prática
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def content_etag(*parts: object) -> str:
+    """ETag forte derivado das partes que identificam o conteúdo."""
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def final_output_etag(path: str | os.PathLike) -> str:
+    """ETag de um ``final_<hash>`` a partir do seu manifesto de renderização.
+
+    As impressões digitais de vídeo e áudio identificam o conteúdo gerado;
+    tamanho e ``mtime`` entram também, porque o mesmo conteúdo reescrito (outra
+    estratégia, cópia do cache) não tem garantia de sair com os mesmos bytes e
+    o ETag é forte (usado em ``If-Range``).
+    """
+    output = Path(path)
+    stat = output.stat()
+    manifest = load_manifest(output)
+    if manifest and manifest.get("video") and manifest.get("audio"):
+        return content_etag(output.suffix, manifest["video"], manifest["audio"], stat.st_size, stat.st_mtime_ns)
+    return content_etag(output.suffix, stat.st_size, stat.st_mtime_ns)
+
+
+def front_server_redirect(path: str | os.PathLike) -> tuple[str, str] | None:
+    """Cabeçalho de envio interno para ``path`` no modo configurado, se houver."""
+    mode = settings.media_delivery
+    resolved = Path(path).resolve()
+    if mode == "x-sendfile":
+        return "X-Sendfile", str(resolved)
+    if mode == "x-accel":
+        try:
+            relative = resolved.relative_to(settings.media_root.resolve())
+        except ValueError:
+            logger.warning("Arquivo fora da raiz de mídia, enviado pelo Flask: %s", resolved)
+            return None
+        prefix = "/" + settings.media_accel_prefix.strip("/") + "/"
+        return "X-Accel-Redirect", prefix + quote(relative.as_posix())
+    return None
+
+
+def _filename_options(name: str) -> dict[str, str]:
+    # Mesmo tratamento do send_file: nomes com acento ganham ``filename*`` (RFC 5987)
+    try:
+        name.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+        return {"filename": simple, "filename*": f"UTF-8''{quote(name, safe='!#$&+^`|~')}"}
+    return {"filename": name}
+
+
+def _apply_cache_policy(response: Response, immutable: bool) -> None:
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = None
+        response.cache_control.no_cache = True
+
+
+def send_media(
+    path: str | os.PathLike,
+    *,
+    mimetype: str,
+    etag: str,
+    immutable: bool = False,
+    as_attachment: bool = False,
+    download_name: str | None = None,
+) -> Response:
+    """Envia ``path`` com suporte a Range (206), If-None-Match (304) e If-Range.
+
+    Com ``immutable=True`` a resposta pode ficar em cache por um ano sem
+    revalidação; caso contrário o cliente revalida sempre, o que custa só um
+    ``304`` enquanto o ETag não muda. No modo ``x-accel``/``x-sendfile`` a
+    resposta vai vazia, com o cabeçalho de redirecionamento interno.
+    """
+    redirect = front_server_redirect(path)
+    if redirect is not None:
+        response = Response(mimetype=mimetype)
+        # O corpo vem do servidor da frente; um Content-Length: 0 atrapalharia
+        response.automatically_set_content_length = False
+        response.headers[redirect[0]] = redirect[1]
+        if as_attachment:
+            response.headers.set(
+                "Content-Disposition", "attachment", **_filename_options(download_name or Path(path).name)
+            )
+        response.set_etag(etag)
+        _apply_cache_policy(response, immutable)
+        return response.make_conditional(request)
+
+    response = send_file(
+        str(path),
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=etag,
+        max_age=IMMUTABLE_MAX_AGE if immutable else 0,
+    )
+    # O Werkzeug só anuncia Range em respostas 206; sem o cabeçalho no 200
+    # inicial alguns players não permitem posicionar (seek) o vídeo
+    response.headers.setdefault("Accept-Ranges", "bytes")
+    _apply_cache_policy(response, immutable)
+    return response
+
+
+def send_bytes(
+    data: bytes,
+    *,
+    mimetype: str,
+    etag: str,
+    immutable: bool = False,
+) -> Response:
+    """Resposta em memória com o mesmo ETag/``Cache-Control`` de :func:`send_media`."""
+    response = Response(data, mimetype=mimetype)
+    response.set_etag(etag)
+    _apply_cache_policy(response, immutable)
+    return response.make_conditional(request)
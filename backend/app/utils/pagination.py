@@ -0,0 +1,109 @@
+"""Paginação por cursor (keyset), seleção de campos e contagens em cache.
+
+Listagens ordenadas por ``(created_at, id)`` decrescente continuam de onde a
+página anterior parou (``WHERE (created_at, id) < cursor``) em vez de pular
+linhas com ``OFFSET``: o custo de cada página não cresce com a posição, e um
+índice que termina em ``(created_at, id)`` atende filtro e ordenação.
+
+O total deixa de ser calculado a cada página: só quando pedido, e guardado
+por ``COUNT_CACHE_SECONDS`` (invalidado nas inclusões/remoções do processo).
+"""
+from __future__ import annotations
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import tuple_
+
+# Validade das contagens em cache (outros workers veem mudanças em até isso)
+COUNT_CACHE_SECONDS = 30.0
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_counts: dict[tuple, tuple[float, int]] = {}
+_counts_lock = threading.Lock()
+
+
+def encode_cursor(created_at: datetime, row_id: object) -> str:
+    """Cursor opaco para a próxima página, a partir da última linha entregue."""
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, object]:
+    """Inverso de :func:`encode_cursor`; ``ValueError`` se o cursor é inválido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, TypeError) as exc:
+        raise ValueError("cursor inválido") from exc
+
+
+def parse_page_size(raw: Optional[str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        size = int(raw) if raw not in (None, "") else default
+    except ValueError:
+        raise ValueError("limit inválido") from None
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def parse_fields(raw: Optional[str], allowed: Sequence[str]) -> Optional[list[str]]:
+    """Campos pedidos em ``fields=a,b,c`` (None = todos).
+
+    Raises:
+        ValueError: Algum campo não existe na listagem.
+    """
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}")
+    return fields or None
+
+
+def keyset_page(query, created_column, id_column, *, cursor: Optional[str], limit: int) -> tuple[list, Optional[str]]:
+    """Uma página de ``query`` em ``(created_at, id)`` decrescente.
+
+    ``created_at`` é sempre preenchido pelos modelos; a ordenação é só pelas
+    duas colunas para o índice composto dispensar a ordenação em memória.
+
+    Returns:
+        ``(linhas, próximo cursor)``; o cursor é None na última página.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Comparação de tupla: vira uma busca por faixa no índice
+        query = query.filter(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+    rows = query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+
+
+def cached_count(key: tuple, query) -> int:
+    """``query.count()`` guardado por ``COUNT_CACHE_SECONDS``."""
+    now = time.monotonic()
+    with _counts_lock:
+        hit = _counts.get(key)
+        if hit is not None and now - hit[0] < COUNT_CACHE_SECONDS:
+            return hit[1]
+    total = query.order_by(None).count()
+    with _counts_lock:
+        _counts[key] = (now, total)
+    return total
+
+
+def invalidate_counts(*prefix: object) -> None:
+    """Descarta as contagens cuja chave começa com ``prefix``."""
+    with _counts_lock:
+        for key in [key for key in _counts if key[: len(prefix)] == prefix]:
+            del _counts[key]
+
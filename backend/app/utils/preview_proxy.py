@@ -0,0 +1,88 @@
+"""Proxy leve (480p, keyframes densos) do vídeo enviado, para o editor.
+
+O upload original pode ter vários GB; o player do editor de legendas e
+beeps só precisa de uma versão pequena e fácil de posicionar. O proxy é
+gerado em segundo plano logo após o upload e fica ao lado do original como
+``proxy_<hash>.mp4``. Enquanto não estiver pronto, o original é servido.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict
+
+try:
+    from app.config import settings
+    from app.services.ffmpeg import transcode_preview_proxy
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+    from services.ffmpeg import transcode_preview_proxy
+from .hls_packaging import start_hls_packaging
+
+logger = logging.getLogger(__name__)
+
+# O trabalho pesado roda no processo do FFmpeg; uma thread basta para disparar
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-proxy")
+_jobs: Dict[str, Future] = {}
+_jobs_lock = Lock()
+
+
+def proxy_path_for(video_hash: str, video_path: str | os.PathLike) -> Path:
+    """Caminho do proxy da sessão ``video_hash`` (ao lado do vídeo original)."""
+    return Path(video_path).parent / f"proxy_{video_hash}.mp4"
+
+
+def _build_proxy(video_path: str, target: Path) -> Path:
+    partial = target.with_name(f"{target.stem}.partial{target.suffix}")
+    try:
+        transcode_preview_proxy(
+            video_path,
+            partial,
+            height=settings.preview_proxy_height,
+        )
+        os.replace(partial, target)
+    except Exception:
+        logger.exception("Falha ao gerar proxy de preview para %s", video_path)
+        raise
+    finally:
+        if partial.exists():
+            partial.unlink()
+    logger.info("Proxy de preview pronto: %s", target)
+    start_hls_packaging(target)
+    return target
+
+
+def start_preview_proxy(video_hash: str, video_path: str | os.PathLike) -> Future | None:
+    """Agenda a geração do proxy; não faz nada se já existe ou está em andamento."""
+    if settings.preview_proxy_height <= 0:
+        return None
+    target = proxy_path_for(video_hash, video_path)
+    with _jobs_lock:
+        job = _jobs.get(video_hash)
+        if job is not None and not job.done():
+            return job
+        if target.exists():
+            return None
+        job = _executor.submit(_build_proxy, str(video_path), target)
+        _jobs[video_hash] = job
+    job.add_done_callback(lambda _job: _forget_job(video_hash, _job))
+    return job
+
+
+def _forget_job(video_hash: str, job: Future) -> None:
+    with _jobs_lock:
+        if _jobs.get(video_hash) is job:
+            _jobs.pop(video_hash, None)
+
+
+def get_ready_proxy(video_hash: str, video_path: str | os.PathLike) -> Path | None:
+    """Proxy pronto para servir, ou None enquanto ainda está sendo gerado."""
+    target = proxy_path_for(video_hash, video_path)
+    with _jobs_lock:
+        running = video_hash in _jobs
+    if running or not target.exists():
+        return None
+    return target
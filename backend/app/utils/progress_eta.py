@@ -0,0 +1,227 @@
+"""Progresso real das etapas e previsão de tempo restante (ETA).
+
+Cada etapa longa (extração de áudio, transcrição, renderização) ocupa uma
+faixa do progresso total e informa a fração concluída a partir do trabalho
+de fato: quadros gravados pelo MoviePy (logger do proglog), segundos
+decodificados pelo Whisper e ``-progress`` do FFmpeg. O ETA combina o ritmo
+observado com o fator de tempo real (segundos de trabalho por segundo de
+mídia) já medido para a etapa nesta máquina, guardado em
+``instance/stage_timings.json``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence
+
+import proglog
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+from .progress_tracker import update_progress
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float], None]
+
+# Intervalo mínimo entre publicações de uma mesma etapa
+PUBLISH_INTERVAL_SECONDS = 0.5
+# Peso das medições novas na média do fator de tempo real
+_EWMA_ALPHA = 0.3
+
+
+def subrange(callback: Optional[ProgressCallback], start: float, end: float) -> Optional[ProgressCallback]:
+    """Mapeia a fração [0, 1] de um passo para [start, end] de ``callback``."""
+    if callback is None:
+        return None
+    return lambda fraction: callback(start + (end - start) * max(0.0, min(1.0, fraction)))
+
+
+class MoviePyProgressLogger(proglog.ProgressBarLogger):
+    """Logger do MoviePy que repassa o avanço da barra ``bar`` como fração.
+
+    ``write_videofile`` usa a barra ``t`` (quadros) e ``write_audiofile`` a
+    barra ``chunk`` (blocos de áudio).
+    """
+
+    def __init__(self, callback: ProgressCallback, bar: str = "t") -> None:
+        super().__init__()
+        # ``callback`` já é um método do proglog
+        self.on_progress = callback
+        self.bar = bar
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if bar != self.bar or attr != "index":
+            return
+        total = self.bars[bar].get("total")
+        if total:
+            self.on_progress(min(1.0, max(0, value) / total))
+
+
+class StageTimings:
+    """Fatores de tempo real por etapa e por máquina (média móvel)."""
+
+    def __init__(self, path: os.PathLike) -> None:
+        self.path = Path(path)
+        self.machine = socket.gethostname()
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _key(self, stage: str) -> str:
+        return f"{self.machine}:{stage}"
+
+    def real_time_factor(self, stage: str) -> Optional[float]:
+        entry = self._load().get(self._key(stage))
+        return float(entry["rtf"]) if entry else None
+
+    def record(self, stage: str, elapsed_seconds: float, media_seconds: float) -> None:
+        if media_seconds <= 0 or elapsed_seconds <= 0:
+            return
+        rtf = elapsed_seconds / media_seconds
+        with self._lock:
+            data = self._load()
+            entry = data.get(self._key(stage))
+            if entry:
+                rtf = _EWMA_ALPHA * rtf + (1 - _EWMA_ALPHA) * float(entry["rtf"])
+                samples = int(entry.get("samples", 1)) + 1
+            else:
+                samples = 1
+            data[self._key(stage)] = {"rtf": rtf, "samples": samples}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            partial = self.path.with_name(f"{self.path.name}.{os.getpid()}.partial")
+            try:
+                with partial.open("w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(partial, self.path)
+            except OSError:
+                logger.warning("Não foi possível salvar tempos das etapas em %s", self.path)
+
+
+_timings: Optional[StageTimings] = None
+_timings_lock = threading.Lock()
+
+
+def get_stage_timings() -> StageTimings:
+    global _timings
+    path = settings.base_dir / "instance" / "stage_timings.json"
+    with _timings_lock:
+        if _timings is None or _timings.path != path:
+            _timings = StageTimings(path)
+        return _timings
+
+
+def estimate_remaining(
+    elapsed: float,
+    fraction: float,
+    predicted_total: Optional[float],
+) -> Optional[float]:
+    """Segundos restantes da etapa a partir do ritmo observado e da previsão.
+
+    No começo vale a previsão histórica; conforme a etapa avança, o ritmo
+    observado (``elapsed / fraction``) pesa mais.
+    """
+    observed_total = elapsed / fraction if fraction >= 0.01 else None
+    if observed_total is None and predicted_total is None:
+        return None
+    if observed_total is None:
+        total = predicted_total
+    elif predicted_total is None:
+        total = observed_total
+    else:
+        total = fraction * observed_total + (1 - fraction) * predicted_total
+    return max(0.0, total - elapsed)
+
+
+class StageProgress:
+    """Publica o progresso real de uma etapa dentro da faixa [start, end].
+
+    Uso::
+
+        with StageProgress(video_hash, 'transcribing', 'Transcrevendo...', 15, 90,
+                           media_seconds=duration) as stage:
+            transcribe_audio(audio_path, on_progress=stage.update)
+
+    Ao sair sem erro, o tempo gasto atualiza o fator de tempo real da etapa.
+    ``following`` lista as etapas seguintes cuja previsão entra no ETA.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        stage: str,
+        message: str,
+        start: float,
+        end: float,
+        *,
+        media_seconds: Optional[float] = None,
+        following: Sequence[str] = (),
+        timings: Optional[StageTimings] = None,
+    ) -> None:
+        self.session_id = session_id
+        self.stage = stage
+        self.message = message
+        self.start = start
+        self.end = end
+        self.media_seconds = media_seconds if media_seconds and media_seconds > 0 else None
+        self.following = tuple(following)
+        self.timings = timings or get_stage_timings()
+        self._started = 0.0
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+        self._record = True
+
+    def _predicted(self, stage: str) -> Optional[float]:
+        if self.media_seconds is None:
+            return None
+        rtf = self.timings.real_time_factor(stage)
+        return rtf * self.media_seconds if rtf is not None else None
+
+    def _eta(self, fraction: float) -> Optional[float]:
+        remaining = estimate_remaining(time.monotonic() - self._started, fraction, self._predicted(self.stage))
+        if remaining is None:
+            return None
+        for stage in self.following:
+            predicted = self._predicted(stage)
+            if predicted is not None:
+                remaining += predicted
+        return round(remaining, 1)
+
+    def _publish(self, fraction: float) -> None:
+        progress = self.start + (self.end - self.start) * fraction
+        update_progress(self.session_id, self.stage, round(progress, 1), self.message, eta_seconds=self._eta(fraction))
+
+    def __enter__(self) -> "StageProgress":
+        self._started = time.monotonic()
+        self._last_publish = self._started
+        self._publish(0.0)
+        return self
+
+    def update(self, fraction: float) -> None:
+        fraction = max(0.0, min(1.0, float(fraction)))
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_publish < PUBLISH_INTERVAL_SECONDS and fraction < 1.0:
+                return
+            self._last_publish = now
+        self._publish(fraction)
+
+    def discard_timing(self) -> None:
+        """Não registra esta execução (ex.: saída reaproveitada do cache)."""
+        self._record = False
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None and self._record and self.media_seconds is not None:
+            self.timings.record(self.stage, time.monotonic() - self._started, self.media_seconds)
@@ -0,0 +1,204 @@
+"""
+Cross-process progress store for multi-worker deployments.
+
+With ``TEXTWAVES_PROGRESS_BACKEND=sqlite`` every worker appends progress
+events to one SQLite database in WAL mode. Event ids come from the table, so
+they are global and ``Last-Event-ID`` works whichever worker the EventSource
+reconnects to. Each process runs a single watcher thread that only stats the
+WAL file every few milliseconds and queries the database when it changed,
+then hands the new events to the in-process channels of ``progress_tracker``.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+
+logger = logging.getLogger(__name__)
+
+WATCH_INTERVAL_SECONDS = 0.02
+# Re-query even without a visible file change (coarse mtime, checkpoints)
+_FORCE_CHECK_SECONDS = 1.0
+
+# (event id, session id, state); a None state marks a cleaned-up session
+StoredEvent = Tuple[int, str, Optional[Dict]]
+
+
+class SQLiteProgressStore:
+    """Progress events shared by every process that opens the same file."""
+
+    def __init__(self, path: os.PathLike) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS progress_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                state TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_progress_events_session ON progress_events (session_id, id)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit: every statement is its own short transaction
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, state: Dict, keep: int) -> int:
+        """Store a new state and trim the session to its ``keep`` newest events."""
+        conn = self._conn()
+        cursor = conn.execute(
+            "INSERT INTO progress_events (session_id, state, created_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(state), time.time()),
+        )
+        conn.execute(
+            """
+            DELETE FROM progress_events WHERE session_id = ? AND id < (
+                SELECT id FROM progress_events WHERE session_id = ?
+                ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (session_id, session_id, keep - 1),
+        )
+        return cursor.lastrowid
+
+    def history(self, session_id: str) -> List[Tuple[int, Dict]]:
+        rows = self._conn().execute(
+            "SELECT id, state FROM progress_events WHERE session_id = ? AND state IS NOT NULL ORDER BY id",
+            (session_id,),
+        ).fetchall()
+        return [(event_id, json.loads(state)) for event_id, state in rows]
+
+    def latest(self, session_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT state FROM progress_events WHERE session_id = ? ORDER BY id DESC LIMIT 1",
+            (session_id,),
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def events_after(self, last_id: int) -> List[StoredEvent]:
+        rows = self._conn().execute(
+            "SELECT id, session_id, state FROM progress_events WHERE id > ? ORDER BY id",
+            (last_id,),
+        ).fetchall()
+        return [(event_id, session_id, json.loads(state) if state is not None else None)
+                for event_id, session_id, state in rows]
+
+    def last_event_id(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM progress_events").fetchone()[0]
+
+    def close_session(self, session_id: str) -> None:
+        """Drop a session, leaving a marker so other workers close their streams."""
+        conn = self._conn()
+        conn.execute("DELETE FROM progress_events WHERE session_id = ?", (session_id,))
+        conn.execute(
+            "INSERT INTO progress_events (session_id, state, created_at) VALUES (?, NULL, ?)",
+            (session_id, time.time()),
+        )
+
+    def evict_idle(self, max_age_seconds: float) -> None:
+        self._conn().execute(
+            """
+            DELETE FROM progress_events WHERE session_id IN (
+                SELECT session_id FROM progress_events
+                GROUP BY session_id HAVING MAX(created_at) < ?
+            )
+            """,
+            (time.time() - max_age_seconds,),
+        )
+
+    def change_token(self) -> Tuple:
+        """Cheap fingerprint of the database files; changes on every commit."""
+        token = []
+        for candidate in (self.path, self.path.with_name(self.path.name + "-wal")):
+            try:
+                stat = candidate.stat()
+                token.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                token.append(None)
+        return tuple(token)
+
+
+class ProgressWatcher:
+    """Background thread feeding events written by any process to ``deliver``."""
+
+    def __init__(
+        self,
+        store: SQLiteProgressStore,
+        deliver: Callable[[int, str, Optional[Dict]], None],
+        interval: float = WATCH_INTERVAL_SECONDS,
+    ) -> None:
+        self.store = store
+        self.deliver = deliver
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                # Read synchronously: events appended right after start() must not be missed
+                last_id = self.store.last_event_id()
+                self._thread = threading.Thread(
+                    target=self._run, args=(last_id,), name="progress-watcher", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self, last_id: int) -> None:
+        token = None
+        last_check = 0.0
+        while not self._stopped.is_set():
+            try:
+                current = self.store.change_token()
+                now = time.monotonic()
+                if current != token or now - last_check >= _FORCE_CHECK_SECONDS:
+                    token = current
+                    last_check = now
+                    for event_id, session_id, state in self.store.events_after(last_id):
+                        self.deliver(event_id, session_id, state)
+                        last_id = event_id
+            except Exception:
+                logger.exception("Progress watcher failed to read %s", self.store.path)
+                self._stopped.wait(_FORCE_CHECK_SECONDS)
+            self._stopped.wait(self.interval)
+
+
+_store: Optional[SQLiteProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> Optional[SQLiteProgressStore]:
+    """Shared store for the configured backend, or None for in-memory progress."""
+    global _store
+    if settings.progress_backend != "sqlite":
+        return None
+    path = settings.progress_store_path
+    with _store_lock:
+        if _store is None or _store.path != Path(path):
+            _store = SQLiteProgressStore(path)
+        return _store
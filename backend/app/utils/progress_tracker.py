@@ -1,59 +1,290 @@
 """
 Real-time progress tracking for video processing using Server-Sent Events (SSE)
+
+Each session has a channel: publishers replace its state and notify the
+channel's condition variable, so SSE subscribers sleep until something
+changes instead of polling. Channels keep a small ring buffer of recent
+events for ``Last-Event-ID`` replay, and channels nobody has updated or
+watched for a while are evicted.
+
+The channels fan events out inside one process. With the sqlite backend
+(see ``progress_store``) events are also written to a shared database and a
+watcher thread delivers events from other workers to the local channels.
 """
+import itertools
 import json
-from typing import Dict, Callable
-from threading import Lock
+import time
+from collections import deque
+from threading import Condition, Lock
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+from .progress_store import ProgressWatcher, SQLiteProgressStore, get_progress_store
+
+HEARTBEAT_SECONDS = 15
+HISTORY_SIZE = 32
+IDLE_EVICT_SECONDS = 30 * 60
+STREAM_MAX_SECONDS = 50 * 60
+RETRY_MILLISECONDS = 2000
+_EVICT_CHECK_SECONDS = 60
+
+_UNKNOWN_STATE = {
+    'stage': 'unknown',
+    'progress': 0,
+    'message': 'Estado desconhecido',
+    'error': None
+}
+
+
+class _Channel:
+    """Progress state of one session plus its recent events."""
 
-# Global progress storage with thread-safe access
-_progress_state: Dict[str, Dict] = {}
+    __slots__ = ('state', 'history', 'condition', 'subscribers', 'last_activity', 'closed')
+
+    def __init__(self) -> None:
+        self.state: Optional[Dict] = None
+        self.history: Deque[Tuple[int, Dict]] = deque(maxlen=HISTORY_SIZE)
+        self.condition = Condition()
+        self.subscribers = 0
+        self.last_activity = time.monotonic()
+        self.closed = False
+
+
+# Global channel registry; each channel has its own condition for the state
+_channels: Dict[str, _Channel] = {}
 _progress_lock = Lock()
+_event_ids = itertools.count(1)
+_last_eviction = time.monotonic()
+_watcher: Optional[ProgressWatcher] = None
 
-def initialize_progress(session_id: str) -> None:
-    """Initialize progress tracking for a session"""
+
+def _evict_idle_locked(now: float) -> None:
+    for session_id, channel in list(_channels.items()):
+        if channel.subscribers == 0 and now - channel.last_activity > IDLE_EVICT_SECONDS:
+            del _channels[session_id]
+
+
+def _get_channel(session_id: str, create: bool = True, subscribe: bool = False) -> Optional[_Channel]:
+    global _last_eviction
+    now = time.monotonic()
+    evicted = False
     with _progress_lock:
-        _progress_state[session_id] = {
-            'stage': 'starting',
-            'progress': 0,
-            'message': 'Iniciando processamento...',
-            'error': None
-        }
-
-def update_progress(session_id: str, stage: str, progress: float, message: str) -> None:
-    """Update progress for a session (0-100)"""
+        if now - _last_eviction >= _EVICT_CHECK_SECONDS:
+            _evict_idle_locked(now)
+            _last_eviction = now
+            evicted = True
+        channel = _channels.get(session_id)
+        if channel is None and create:
+            channel = _channels[session_id] = _Channel()
+        if channel is not None:
+            channel.last_activity = now
+            if subscribe:
+                channel.subscribers += 1
+    store = get_progress_store()
+    if evicted and store is not None:
+        store.evict_idle(IDLE_EVICT_SECONDS)
+    return channel
+
+
+def _unsubscribe(channel: _Channel) -> None:
     with _progress_lock:
-        if session_id not in _progress_state:
-            initialize_progress(session_id)
-        
-        _progress_state[session_id] = {
-            'stage': stage,
-            'progress': max(0, min(100, progress)),
-            'message': message,
-            'error': None
-        }
+        channel.subscribers -= 1
+        channel.last_activity = time.monotonic()
+
+
+def _deliver(channel: _Channel, event_id: int, state: Optional[Dict]) -> None:
+    """Apply an event and wake the subscribers (caller holds the condition).
+
+    Events older than the newest one already seen are ignored: with the
+    sqlite backend the same event arrives from the publisher and the watcher.
+    A None state closes the channel.
+    """
+    if channel.history and event_id <= channel.history[-1][0]:
+        return
+    if state is None:
+        channel.closed = True
+    else:
+        channel.state = state
+        channel.history.append((event_id, state))
+    channel.condition.notify_all()
+
+
+def _publish(session_id: str, state: Dict) -> None:
+    # The shared store assigns the event id; in memory a process-wide counter does
+    store = get_progress_store()
+    event_id = store.append(session_id, state, keep=HISTORY_SIZE) if store is not None else None
+    channel = _get_channel(session_id)
+    with channel.condition:
+        _deliver(channel, event_id if event_id is not None else next(_event_ids), state)
+
+
+def _deliver_from_store(event_id: int, session_id: str, state: Optional[Dict]) -> None:
+    # Only sessions someone in this process is watching have a channel
+    with _progress_lock:
+        channel = _channels.get(session_id)
+    if channel is None:
+        return
+    with channel.condition:
+        _deliver(channel, event_id, state)
+        closed = channel.closed
+    if closed:
+        # Cleaned up by another worker: later events start a fresh channel
+        with _progress_lock:
+            if _channels.get(session_id) is channel:
+                del _channels[session_id]
+
+
+def _ensure_watcher(store: SQLiteProgressStore) -> None:
+    global _watcher
+    with _progress_lock:
+        if _watcher is None or _watcher.store is not store:
+            _watcher = ProgressWatcher(store, _deliver_from_store)
+        watcher = _watcher
+    watcher.start()
+
+
+def initialize_progress(session_id: str) -> None:
+    """Initialize progress tracking for a session"""
+    _publish(session_id, {
+        'stage': 'starting',
+        'progress': 0,
+        'message': 'Iniciando processamento...',
+        'error': None
+    })
+
+
+def update_progress(
+    session_id: str,
+    stage: str,
+    progress: float,
+    message: str,
+    eta_seconds: Optional[float] = None,
+) -> None:
+    """Update progress for a session (0-100), optionally with the estimated seconds left"""
+    _publish(session_id, {
+        'stage': stage,
+        'progress': max(0, min(100, progress)),
+        'message': message,
+        'error': None,
+        'eta_seconds': eta_seconds
+    })
+
+
+def _current_state(session_id: str) -> Optional[Dict]:
+    store = get_progress_store()
+    if store is not None:
+        return store.latest(session_id)
+    channel = _get_channel(session_id, create=False)
+    if channel is None:
+        return None
+    with channel.condition:
+        return channel.state
+
 
 def set_error(session_id: str, error: str) -> None:
     """Mark session as errored"""
-    with _progress_lock:
-        if session_id in _progress_state:
-            _progress_state[session_id]['error'] = error
+    state = _current_state(session_id)
+    if state is not None:
+        _publish(session_id, {**state, 'error': error})
+
 
 def get_progress(session_id: str) -> Dict:
     """Get current progress state for a session"""
-    with _progress_lock:
-        return _progress_state.get(session_id, {
-            'stage': 'unknown',
-            'progress': 0,
-            'message': 'Estado desconhecido',
-            'error': None
-        })
+    return dict(_current_state(session_id) or _UNKNOWN_STATE)
+
 
 def cleanup_progress(session_id: str) -> None:
     """Clean up progress tracking for a session"""
     with _progress_lock:
-        _progress_state.pop(session_id, None)
+        channel = _channels.pop(session_id, None)
+    if channel is not None:
+        with channel.condition:
+            channel.closed = True
+            channel.condition.notify_all()
+    store = get_progress_store()
+    if store is not None:
+        store.close_session(session_id)
+
+
+def is_terminal_state(state: Dict) -> bool:
+    """True once a session completed or failed: its stream can end"""
+    return state.get('progress', 0) >= 100 or bool(state.get('error'))
+
+
+def format_sse_event(state: Dict, event_id: Optional[int] = None) -> str:
+    """Format a progress state as an SSE event"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {json.dumps(state)}\n\n"
+
 
 def generate_sse_message(session_id: str) -> str:
     """Generate SSE formatted message for current progress"""
-    progress = get_progress(session_id)
-    return f"data: {json.dumps(progress)}\n\n"
+    return format_sse_event(get_progress(session_id))
+
+
+def stream_progress(
+    session_id: str,
+    last_event_id: Optional[int] = None,
+    *,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+    max_seconds: float = STREAM_MAX_SECONDS,
+) -> Iterator[str]:
+    """Yield SSE events for a session as its progress changes.
+
+    Without ``last_event_id`` the current state is sent first; with it, the
+    buffered events after that id are replayed. Idle periods produce a
+    heartbeat comment, and the stream ends on completion, error, cleanup or
+    after ``max_seconds`` (the EventSource then reconnects with its last id).
+    """
+    channel = _get_channel(session_id, subscribe=True)
+    try:
+        store = get_progress_store()
+        if store is not None:
+            _ensure_watcher(store)
+            # Events published by other workers before this subscription
+            history = store.history(session_id)
+            with channel.condition:
+                for event_id, state in history:
+                    _deliver(channel, event_id, state)
+        deadline = time.monotonic() + max_seconds
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+        with channel.condition:
+            # Ids from before a restart (counter reset) are meaningless here
+            if channel.history and last_event_id is not None and last_event_id > channel.history[-1][0]:
+                last_event_id = None
+            if last_event_id is None:
+                pending = list(channel.history)[-1:]
+            else:
+                pending = [event for event in channel.history if event[0] > last_event_id]
+            state = channel.state
+        if state is None:
+            yield format_sse_event(_UNKNOWN_STATE)
+        elif not pending and is_terminal_state(state):
+            # Client already saw the final event before reconnecting
+            return
+        last_seen = pending[-1][0] if pending else (last_event_id or 0)
+
+        while True:
+            for event_id, state in pending:
+                yield format_sse_event(state, event_id)
+                if is_terminal_state(state):
+                    return
+
+            with channel.condition:
+                pending = [event for event in channel.history if event[0] > last_seen]
+                if not pending and not channel.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    channel.condition.wait(min(heartbeat_seconds, remaining))
+                    pending = [event for event in channel.history if event[0] > last_seen]
+                closed = channel.closed
+
+            if pending:
+                last_seen = pending[-1][0]
+            elif closed:
+                return
+            else:
+                yield ": heartbeat\n\n"
+    finally:
+        _unsubscribe(channel)
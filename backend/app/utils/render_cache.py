@@ -0,0 +1,170 @@
+"""Cache de vídeos finais compartilhado entre sessões e usuários.
+
+A chave é o digest do conteúdo da origem (o ``video_hash`` do upload), das
+legendas, dos beeps e de todas as opções de renderização. Um acerto liga
+(hard link) ou copia o arquivo do cache para ``final_<hash>.mp4`` sem
+reencodar nada. O diretório tem um orçamento de disco com remoção LRU: cada
+acerto atualiza o ``mtime`` da entrada e as menos usadas saem primeiro.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable, Sequence, Tuple
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def render_cache_key(
+    source_hash: str,
+    subtitles: Sequence[Tuple[float, float, str]],
+    beep_intervals: Iterable[Tuple[float, float]],
+    *,
+    beep_frequency: int,
+    beep_volume: float,
+    ducking_volume: float | None,
+    subtitle_options,
+    output_options,
+) -> str:
+    """Digest de tudo que determina o conteúdo do arquivo final."""
+    payload = {
+        "source": source_hash,
+        "subtitles": [[round(float(s), 3), round(float(e), 3), str(t)] for s, e, t in subtitles],
+        "beeps": [[round(float(s), 3), round(float(e), 3)] for s, e in beep_intervals],
+        "beep_frequency": int(beep_frequency),
+        "beep_volume": float(beep_volume),
+        "ducking_volume": ducking_volume,
+        "options": asdict(subtitle_options),
+        # ``parallel`` muda só a forma de renderizar, não o resultado
+        "output": {**asdict(output_options), "parallel": None},
+        "encoder": asdict(output_options.encoder),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def _cache_dir(cache_dir: str | os.PathLike | None) -> Path:
+    return Path(cache_dir) if cache_dir is not None else settings.render_cache_dir
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Publica ``source`` em ``target`` atomicamente, via hard link se possível."""
+    staging = target.with_name(f"{target.name}.{uuid.uuid4().hex[:8]}.partial")
+    try:
+        try:
+            os.link(source, staging)
+        except OSError:
+            # Sistemas de arquivos diferentes ou sem suporte a hard link
+            shutil.copyfile(source, staging)
+        os.replace(staging, target)
+    finally:
+        if staging.exists():
+            staging.unlink()
+
+
+def fetch_cached_render(
+    key: str,
+    output_path: str | os.PathLike,
+    extension: str,
+    *,
+    cache_dir: str | os.PathLike | None = None,
+) -> bool:
+    """Materializa a entrada ``key`` em ``output_path``; False se não houver."""
+    entry = _cache_dir(cache_dir) / f"{key}{extension}"
+    if not entry.exists():
+        return False
+    try:
+        _link_or_copy(entry, Path(output_path))
+        now = time.time()
+        os.utime(entry, (now, now))
+    except OSError as exc:
+        logger.warning("Falha ao usar entrada do cache de renderização %s: %s", entry.name, exc)
+        return False
+    logger.info("Cache de renderização: acerto %s", entry.name)
+    return True
+
+
+def store_render(
+    key: str,
+    output_path: str | os.PathLike,
+    extension: str,
+    *,
+    cache_dir: str | os.PathLike | None = None,
+    max_bytes: int | None = None,
+) -> Path | None:
+    """Guarda ``output_path`` no cache sob ``key`` e aplica o orçamento de disco."""
+    directory = _cache_dir(cache_dir)
+    budget = settings.render_cache_max_bytes if max_bytes is None else max_bytes
+    source = Path(output_path)
+    if budget <= 0 or source.stat().st_size > budget:
+        return None
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = directory / f"{key}{extension}"
+    try:
+        _link_or_copy(source, entry)
+    except OSError as exc:
+        logger.warning("Não foi possível guardar no cache de renderização: %s", exc)
+        return None
+    enforce_render_cache_budget(budget, cache_dir=directory, keep=entry)
+    return entry
+
+
+def enforce_render_cache_budget(
+    max_bytes: int | None = None,
+    *,
+    cache_dir: str | os.PathLike | None = None,
+    max_age_seconds: float | None = None,
+    keep: Path | None = None,
+) -> int:
+    """Remove entradas menos usadas até caber em ``max_bytes``.
+
+    Com ``max_age_seconds``, entradas sem acesso há mais tempo também saem.
+    Retorna o número de entradas removidas.
+    """
+    directory = _cache_dir(cache_dir)
+    budget = settings.render_cache_max_bytes if max_bytes is None else max_bytes
+    if not directory.exists():
+        return 0
+
+    entries = []
+    for entry in directory.iterdir():
+        if not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    entries.sort(key=lambda item: item[0])
+
+    now = time.time()
+    total = sum(size for _mtime, size, _entry in entries)
+    removed = 0
+    for mtime, size, entry in entries:
+        expired = max_age_seconds is not None and now - mtime > max_age_seconds
+        if not expired and total <= budget:
+            # Entradas seguintes são mais recentes
+            break
+        if entry == keep:
+            continue
+        try:
+            entry.unlink()
+        except OSError as exc:
+            logger.warning("Não foi possível remover %s do cache: %s", entry.name, exc)
+            continue
+        total -= size
+        removed += 1
+        logger.info("Cache de renderização: removido %s", entry.name)
+    return removed
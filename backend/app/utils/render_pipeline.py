@@ -0,0 +1,492 @@
+"""Orquestra a renderização final escolhendo o caminho mais barato possível.
+
+Cada saída ``final_<hash>.mp4`` ganha um manifesto ao lado
+(``final_<hash>.mp4.render.json``) com a impressão digital das trilhas de vídeo e
+áudio. Numa nova renderização, a trilha que não mudou é copiada (stream copy)
+em vez de reencodada. Com ``source_hash``, saídas idênticas de outras
+sessões vêm do cache de renderização (:mod:`render_cache`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Sequence, Tuple
+
+try:
+    from app.config import ENCODER_PROFILES, EncoderProfile, settings
+    from app.services.ffmpeg import can_copy_audio_to_mp4, mux_soft_subtitles, mux_streams, probe_media
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import ENCODER_PROFILES, EncoderProfile, settings
+    from services.ffmpeg import can_copy_audio_to_mp4, mux_soft_subtitles, mux_streams, probe_media
+from .beep_intervals import BeepIntervalIndex
+from .progress_eta import subrange
+from .render_cache import fetch_cached_render, render_cache_key, store_render
+from .CreateVideoWinthSubtitles import (
+    SubtitleRenderingOptions,
+    create_video_with_subtitles,
+    render_censored_audio,
+)
+from .segment_render import render_video_segments
+from .subtitle_formats import SUBTITLE_FORMATS, write_ass, write_srt
+
+logger = logging.getLogger(__name__)
+
+RENDER_MANIFEST_SUFFIX = ".render.json"
+
+STRATEGY_REUSED = "reused"
+STRATEGY_CACHED = "cached"
+STRATEGY_AUDIO_ONLY = "audio_only"
+STRATEGY_VIDEO_ONLY = "video_only"
+STRATEGY_FULL = "full"
+STRATEGY_SOFT = "soft_subtitles"
+
+RENDER_MODE_BURN = "burn"
+RENDER_MODE_SOFT = "soft"
+
+_CONTAINER_MIMETYPES = {"mp4": "video/mp4", "mkv": "video/x-matroska"}
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """Formato de saída escolhido por requisição via ``subtitle_config``.
+
+    ``mode="burn"`` (padrão) desenha as legendas na imagem. ``mode="soft"``
+    copia o vídeo e adiciona uma trilha de legenda: ``mov_text`` em MP4, ou
+    SRT/ASS em MKV. ``parallel=True`` renderiza a imagem em segmentos
+    distribuídos entre processos. ``encoder_profile`` escolhe um dos perfis
+    de ``config.ENCODER_PROFILES`` (padrão: ``settings.encoder_profile``).
+    """
+
+    mode: str = RENDER_MODE_BURN
+    container: str = "mp4"
+    subtitle_format: str = "srt"
+    font_size: int = 24
+    font_color: str | None = None
+    background_color: str | None = None
+    position: str = "bottom"
+    parallel: bool = False
+    encoder_profile: str | None = None
+
+    @classmethod
+    def from_subtitle_config(cls, config: dict | None) -> "OutputOptions":
+        config = config if isinstance(config, dict) else {}
+        mode = str(config.get("renderMode") or RENDER_MODE_BURN).lower()
+        if mode not in (RENDER_MODE_BURN, RENDER_MODE_SOFT):
+            raise ValueError(f"renderMode inválido: {mode}")
+        container = str(config.get("container") or "mp4").lower()
+        if container not in _CONTAINER_MIMETYPES:
+            raise ValueError(f"container inválido: {container}")
+        subtitle_format = str(config.get("subtitleFormat") or "srt").lower()
+        if subtitle_format not in SUBTITLE_FORMATS:
+            raise ValueError(f"subtitleFormat inválido: {subtitle_format}")
+        if mode == RENDER_MODE_BURN:
+            container = "mp4"
+        elif container == "mp4":
+            subtitle_format = "srt"
+        encoder_profile = str(config.get("encoderProfile") or settings.encoder_profile).lower()
+        if encoder_profile not in ENCODER_PROFILES:
+            raise ValueError(f"encoderProfile inválido: {encoder_profile}")
+        try:
+            font_size = int(config.get("fontSize") or 24)
+        except (TypeError, ValueError):
+            font_size = 24
+        return cls(
+            mode=mode,
+            container=container,
+            subtitle_format=subtitle_format,
+            font_size=font_size,
+            font_color=config.get("fontColor"),
+            background_color=config.get("backgroundColor"),
+            position=str(config.get("position") or "bottom"),
+            parallel=bool(config.get("parallel", False)),
+            encoder_profile=encoder_profile,
+        )
+
+    @property
+    def encoder(self) -> EncoderProfile:
+        return settings.resolve_encoder_profile(self.encoder_profile)
+
+    @property
+    def extension(self) -> str:
+        return f".{self.container}"
+
+    @property
+    def mimetype(self) -> str:
+        return _CONTAINER_MIMETYPES[self.container]
+
+    @property
+    def subtitle_codec(self) -> str:
+        if self.container == "mp4":
+            return "mov_text"
+        return self.subtitle_format
+
+
+def segment_cache_dir_for(output_path: str | os.PathLike) -> Path:
+    """Diretório com os segmentos já renderizados de ``output_path``."""
+    output = Path(output_path)
+    return output.parent / "segments" / output.stem
+
+
+def manifest_path_for(output_path: str | os.PathLike) -> Path:
+    """Caminho do manifesto de renderização associado a ``output_path``."""
+    output = Path(output_path)
+    return output.with_name(output.name + RENDER_MANIFEST_SUFFIX)
+
+
+def _digest(payload: object) -> str:
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _source_identity(video_path: str) -> list[object]:
+    stat = os.stat(video_path)
+    return [os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns]
+
+
+def _render_method(output_options: OutputOptions) -> str:
+    """Como a imagem será produzida: cópia (soft), segmentos ou passada única.
+
+    Com segmentos, ``parallel`` só distribui o trabalho: os cortes e o encode
+    de cada trecho são os mesmos.
+    """
+    if output_options.mode == RENDER_MODE_SOFT:
+        return "copy"
+    if output_options.parallel or settings.render_segment_cache:
+        return "segments"
+    return "single"
+
+
+def video_fingerprint(
+    video_path: str,
+    subtitles: Sequence[Tuple[float, float, str]],
+    subtitle_options: SubtitleRenderingOptions,
+    *,
+    output_options: OutputOptions | None = None,
+) -> str:
+    """Impressão digital de tudo que afeta a trilha de vídeo (e de legenda)."""
+    output_options = output_options or OutputOptions()
+    return _digest({
+        "source": _source_identity(video_path),
+        "subtitles": [[round(float(s), 3), round(float(e), 3), str(t)] for s, e, t in subtitles],
+        "options": asdict(subtitle_options),
+        # Segmentos e passada única geram bytes diferentes para a mesma imagem
+        "output": {**asdict(output_options), "parallel": None},
+        "method": _render_method(output_options),
+        "encoder": asdict(output_options.encoder),
+    })
+
+
+def audio_fingerprint(
+    video_path: str,
+    beep_index: BeepIntervalIndex,
+    *,
+    beep_frequency: int,
+    beep_volume: float,
+    ducking_volume: float | None,
+) -> str:
+    """Impressão digital de tudo que afeta a trilha de áudio."""
+    return _digest({
+        "source": _source_identity(video_path),
+        "beeps": [[round(s, 3), round(e, 3)] for s, e in beep_index],
+        "beep_frequency": int(beep_frequency),
+        "beep_volume": float(beep_volume),
+        "ducking_volume": ducking_volume,
+    })
+
+
+def load_manifest(output_path: str | os.PathLike) -> dict | None:
+    manifest_file = manifest_path_for(output_path)
+    if not manifest_file.exists() or not Path(output_path).exists():
+        return None
+    try:
+        with manifest_file.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        logger.warning("Manifesto de renderização ilegível: %s", manifest_file)
+        return None
+
+
+def _write_manifest(output_path: Path, manifest: dict) -> None:
+    manifest_file = manifest_path_for(output_path)
+    partial = manifest_file.with_name(manifest_file.name + ".partial")
+    with partial.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(partial, manifest_file)
+
+
+def _discard_manifest(output_path: Path) -> None:
+    """Remove o manifesto antes de reescrever a saída.
+
+    Durante a renderização (ou se ela falhar) o manifesto antigo descreveria
+    um arquivo que já não é o mesmo; sem ele a saída não é reaproveitada.
+    """
+    try:
+        manifest_path_for(output_path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _temp_path(output_path: Path, label: str, suffix: str | None = None) -> Path:
+    return output_path.with_name(f"{output_path.stem}.tmp-{label}{suffix or output_path.suffix}")
+
+
+def _render_picture(
+    video_path: str,
+    subtitles: Sequence[Tuple[float, float, str]],
+    output_path: Path,
+    subtitle_options: SubtitleRenderingOptions,
+    *,
+    encoder: EncoderProfile,
+    parallel: bool,
+    cache_dir: Path | None = None,
+    on_progress: Callable[[float], None] | None = None,
+) -> None:
+    """Renderiza só a imagem legendada, em série ou por segmentos.
+
+    Com cache de segmentos, só os trechos cujas legendas mudaram desde a última
+    renderização são refeitos; ``parallel`` distribui os segmentos entre
+    processos.
+    """
+    if parallel or cache_dir is not None:
+        stats = render_video_segments(
+            video_path,
+            subtitles,
+            str(output_path),
+            subtitle_options,
+            encoder=encoder,
+            workers=None if parallel else 1,
+            cache_dir=cache_dir,
+            on_progress=on_progress,
+        )
+        logger.info(
+            "Segmentos: %d renderizados, %d reaproveitados do cache",
+            stats.rendered,
+            stats.reused,
+        )
+        return
+    create_video_with_subtitles(
+        video_path,
+        subtitles,
+        str(output_path),
+        subtitle_options,
+        encoder=encoder,
+        include_audio=False,
+        on_progress=on_progress,
+    )
+
+
+def render_final_output(
+    video_path: str,
+    subtitles: Sequence[Tuple[float, float, str]],
+    output_video_path: str,
+    subtitle_options: SubtitleRenderingOptions,
+    *,
+    beep_intervals: Iterable[Tuple[float, float]] | None = None,
+    beep_frequency: int = 1000,
+    beep_volume: float = 0.6,
+    ducking_volume: float | None = 0.12,
+    output_options: OutputOptions | None = None,
+    source_hash: str | None = None,
+    on_progress: Callable[[float], None] | None = None,
+) -> str:
+    """Renderiza ``output_video_path`` reaproveitando a trilha que não mudou.
+
+    ``source_hash`` é o digest do conteúdo da origem; quando informado, uma
+    saída idêntica já presente no cache de renderização é usada sem reencode
+    e as novas renderizações são guardadas nele. ``on_progress`` recebe a
+    fração concluída, dividida entre os passos da estratégia escolhida.
+
+    Returns:
+        A estratégia usada: ``reused``, ``cached``, ``audio_only``,
+        ``video_only``, ``full`` ou ``soft_subtitles``.
+    """
+    output_options = output_options or OutputOptions()
+    output_path = Path(output_video_path)
+    beep_list = list(beep_intervals or [])
+    beep_index = BeepIntervalIndex.from_intervals(beep_list)
+
+    video_fp = video_fingerprint(
+        video_path,
+        subtitles,
+        subtitle_options,
+        output_options=output_options,
+    )
+    audio_fp = audio_fingerprint(
+        video_path,
+        beep_index,
+        beep_frequency=beep_frequency,
+        beep_volume=beep_volume,
+        ducking_volume=ducking_volume,
+    )
+
+    previous = load_manifest(output_path)
+    video_unchanged = bool(previous) and previous.get("video") == video_fp
+    audio_unchanged = bool(previous) and previous.get("audio") == audio_fp
+
+    audio_kwargs = dict(
+        beep_intervals=beep_list,
+        beep_frequency=beep_frequency,
+        beep_volume=beep_volume,
+        ducking_volume=ducking_volume,
+    )
+    cache_key = None
+    if source_hash and settings.render_cache_max_bytes > 0:
+        cache_key = render_cache_key(
+            source_hash,
+            subtitles,
+            beep_index,
+            beep_frequency=beep_frequency,
+            beep_volume=beep_volume,
+            ducking_volume=ducking_volume,
+            subtitle_options=subtitle_options,
+            output_options=output_options,
+        )
+    temp_files: list[Path] = []
+    cache_dir = segment_cache_dir_for(output_path) if settings.render_segment_cache else None
+    # Origem sem trilha de áudio: não há o que censurar nem copiar
+    has_audio = (video_unchanged and audio_unchanged) or probe_media(video_path).audio_codec is not None
+    # Sem áudio, beeps novos não mudam nada: a imagem basta
+    reusable = video_unchanged and (audio_unchanged or not has_audio)
+    if not reusable:
+        _discard_manifest(output_path)
+
+    try:
+        if reusable:
+            strategy = STRATEGY_REUSED
+        elif cache_key and fetch_cached_render(cache_key, output_path, output_options.extension):
+            strategy = STRATEGY_CACHED
+        elif output_options.mode == RENDER_MODE_SOFT:
+            # Vídeo copiado; só o áudio é reencodado, e apenas se houver beeps
+            strategy = STRATEGY_SOFT
+            audio_source = video_path if has_audio else None
+            if has_audio and (
+                len(beep_index) or not (output_options.container == "mkv" or can_copy_audio_to_mp4(video_path))
+            ):
+                audio_source = _temp_path(output_path, "audio", ".m4a")
+                temp_files.append(audio_source)
+                render_censored_audio(
+                    video_path, str(audio_source), on_progress=subrange(on_progress, 0.0, 0.7), **audio_kwargs
+                )
+            subtitle_file = _temp_path(output_path, "subs", f".{output_options.subtitle_format}")
+            temp_files.append(subtitle_file)
+            if output_options.subtitle_format == "ass":
+                write_ass(
+                    subtitles,
+                    subtitle_file,
+                    font_size=output_options.font_size,
+                    font_color=output_options.font_color or subtitle_options.font_color,
+                    bg_color=output_options.background_color or subtitle_options.bg_color,
+                    position=output_options.position,
+                )
+            else:
+                write_srt(subtitles, subtitle_file)
+            muxed = _temp_path(output_path, "mux")
+            temp_files.append(muxed)
+            mux_soft_subtitles(
+                video_path,
+                audio_source,
+                subtitle_file,
+                muxed,
+                subtitle_codec=output_options.subtitle_codec,
+                on_progress=subrange(on_progress, 0.7, 1.0),
+            )
+            os.replace(muxed, output_path)
+        elif video_unchanged:
+            # Só os beeps mudaram: copia a imagem já renderizada e refaz o áudio
+            strategy = STRATEGY_AUDIO_ONLY
+            audio_source = video_path
+            audio_codec = "copy"
+            if len(beep_index) or not can_copy_audio_to_mp4(video_path):
+                audio_source = _temp_path(output_path, "audio", ".m4a")
+                temp_files.append(audio_source)
+                render_censored_audio(
+                    video_path, str(audio_source), on_progress=subrange(on_progress, 0.0, 0.7), **audio_kwargs
+                )
+            muxed = _temp_path(output_path, "mux")
+            temp_files.append(muxed)
+            mux_streams(
+                output_path,
+                audio_source,
+                muxed,
+                audio_codec=audio_codec,
+                on_progress=subrange(on_progress, 0.7, 1.0),
+            )
+            os.replace(muxed, output_path)
+        elif not len(beep_index) and can_copy_audio_to_mp4(video_path):
+            # Sem beeps: o áudio original passa intacto, só a imagem é encodada
+            strategy = STRATEGY_VIDEO_ONLY
+            video_only = _temp_path(output_path, "video")
+            temp_files.append(video_only)
+            _render_picture(
+                video_path,
+                subtitles,
+                video_only,
+                subtitle_options,
+                encoder=output_options.encoder,
+                parallel=output_options.parallel,
+                cache_dir=cache_dir,
+                on_progress=subrange(on_progress, 0.0, 0.9),
+            )
+            muxed = _temp_path(output_path, "mux")
+            temp_files.append(muxed)
+            mux_streams(video_only, video_path, muxed, on_progress=subrange(on_progress, 0.9, 1.0))
+            os.replace(muxed, output_path)
+        elif output_options.parallel or cache_dir is not None:
+            # Imagem por segmentos (cache/paralelo); áudio com beeps numa passada única
+            strategy = STRATEGY_FULL
+            video_only = _temp_path(output_path, "video")
+            temp_files.append(video_only)
+            _render_picture(
+                video_path,
+                subtitles,
+                video_only,
+                subtitle_options,
+                encoder=output_options.encoder,
+                parallel=output_options.parallel,
+                cache_dir=cache_dir,
+                on_progress=subrange(on_progress, 0.0, 0.8),
+            )
+            audio_file = None
+            if has_audio:
+                audio_file = _temp_path(output_path, "audio", ".m4a")
+                temp_files.append(audio_file)
+                render_censored_audio(
+                    video_path, str(audio_file), on_progress=subrange(on_progress, 0.8, 0.95), **audio_kwargs
+                )
+            muxed = _temp_path(output_path, "mux")
+            temp_files.append(muxed)
+            mux_streams(video_only, audio_file, muxed, on_progress=subrange(on_progress, 0.95, 1.0))
+            os.replace(muxed, output_path)
+        else:
+            strategy = STRATEGY_FULL
+            rendered = _temp_path(output_path, "render")
+            temp_files.append(rendered)
+            create_video_with_subtitles(
+                video_path,
+                subtitles,
+                str(rendered),
+                subtitle_options,
+                encoder=output_options.encoder,
+                on_progress=on_progress,
+                **audio_kwargs,
+            )
+            os.replace(rendered, output_path)
+    finally:
+        for temp_file in temp_files:
+            if temp_file.exists():
+                try:
+                    temp_file.unlink()
+                except OSError:
+                    logger.warning("Não foi possível remover temporário: %s", temp_file)
+
+    if on_progress:
+        on_progress(1.0)
+    _write_manifest(output_path, {"video": video_fp, "audio": audio_fp, "strategy": strategy})
+    if cache_key and strategy not in (STRATEGY_REUSED, STRATEGY_CACHED):
+        store_render(cache_key, output_path, output_options.extension)
+    logger.info("Renderização final (%s) concluída: %s", strategy, output_path)
+    return strategy
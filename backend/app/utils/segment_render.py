@@ -0,0 +1,278 @@
+"""Renderização paralela e incremental por segmentos alinhados a keyframes.
+
+A linha do tempo é dividida em keyframes da origem; cada segmento tem as
+legendas desenhadas num processo separado e os resultados são unidos com o
+concat demuxer do FFmpeg, sem novo reencode. Os segmentos ficam em cache,
+então editar uma legenda só refaz os segmentos que ela toca. A trilha de
+áudio (com beeps) é renderizada uma única vez para o vídeo inteiro: é barata
+perto da imagem e evita cortes de priming do AAC nas junções.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Sequence, Tuple
+
+try:
+    from app.config import EncoderProfile, settings
+    from app.services.ffmpeg import concat_files, probe_keyframes, probe_media
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import EncoderProfile, settings
+    from services.ffmpeg import concat_files, probe_keyframes, probe_media
+from .CreateVideoWinthSubtitles import SubtitleRenderingOptions, create_video_with_subtitles
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Segment:
+    index: int
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def resolve_worker_count(requested: int | None = None) -> int:
+    workers = requested if requested is not None else settings.render_workers
+    if not workers or workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def plan_segments(
+    keyframes: Sequence[float],
+    duration: float,
+    *,
+    segment_count: int,
+    min_seconds: float,
+    fps: float | None = None,
+) -> list[Segment]:
+    """Escolhe até ``segment_count`` segmentos com cortes em keyframes.
+
+    Os cortes são alinhados à grade de quadros de saída (``fps``) para que a
+    soma dos segmentos tenha exatamente o número de quadros do vídeo inteiro.
+    """
+    if duration <= 0:
+        return []
+    count = max(1, min(segment_count, int(duration // max(min_seconds, 1e-6)) or 1))
+    candidates = sorted(k for k in keyframes if 0 < k < duration)
+    cuts: list[float] = []
+    if count > 1 and candidates:
+        target_length = duration / count
+        last_cut = 0.0
+        for step in range(1, count):
+            target = step * target_length
+            best = min(candidates, key=lambda k: abs(k - target))
+            if fps:
+                best = round(best * fps) / fps
+            if best - last_cut >= min_seconds and duration - best >= min_seconds and best not in cuts:
+                cuts.append(best)
+                last_cut = best
+
+    bounds = [0.0, *cuts, float(duration)]
+    return [
+        Segment(index=i, start=bounds[i], end=bounds[i + 1])
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def slice_subtitles(
+    subtitles: Sequence[Tuple[float, float, str]],
+    segment: Segment,
+) -> list[Tuple[float, float, str]]:
+    """Legendas visíveis no segmento, recortadas e com tempos relativos a ele.
+
+    Uma legenda que atravessa a fronteira aparece nos dois segmentos, cada um
+    com a sua parte, então a exibição continua sem salto após a concatenação.
+    """
+    sliced: list[Tuple[float, float, str]] = []
+    for start, end, text in subtitles:
+        start, end = float(start), float(end)
+        if end <= segment.start or start >= segment.end:
+            continue
+        local_start = max(start, segment.start) - segment.start
+        local_end = min(end, segment.end) - segment.start
+        if local_end > local_start:
+            sliced.append((local_start, local_end, text))
+    return sliced
+
+
+def _render_segment(job: dict) -> str:
+    """Executado no processo filho: renderiza um segmento só com imagem."""
+    # Renderiza num nome temporário para nunca deixar um segmento parcial no cache
+    partial = Path(job["output_path"]).with_suffix(".partial.mp4")
+    create_video_with_subtitles(
+        job["video_path"],
+        job["subtitles"],
+        str(partial),
+        job["subtitle_options"],
+        encoder=job["encoder"],
+        fps=job["fps"],
+        include_audio=False,
+        subclip=(job["start"], job["end"]),
+    )
+    os.replace(partial, job["output_path"])
+    return job["output_path"]
+
+
+def segment_cache_key(
+    video_path: str,
+    segment: Segment,
+    segment_subtitles: Sequence[Tuple[float, float, str]],
+    subtitle_options: SubtitleRenderingOptions,
+    *,
+    encoder: EncoderProfile,
+    fps: float,
+) -> str:
+    """Chave do segmento: origem, limites, legendas que o tocam e opções."""
+    stat = os.stat(video_path)
+    payload = {
+        "source": [os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns],
+        "bounds": [round(segment.start, 6), round(segment.end, 6)],
+        "subtitles": [[round(s, 3), round(e, 3), str(t)] for s, e, t in segment_subtitles],
+        "options": asdict(subtitle_options),
+        "encoder": asdict(encoder),
+        "fps": fps,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass(frozen=True)
+class SegmentRenderStats:
+    segments: int
+    rendered: int
+
+    @property
+    def reused(self) -> int:
+        return self.segments - self.rendered
+
+
+def render_video_segments(
+    video_path: str,
+    subtitles: Sequence[Tuple[float, float, str]],
+    output_video_path: str,
+    subtitle_options: SubtitleRenderingOptions,
+    *,
+    encoder: EncoderProfile | None = None,
+    workers: int | None = None,
+    cache_dir: str | os.PathLike | None = None,
+    segment_seconds: float | None = None,
+    min_segment_seconds: float | None = None,
+    on_progress: Callable[[float], None] | None = None,
+) -> SegmentRenderStats:
+    """Renderiza apenas a imagem legendada de ``video_path`` por segmentos.
+
+    Os segmentos têm tamanho alvo fixo (``segment_seconds``), então o mesmo
+    vídeo sempre gera os mesmos cortes. Com ``cache_dir``, cada segmento fica
+    salvo sob a chave de :func:`segment_cache_key`; numa nova renderização só
+    os segmentos cujas legendas mudaram são refeitos antes da concatenação.
+    Todos os segmentos usam a mesma taxa de quadros (a do perfil ou, por
+    padrão, a da origem) para que a junção não tenha saltos.
+    ``on_progress`` recebe a fração dos segmentos pendentes já renderizada.
+    """
+    encoder = encoder or settings.resolve_encoder_profile()
+    worker_count = resolve_worker_count(workers)
+    target_seconds = settings.render_segment_seconds if segment_seconds is None else segment_seconds
+    min_seconds = (
+        settings.render_min_segment_seconds if min_segment_seconds is None else min_segment_seconds
+    )
+    info = probe_media(video_path)
+    duration = info.duration or 0.0
+    fps = encoder.fps or info.fps or 24
+    segment_count = max(1, math.ceil(duration / target_seconds)) if target_seconds > 0 else 1
+    segments = plan_segments(
+        probe_keyframes(video_path) if segment_count > 1 else [],
+        duration,
+        segment_count=segment_count,
+        min_seconds=min_seconds,
+        fps=fps,
+    )
+    if not segments:
+        segments = [Segment(index=0, start=0.0, end=duration)]
+
+    output = Path(output_video_path)
+    persistent = cache_dir is not None
+    segment_dir = Path(cache_dir) if persistent else output.parent
+    segment_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    for segment in segments:
+        segment_subtitles = slice_subtitles(subtitles, segment)
+        if persistent:
+            key = segment_cache_key(
+                video_path, segment, segment_subtitles, subtitle_options, encoder=encoder, fps=fps
+            )
+            segment_path = segment_dir / f"seg_{key}.mp4"
+        else:
+            segment_path = output.with_name(f"{output.stem}.seg{segment.index:04d}{output.suffix}")
+        jobs.append({
+            "video_path": video_path,
+            "subtitles": segment_subtitles,
+            "output_path": str(segment_path),
+            "subtitle_options": subtitle_options,
+            "encoder": encoder,
+            "fps": fps,
+            "start": segment.start,
+            "end": segment.end,
+        })
+
+    pending = [job for job in jobs if not (persistent and Path(job["output_path"]).exists())]
+    logger.info(
+        "Renderizando %d de %d segmentos em %d processo(s): %s",
+        len(pending),
+        len(jobs),
+        max(1, min(worker_count, len(pending))),
+        video_path,
+    )
+
+    try:
+        if len(pending) > 1 and worker_count > 1:
+            with ProcessPoolExecutor(max_workers=min(worker_count, len(pending))) as executor:
+                futures = [executor.submit(_render_segment, job) for job in pending]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    if on_progress:
+                        on_progress(done / len(pending))
+        else:
+            for done, job in enumerate(pending, start=1):
+                _render_segment(job)
+                if on_progress:
+                    on_progress(done / len(pending))
+
+        segment_paths = [job["output_path"] for job in jobs]
+        if len(segment_paths) == 1:
+            shutil.copyfile(segment_paths[0], output)
+        else:
+            concat_files(segment_paths, output)
+    finally:
+        if not persistent:
+            for job in jobs:
+                segment_file = Path(job["output_path"])
+                if segment_file.exists():
+                    try:
+                        segment_file.unlink()
+                    except OSError:
+                        logger.warning("Não foi possível remover segmento: %s", segment_file)
+
+    if persistent:
+        # Segmentos de versões anteriores não serão mais usados
+        current = {Path(job["output_path"]).name for job in jobs}
+        for stale in segment_dir.glob("seg_*.mp4"):
+            if stale.name not in current:
+                try:
+                    stale.unlink()
+                except OSError:
+                    logger.warning("Não foi possível remover segmento antigo: %s", stale)
+
+    return SegmentRenderStats(segments=len(jobs), rendered=len(pending))
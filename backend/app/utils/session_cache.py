@@ -0,0 +1,206 @@
+"""Respostas de ``/get_session`` pré-serializadas e comprimidas.
+
+O editor recarrega a sessão inteira a cada abertura e após cada conflito; com
+milhares de legendas, serializar o JSON e comprimir a cada requisição custa
+mais que a leitura no banco. Aqui o corpo pronto (JSON e suas versões gzip/br)
+fica num cache LRU por processo, com limite em bytes
+(``session_cache_max_bytes``), indexado pela revisão da sessão
+(``version`` + ``created_at``): qualquer edição gera uma revisão nova, então a
+entrada antiga simplesmente deixa de ser usada e sai no próximo ``put``.
+
+A mesma revisão dá o ETag, com um sufixo por codificação (``-gz``, ``-br``):
+os corpos comprimidos têm outros bytes e não podem dividir um ETag forte. Um
+``If-None-Match`` com qualquer variante da revisão atual responde 304 só com a
+consulta de uma linha (:meth:`SQLiteSessionStore.revision`).
+
+``orjson`` e ``brotli`` são opcionais: sem eles o JSON sai pelo ``json`` da
+biblioteca padrão e a compressão fica só no gzip.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+
+from .media_delivery import content_etag
+from .session_store import SQLiteSessionStore
+
+# Formatos de /get_session: objetos por item ou listas paralelas
+FORM_FULL = "full"
+FORM_COLUMNAR = "columnar"
+SESSION_FORMS = (FORM_FULL, FORM_COLUMNAR)
+
+# Abaixo disso comprimir não compensa o cabeçalho extra
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Sufixo do ETag de cada codificação (identity fica com o ETag base)
+ETAG_ENCODING_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+def dumps(payload: object) -> bytes:
+    """JSON compacto em UTF-8 (``orjson`` quando instalado)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def session_etag(video_hash: str, version: int, created_at: float, form: str = FORM_FULL) -> str:
+    """ETag de uma revisão da sessão; cada formato tem o seu."""
+    if form == FORM_FULL:
+        return content_etag(video_hash, "session", created_at, version)
+    return content_etag(video_hash, "session", created_at, version, form)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    return etag + ETAG_ENCODING_SUFFIXES.get(encoding, "")
+
+
+def etag_variants(etag: str) -> tuple:
+    """O ETag base e o de cada codificação da mesma revisão."""
+    return (etag, *(etag + suffix for suffix in ETAG_ENCODING_SUFFIXES.values()))
+
+
+def available_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime fixo: mesma entrada, mesmos bytes
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return data
+
+
+def negotiate_encoding(body_size: int) -> str:
+    """Melhor codificação aceita pelo cliente (``identity`` se nenhuma)."""
+    if body_size < MIN_COMPRESS_BYTES:
+        return "identity"
+    best = request.accept_encodings.best_match(available_encodings())
+    return best or "identity"
+
+
+class SessionResponseCache:
+    """LRU ``(video_hash, form)`` -> corpos de uma revisão, por codificação."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(bodies: dict) -> int:
+        return sum(len(body) for body in bodies.values())
+
+    def get(self, video_hash: str, form: str, revision: tuple, encoding: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get((video_hash, form))
+            if entry is None or entry[0] != revision:
+                return None
+            self._entries.move_to_end((video_hash, form))
+            return entry[1].get(encoding)
+
+    def put(self, video_hash: str, form: str, revision: tuple, encoding: str, body: bytes) -> None:
+        if self.max_bytes <= 0 or len(body) > self.max_bytes:
+            return
+        key = (video_hash, form)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            bodies: dict = {}
+            if entry is not None:
+                self._size -= self._entry_size(entry[1])
+                # Revisão antiga é descartada; a mesma ganha mais uma codificação
+                if entry[0] == revision:
+                    bodies = entry[1]
+            bodies[encoding] = body
+            self._entries[key] = (revision, bodies)
+            self._size += self._entry_size(bodies)
+            while self._size > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= self._entry_size(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_cache: Optional[SessionResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> SessionResponseCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SessionResponseCache(settings.session_cache_max_bytes)
+    return _cache
+
+
+def _load_body(store: SQLiteSessionStore, video_hash: str, form: str) -> Optional[tuple]:
+    """Lê a sessão e devolve ``(revisão, JSON)``."""
+    session_data = store.load_columnar(video_hash) if form == FORM_COLUMNAR else store.load(video_hash)
+    if session_data is None:
+        return None
+    revision = (session_data["version"], session_data["created_at"])
+    return revision, dumps({"status": "success", "data": session_data})
+
+
+def send_session(store: SQLiteSessionStore, video_hash: str, form: str = FORM_FULL) -> Optional[Response]:
+    """Resposta de ``/get_session`` (200 ou 304), ou None se a sessão não existe."""
+    revision = store.revision(video_hash)
+    if revision is None:
+        return None
+    etag = session_etag(video_hash, *revision, form=form)
+    matched = next((tag for tag in etag_variants(etag) if request.if_none_match.contains(tag)), None)
+    if matched is not None:
+        response = Response(status=304)
+        response.set_etag(matched)
+    else:
+        cache = get_session_cache()
+        identity = cache.get(video_hash, form, revision, "identity")
+        if identity is None:
+            loaded = _load_body(store, video_hash, form)
+            if loaded is None:
+                return None
+            # Uma edição entre as duas leituras: vale a revisão do que foi lido
+            revision, identity = loaded
+            etag = session_etag(video_hash, *revision, form=form)
+            cache.put(video_hash, form, revision, "identity", identity)
+        encoding = negotiate_encoding(len(identity))
+        body = identity if encoding == "identity" else cache.get(video_hash, form, revision, encoding)
+        if body is None:
+            body = compress(identity, encoding)
+            cache.put(video_hash, form, revision, encoding, body)
+        response = Response(body, mimetype="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.set_etag(encoded_etag(etag, encoding))
+    response.vary.add("Accept-Encoding")
+    # O navegador guarda, mas revalida sempre: a sessão muda a cada edição
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
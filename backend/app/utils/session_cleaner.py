@@ -3,18 +3,42 @@ from __future__ import annotations
 
 import logging
 import os
+import shutil
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from flask import has_app_context
+
 try:
     from app.config import settings
 except ImportError:  # pragma: no cover
     from config import settings
+from .render_cache import enforce_render_cache_budget
+from .session_store import get_session_store
 
 logger = logging.getLogger(__name__)
 
 
+def _record_removed_artifacts(final_names: set[str], session_hashes: set[str]) -> None:
+    """Atualiza a disponibilidade de arquivos no histórico (VideoTask).
+
+    Sem contexto da aplicação (limpeza avulsa) nada é gravado; a conferência
+    periódica do VideoTask corrige depois.
+    """
+    if not final_names and not session_hashes:
+        return
+    if not has_app_context():
+        logger.debug("Limpeza sem contexto da aplicação: histórico não atualizado")
+        return
+    from models.video_model import VideoTask
+
+    try:
+        VideoTask.mark_artifacts_removed(final_names=final_names, session_hashes=session_hashes)
+    except Exception as e:
+        logger.error(f"Erro ao atualizar histórico após limpeza: {e}")
+
+
 def clean_old_sessions(max_age_hours: int = 24) -> dict[str, int]:
     """Remove sessões e arquivos temporários mais antigos que max_age_hours.
     
@@ -32,6 +56,7 @@ def clean_old_sessions(max_age_hours: int = 24) -> dict[str, int]:
         'sessions': 0,
         'temp_audio': 0,
         'final_videos': 0,
+        'render_cache': 0,
         'errors': 0
     }
     
@@ -39,13 +64,28 @@ def clean_old_sessions(max_age_hours: int = 24) -> dict[str, int]:
         logger.warning(f"Diretório de uploads não existe: {upload_dir}")
         return counters
     
-    # Limpar sessões antigas (session_*.json)
+    removed_finals: set[str] = set()
+    removed_sessions: set[str] = set()
+
+    # Sessões do editor no banco sem alteração há mais de max_age_hours
+    try:
+        expired = get_session_store().expire(max_age_seconds)
+        counters['sessions'] += len(expired)
+        removed_sessions.update(expired)
+    except Exception as e:
+        counters['errors'] += 1
+        logger.error(f"Erro ao remover sessões do banco: {e}")
+
+    # Sessões antigas ainda em arquivo (session_*.json, formato anterior ao banco)
     for session_file in upload_dir.glob("session_*.json"):
         try:
             file_age = now - os.path.getmtime(session_file)
             if file_age > max_age_seconds:
                 session_file.unlink()
                 counters['sessions'] += 1
+                video_hash = session_file.stem[len("session_"):]
+                if not get_session_store().exists(video_hash):
+                    removed_sessions.add(video_hash)
                 logger.info(f"Sessão antiga removida: {session_file.name}")
         except Exception as e:
             counters['errors'] += 1
@@ -63,17 +103,91 @@ def clean_old_sessions(max_age_hours: int = 24) -> dict[str, int]:
             counters['errors'] += 1
             logger.error(f"Erro ao remover áudio {audio_file.name}: {e}")
     
-    # Limpar vídeos finais antigos (final_*.mp4)
-    for video_file in upload_dir.glob("final_*.mp4"):
+    # Proxies de preview e formas de onda do editor
+    for proxy_file in [*upload_dir.glob("proxy_*.mp4"), *upload_dir.glob("waveform_*.bin")]:
+        try:
+            file_age = now - os.path.getmtime(proxy_file)
+            if file_age > max_age_seconds:
+                proxy_file.unlink()
+                logger.info(f"Arquivo do editor removido: {proxy_file.name}")
+        except Exception as e:
+            counters['errors'] += 1
+            logger.error(f"Erro ao remover {proxy_file.name}: {e}")
+
+    # Limpar vídeos finais antigos (final_*.mp4 e final_*.mkv com legenda soft)
+    final_videos = [*upload_dir.glob("final_*.mp4"), *upload_dir.glob("final_*.mkv")]
+    for video_file in final_videos:
         try:
             file_age = now - os.path.getmtime(video_file)
             if file_age > max_age_seconds:
                 video_file.unlink()
                 counters['final_videos'] += 1
+                removed_finals.add(video_file.name)
                 logger.info(f"Vídeo final removido: {video_file.name}")
         except Exception as e:
             counters['errors'] += 1
             logger.error(f"Erro ao remover vídeo {video_file.name}: {e}")
+
+    # Manifestos de renderização órfãos (final_*.render.json)
+    for manifest_file in upload_dir.glob("final_*.render.json"):
+        try:
+            video_file = upload_dir / manifest_file.name[: -len(".render.json")]
+            if not video_file.exists():
+                manifest_file.unlink()
+        except Exception as e:
+            counters['errors'] += 1
+            logger.error(f"Erro ao remover manifesto {manifest_file.name}: {e}")
+
+    # Cache de segmentos renderizados (segments/final_<hash>/)
+    segments_root = upload_dir / "segments"
+    if segments_root.exists():
+        for segment_dir in segments_root.iterdir():
+            try:
+                file_age = now - os.path.getmtime(segment_dir)
+                if segment_dir.is_dir() and file_age > max_age_seconds:
+                    shutil.rmtree(segment_dir)
+                    logger.info(f"Cache de segmentos removido: {segment_dir.name}")
+            except Exception as e:
+                counters['errors'] += 1
+                logger.error(f"Erro ao remover segmentos {segment_dir.name}: {e}")
+    
+    # Cache de renderização: entradas sem uso há muito tempo e excesso do orçamento
+    try:
+        counters['render_cache'] = enforce_render_cache_budget(max_age_seconds=max_age_seconds)
+    except Exception as e:
+        counters['errors'] += 1
+        logger.error(f"Erro ao limpar cache de renderização: {e}")
+    
+    # Miniaturas (thumbs/<hash>/): o pôster fica enquanto houver vídeo final
+    thumbs_root = upload_dir / "thumbs"
+    if thumbs_root.exists():
+        for thumbs_dir in thumbs_root.iterdir():
+            try:
+                if not thumbs_dir.is_dir() or now - os.path.getmtime(thumbs_dir) <= max_age_seconds:
+                    continue
+                has_final = any((upload_dir / f"final_{thumbs_dir.name}{ext}").exists() for ext in (".mp4", ".mkv"))
+                for thumb_file in thumbs_dir.iterdir():
+                    if thumb_file.name != "poster.jpg" or not has_final:
+                        thumb_file.unlink()
+                if not has_final:
+                    thumbs_dir.rmdir()
+                    logger.info(f"Miniaturas removidas: {thumbs_dir.name}")
+            except Exception as e:
+                counters['errors'] += 1
+                logger.error(f"Erro ao remover miniaturas {thumbs_dir.name}: {e}")
+
+    # Pacotes HLS (hls/<nome>/) de proxies e vídeos finais
+    hls_root = upload_dir / "hls"
+    if hls_root.exists():
+        for package_dir in hls_root.iterdir():
+            try:
+                file_age = now - os.path.getmtime(package_dir)
+                if package_dir.is_dir() and file_age > max_age_seconds:
+                    shutil.rmtree(package_dir)
+                    logger.info(f"Pacote HLS removido: {package_dir.name}")
+            except Exception as e:
+                counters['errors'] += 1
+                logger.error(f"Erro ao remover pacote HLS {package_dir.name}: {e}")
     
     # Também limpar da pasta raiz uploads se existir
     root_uploads = settings.base_dir / 'uploads'
@@ -89,35 +203,71 @@ def clean_old_sessions(max_age_hours: int = 24) -> dict[str, int]:
                 counters['errors'] += 1
                 logger.error(f"Erro ao remover áudio (raiz) {temp_audio.name}: {e}")
     
-    total_removed = counters['sessions'] + counters['temp_audio'] + counters['final_videos']
+    _record_removed_artifacts(removed_finals, removed_sessions)
+
+    total_removed = (
+        counters['sessions'] + counters['temp_audio'] + counters['final_videos']
+        + counters['render_cache']
+    )
     if total_removed > 0:
         logger.info(f"Limpeza concluída: {total_removed} arquivos removidos "
                    f"(sessões: {counters['sessions']}, áudios: {counters['temp_audio']}, "
-                   f"vídeos: {counters['final_videos']}, erros: {counters['errors']})")
+                   f"vídeos: {counters['final_videos']}, cache: {counters['render_cache']}, "
+                   f"erros: {counters['errors']})")
     
     return counters
 
 
-def clean_session_by_hash(video_hash: str, *, keep_final_video: bool = False) -> bool:
+def clean_session_by_hash(
+    video_hash: str,
+    *,
+    keep_final_video: bool = False,
+    keep_session: bool = False,
+) -> bool:
     """Remove uma sessão específica e seus arquivos relacionados.
     
     Args:
         video_hash: Hash do vídeo da sessão a ser removida
+        keep_final_video: Preserva o vídeo final (e seu manifesto de renderização)
+        keep_session: Preserva a sessão (banco) para permitir re-renderizações
         
     Returns:
         True se removeu com sucesso, False caso contrário
     """
     upload_dir = settings.upload_dir
     removed = False
+    removed_finals: set[str] = set()
     
     try:
-        # Remover session JSON
+        # Remover a sessão do banco (e o JSON, se ainda no formato antigo)
+        if not keep_session and get_session_store().delete(video_hash):
+            logger.info(f"Sessão removida: {video_hash}")
+            removed = True
         session_file = upload_dir / f"session_{video_hash}.json"
-        if session_file.exists():
+        if session_file.exists() and not keep_session:
             session_file.unlink()
             logger.info(f"Sessão removida: {session_file.name}")
             removed = True
         
+        # Cache de segmentos só serve para re-renderizar a sessão
+        segment_dir = upload_dir / "segments" / f"final_{video_hash}"
+        if segment_dir.exists() and not keep_session:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+            logger.info(f"Cache de segmentos removido: {segment_dir.name}")
+
+        # Proxy de preview só é usado pelo editor da sessão
+        proxy_file = upload_dir / f"proxy_{video_hash}.mp4"
+        if proxy_file.exists() and not keep_session:
+            proxy_file.unlink()
+            logger.info(f"Proxy de preview removido: {proxy_file.name}")
+        waveform_file = upload_dir / f"waveform_{video_hash}.bin"
+        if waveform_file.exists() and not keep_session:
+            waveform_file.unlink()
+            logger.info(f"Forma de onda removida: {waveform_file.name}")
+        proxy_hls = upload_dir / "hls" / f"proxy_{video_hash}"
+        if proxy_hls.exists() and not keep_session:
+            shutil.rmtree(proxy_hls, ignore_errors=True)
+
         # Remover áudio temporário
         audio_file = upload_dir / f"temp_audio_{video_hash}.wav"
         if audio_file.exists():
@@ -132,9 +282,27 @@ def clean_session_by_hash(video_hash: str, *, keep_final_video: bool = False) ->
                 root_audio.unlink()
                 logger.info(f"Áudio temporário removido (raiz): {root_audio.name}")
         
-        # Remover vídeo final
-        final_video = upload_dir / f"final_{video_hash}.mp4"
-        if final_video.exists():
+        # Sprites só servem ao editor; o pôster acompanha o vídeo final no histórico
+        thumbs_dir = upload_dir / "thumbs" / video_hash
+        if thumbs_dir.exists():
+            if not keep_final_video:
+                shutil.rmtree(thumbs_dir, ignore_errors=True)
+                logger.info(f"Miniaturas removidas: {thumbs_dir.name}")
+            elif not keep_session:
+                for thumb_file in thumbs_dir.iterdir():
+                    if thumb_file.name != "poster.jpg":
+                        thumb_file.unlink()
+
+        final_hls = upload_dir / "hls" / f"final_{video_hash}"
+        if final_hls.exists() and not keep_final_video:
+            shutil.rmtree(final_hls, ignore_errors=True)
+            logger.info(f"Pacote HLS removido: {final_hls.name}")
+
+        # Remover vídeo final (MP4 ou MKV) e o manifesto de renderização
+        for extension in (".mp4", ".mkv", ".mp4.render.json", ".mkv.render.json"):
+            final_video = upload_dir / f"final_{video_hash}{extension}"
+            if not final_video.exists():
+                continue
             if keep_final_video:
                 logger.info(
                     "Vídeo final preservado (keep_final_video=True): %s",
@@ -142,8 +310,10 @@ def clean_session_by_hash(video_hash: str, *, keep_final_video: bool = False) ->
                 )
             else:
                 final_video.unlink()
+                removed_finals.add(final_video.name)
                 logger.info(f"Vídeo final removido: {final_video.name}")
-        
+
+        _record_removed_artifacts(removed_finals, set() if keep_session else {video_hash})
         return removed
         
     except Exception as e:
@@ -160,7 +330,10 @@ def startup_cleanup(max_age_hours: int = 24) -> None:
     logger.info(f"Iniciando limpeza de sessões antigas (> {max_age_hours}h)...")
     counters = clean_old_sessions(max_age_hours)
     
-    total = counters['sessions'] + counters['temp_audio'] + counters['final_videos']
+    total = (
+        counters['sessions'] + counters['temp_audio'] + counters['final_videos']
+        + counters['render_cache']
+    )
     if total == 0:
         logger.info("Nenhuma sessão antiga encontrada.")
     elif counters['errors'] > 0:
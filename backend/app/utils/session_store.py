@@ -0,0 +1,652 @@
+"""Armazenamento das sessões do editor em SQLite.
+
+Antes cada sessão era um ``uploads/session_<hash>.json`` lido e regravado
+inteiro a cada salvamento. Aqui os metadados ficam em colunas de
+``edit_sessions`` (chave ``video_hash``) e cada legenda e cada beep é uma
+linha de ``session_subtitles``/``session_beeps``. Um salvamento compara a
+lista recebida com as linhas atuais e, numa única transação, atualiza só as
+linhas que mudaram; ler o caminho do vídeo é uma consulta de uma coluna.
+
+O JSON continua existindo apenas como formato de exportação (rota
+``/get_session/<hash>/export``) e de migração: sessões antigas ainda em
+arquivo são importadas na primeira leitura (:meth:`import_json`).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple
+
+try:
+    from app.config import settings
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Campos de legenda com coluna própria; o resto vai para ``extra`` (JSON)
+_SUBTITLE_FIELDS = ("start", "end", "text", "raw_text", "confidence")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS edit_sessions (
+    video_hash TEXT PRIMARY KEY,
+    video_path TEXT NOT NULL,
+    filename TEXT,
+    duration REAL,
+    forbidden_words TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_edit_sessions_updated_at ON edit_sessions (updated_at);
+CREATE TABLE IF NOT EXISTS session_subtitles (
+    id INTEGER PRIMARY KEY,
+    video_hash TEXT NOT NULL REFERENCES edit_sessions (video_hash) ON DELETE CASCADE,
+    position REAL NOT NULL,
+    subtitle_id TEXT,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    text TEXT NOT NULL,
+    raw_text TEXT,
+    confidence REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_session_subtitles_position ON session_subtitles (video_hash, position);
+CREATE INDEX IF NOT EXISTS ix_session_subtitles_id ON session_subtitles (video_hash, subtitle_id);
+CREATE INDEX IF NOT EXISTS ix_session_subtitles_start ON session_subtitles (video_hash, start);
+CREATE TABLE IF NOT EXISTS session_beeps (
+    id INTEGER PRIMARY KEY,
+    video_hash TEXT NOT NULL REFERENCES edit_sessions (video_hash) ON DELETE CASCADE,
+    position REAL NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    word TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_session_beeps_position ON session_beeps (video_hash, position);
+CREATE INDEX IF NOT EXISTS ix_session_beeps_start ON session_beeps (video_hash, start);
+"""
+
+
+def _subtitle_row(subtitle: dict) -> tuple:
+    """Colunas de uma legenda: (subtitle_id, start, end, text, raw_text, confidence, extra)."""
+    extra = {k: v for k, v in subtitle.items() if k != "id" and k not in _SUBTITLE_FIELDS}
+    return (
+        json.dumps(subtitle["id"]) if subtitle.get("id") is not None else None,
+        float(subtitle.get("start") or 0.0),
+        float(subtitle.get("end") or 0.0),
+        str(subtitle.get("text") or ""),
+        subtitle.get("raw_text"),
+        float(subtitle["confidence"]) if subtitle.get("confidence") is not None else None,
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+    )
+
+
+def _subtitle_from_row(row: Sequence) -> dict:
+    subtitle_id, start, end, text, raw_text, confidence, extra = row
+    subtitle: dict = {}
+    if subtitle_id is not None:
+        subtitle["id"] = json.loads(subtitle_id)
+    subtitle.update(start=start, end=end, text=text)
+    # Campos ausentes no salvamento continuam ausentes na leitura
+    if raw_text is not None:
+        subtitle["raw_text"] = raw_text
+    if confidence is not None:
+        subtitle["confidence"] = confidence
+    if extra:
+        subtitle.update(json.loads(extra))
+    return subtitle
+
+
+def _beep_row(beep: Sequence) -> tuple:
+    """Colunas de um beep ``[start, end]`` ou ``[start, end, palavra]``."""
+    word = beep[2] if len(beep) > 2 and beep[2] is not None else None
+    return (float(beep[0]), float(beep[1]), str(word) if word is not None else None)
+
+
+def _beep_from_row(row: Sequence) -> list:
+    start, end, word = row
+    return [start, end] if word is None else [start, end, word]
+
+
+class SessionConflict(Exception):
+    """A edição partiu de uma versão antiga da sessão (HTTP 409)."""
+
+    def __init__(self, current_version: int, message: str) -> None:
+        super().__init__(message)
+        self.current_version = current_version
+
+
+def _patch_ops(patch: dict, name: str) -> dict:
+    """Normaliza ``{"added": [...], "changed": [...], "deleted": [...]}``."""
+    if not isinstance(patch, dict):
+        raise ValueError(f"{name} deve ser um objeto com added/changed/deleted")
+    ops = {}
+    for key in ("added", "changed", "deleted"):
+        value = patch.get(key) or []
+        if not isinstance(value, list):
+            raise ValueError(f"{name}.{key} deve ser uma lista")
+        ops[key] = value
+    return ops
+
+
+class SQLiteSessionStore:
+    """Sessões do editor (legendas, beeps e metadados) por ``video_hash``."""
+
+    def __init__(self, path: os.PathLike) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; as escritas abrem a transação explicitamente
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE: escritores concorrentes esperam em vez de sobrescrever um ao outro
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # Escrita ---------------------------------------------------------------
+
+    def save(self, session_data: dict) -> None:
+        """Cria (ou substitui) a sessão a partir do dicionário no formato JSON."""
+        video_hash = session_data["video_hash"]
+        video_info = session_data.get("video_info") or {}
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM edit_sessions WHERE video_hash = ?", (video_hash,))
+            conn.execute(
+                """
+                INSERT INTO edit_sessions
+                    (video_hash, video_path, filename, duration, forbidden_words, version, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+                """,
+                (
+                    video_hash,
+                    session_data["video_path"],
+                    video_info.get("filename"),
+                    video_info.get("duration"),
+                    json.dumps(list(session_data.get("forbidden_words") or []), ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            self._sync_subtitles(conn, video_hash, session_data.get("subtitles") or [])
+            self._sync_beeps(conn, video_hash, session_data.get("beep_intervals") or [])
+
+    def update(
+        self,
+        video_hash: str,
+        *,
+        subtitles: Optional[Sequence[dict]] = None,
+        forbidden_words: Optional[Sequence[str]] = None,
+        beep_intervals: Optional[Sequence[Sequence]] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Grava as partes informadas; só as linhas alteradas são tocadas.
+
+        Returns:
+            A nova versão, ou None se a sessão não existe.
+
+        Raises:
+            SessionConflict: ``expected_version`` não é a versão atual.
+        """
+        with self._transaction() as conn:
+            if self._check_version(conn, video_hash, expected_version) is None:
+                return None
+            if subtitles is not None:
+                self._sync_subtitles(conn, video_hash, subtitles)
+            if beep_intervals is not None:
+                self._sync_beeps(conn, video_hash, beep_intervals)
+            return self._bump_version(conn, video_hash, forbidden_words)
+
+    def apply_patch(
+        self,
+        video_hash: str,
+        *,
+        subtitles: Optional[dict] = None,
+        beep_intervals: Optional[dict] = None,
+        forbidden_words: Optional[Sequence[str]] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Aplica só as legendas e beeps adicionados, alterados e removidos.
+
+        ``subtitles`` e ``beep_intervals`` têm as chaves ``added``, ``changed``
+        e ``deleted``. Legendas são identificadas pelo ``id`` do cliente e
+        beeps pelo id de :meth:`load` (``beep_ids``); alterações parciais
+        mantêm os demais campos. Itens novos entram na posição do seu
+        ``start``. O custo depende só do tamanho da edição.
+
+        Returns:
+            A nova versão, ou None se a sessão não existe.
+
+        Raises:
+            SessionConflict: versão desatualizada ou id inexistente/duplicado.
+            ValueError: patch malformado.
+        """
+        with self._transaction() as conn:
+            version = self._check_version(conn, video_hash, expected_version)
+            if version is None:
+                return None
+            if subtitles:
+                self._patch_subtitles(conn, video_hash, _patch_ops(subtitles, "subtitles"), version)
+            if beep_intervals:
+                self._patch_beeps(conn, video_hash, _patch_ops(beep_intervals, "beep_intervals"), version)
+            return self._bump_version(conn, video_hash, forbidden_words)
+
+    @staticmethod
+    def _check_version(conn: sqlite3.Connection, video_hash: str, expected: Optional[int]) -> Optional[int]:
+        row = conn.execute("SELECT version FROM edit_sessions WHERE video_hash = ?", (video_hash,)).fetchone()
+        if row is None:
+            return None
+        if expected is not None and int(expected) != row[0]:
+            raise SessionConflict(row[0], "A sessão foi alterada por outra edição")
+        return row[0]
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection, video_hash: str, forbidden_words: Optional[Sequence[str]]) -> int:
+        assignments = ["version = version + 1", "updated_at = ?"]
+        params: list = [time.time()]
+        if forbidden_words is not None:
+            assignments.append("forbidden_words = ?")
+            params.append(json.dumps(list(forbidden_words), ensure_ascii=False))
+        conn.execute(
+            f"UPDATE edit_sessions SET {', '.join(assignments)} WHERE video_hash = ?",
+            (*params, video_hash),
+        )
+        return conn.execute("SELECT version FROM edit_sessions WHERE video_hash = ?", (video_hash,)).fetchone()[0]
+
+    @staticmethod
+    def _sync_rows(
+        conn: sqlite3.Connection,
+        table: str,
+        columns: Sequence[str],
+        video_hash: str,
+        rows: Sequence[tuple],
+    ) -> None:
+        """Ajusta as linhas de ``table`` à lista ``rows``, posição a posição."""
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        current = conn.execute(
+            f"SELECT id, position, {column_list} FROM {table} WHERE video_hash = ? ORDER BY position, id",
+            (video_hash,),
+        ).fetchall()
+        assignments = ", ".join(f'"{c}" = ?' for c in columns)
+        updates, inserts = [], []
+        for position, row in enumerate(rows):
+            if position < len(current):
+                existing = current[position]
+                # Posições fracionárias (inserções por patch) voltam a ser inteiras
+                if existing[1] != position or tuple(existing[2:]) != row:
+                    updates.append((*row, float(position), existing[0]))
+            else:
+                inserts.append((video_hash, float(position), *row))
+        if updates:
+            conn.executemany(f"UPDATE {table} SET {assignments}, position = ? WHERE id = ?", updates)
+        if inserts:
+            placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+            conn.executemany(
+                f"INSERT INTO {table} (video_hash, position, {column_list}) VALUES ({placeholders})",
+                inserts,
+            )
+        surplus = [(existing[0],) for existing in current[len(rows):]]
+        if surplus:
+            conn.executemany(f"DELETE FROM {table} WHERE id = ?", surplus)
+
+    @staticmethod
+    def _position_for(
+        conn: sqlite3.Connection,
+        table: str,
+        video_hash: str,
+        start: float,
+        exclude_id: Optional[int] = None,
+    ) -> float:
+        """Posição de um item novo: logo após o último que começa até ``start``.
+
+        ``exclude_id`` ignora o próprio item quando ele está sendo movido.
+        """
+        # -1 nunca é um rowid: sem exclusão o filtro não descarta nada
+        exclude = -1 if exclude_id is None else exclude_id
+        previous = conn.execute(
+            f"""
+            SELECT position FROM {table} WHERE video_hash = ? AND start <= ? AND id != ?
+            ORDER BY start DESC, position DESC LIMIT 1
+            """,
+            (video_hash, start, exclude),
+        ).fetchone()
+        if previous is None:
+            first = conn.execute(
+                f"SELECT MIN(position) FROM {table} WHERE video_hash = ? AND id != ?", (video_hash, exclude)
+            ).fetchone()[0]
+            return 0.0 if first is None else first - 1.0
+        following = conn.execute(
+            f"SELECT MIN(position) FROM {table} WHERE video_hash = ? AND position > ? AND id != ?",
+            (video_hash, previous[0], exclude),
+        ).fetchone()[0]
+        if following is None:
+            return previous[0] + 1.0
+        middle = (previous[0] + following) / 2
+        if previous[0] < middle < following:
+            return middle
+        # Sem espaço entre as duas posições (muitas inserções no mesmo ponto): renumera
+        ids = conn.execute(
+            f"SELECT id, position FROM {table} WHERE video_hash = ? ORDER BY position, id", (video_hash,)
+        ).fetchall()
+        conn.executemany(
+            f"UPDATE {table} SET position = ? WHERE id = ?",
+            [(float(index * 2), row_id) for index, (row_id, _position) in enumerate(ids)],
+        )
+        return next(float(index * 2 + 1) for index, (_id, position) in enumerate(ids) if position == previous[0])
+
+    def _reposition(self, conn: sqlite3.Connection, table: str, video_hash: str, row_id: int, start: float) -> None:
+        """Move um item cujo ``start`` mudou se ele passou de um vizinho.
+
+        Sem isso, :meth:`load` e a exportação (ordenados por ``position``)
+        devolveriam os itens fora da ordem de tempo.
+        """
+        position = conn.execute(f"SELECT position FROM {table} WHERE id = ?", (row_id,)).fetchone()[0]
+        before = conn.execute(
+            f"SELECT start FROM {table} WHERE video_hash = ? AND position < ? ORDER BY position DESC LIMIT 1",
+            (video_hash, position),
+        ).fetchone()
+        after = conn.execute(
+            f"SELECT start FROM {table} WHERE video_hash = ? AND position > ? ORDER BY position LIMIT 1",
+            (video_hash, position),
+        ).fetchone()
+        if (before is None or before[0] <= start) and (after is None or start <= after[0]):
+            return
+        conn.execute(
+            f"UPDATE {table} SET position = ? WHERE id = ?",
+            (self._position_for(conn, table, video_hash, start, exclude_id=row_id), row_id),
+        )
+
+    def _patch_subtitles(self, conn: sqlite3.Connection, video_hash: str, ops: dict, version: int) -> None:
+        columns = ("subtitle_id", *_SUBTITLE_FIELDS, "extra")
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        assignments = ", ".join(f'"{c}" = ?' for c in columns)
+        for subtitle_id in ops["deleted"]:
+            cursor = conn.execute(
+                "DELETE FROM session_subtitles WHERE video_hash = ? AND subtitle_id = ?",
+                (video_hash, json.dumps(subtitle_id)),
+            )
+            if cursor.rowcount == 0:
+                raise SessionConflict(version, f"Legenda inexistente: {subtitle_id}")
+        for change in ops["changed"]:
+            if not isinstance(change, dict) or change.get("id") is None:
+                raise ValueError("Legenda alterada sem id")
+            existing = conn.execute(
+                f"SELECT id, {column_list} FROM session_subtitles WHERE video_hash = ? AND subtitle_id = ?",
+                (video_hash, json.dumps(change["id"])),
+            ).fetchone()
+            if existing is None:
+                raise SessionConflict(version, f"Legenda inexistente: {change['id']}")
+            merged = {**_subtitle_from_row(existing[1:]), **change}
+            row = _subtitle_row(merged)
+            conn.execute(
+                f"UPDATE session_subtitles SET {assignments} WHERE id = ?",
+                (*row, existing[0]),
+            )
+            if row[1] != existing[2]:
+                self._reposition(conn, "session_subtitles", video_hash, existing[0], row[1])
+        for subtitle in ops["added"]:
+            if not isinstance(subtitle, dict) or subtitle.get("id") is None:
+                raise ValueError("Legenda adicionada sem id")
+            row = _subtitle_row(subtitle)
+            duplicate = conn.execute(
+                "SELECT 1 FROM session_subtitles WHERE video_hash = ? AND subtitle_id = ?",
+                (video_hash, row[0]),
+            ).fetchone()
+            if duplicate is not None:
+                raise SessionConflict(version, f"Legenda já existe: {subtitle['id']}")
+            position = self._position_for(conn, "session_subtitles", video_hash, row[1])
+            conn.execute(
+                f"INSERT INTO session_subtitles (video_hash, position, {column_list}) VALUES (?, ?, {', '.join('?' for _ in columns)})",
+                (video_hash, position, *row),
+            )
+
+    def _patch_beeps(self, conn: sqlite3.Connection, video_hash: str, ops: dict, version: int) -> None:
+        for beep_id in ops["deleted"]:
+            cursor = conn.execute(
+                "DELETE FROM session_beeps WHERE video_hash = ? AND id = ?", (video_hash, beep_id)
+            )
+            if cursor.rowcount == 0:
+                raise SessionConflict(version, f"Beep inexistente: {beep_id}")
+        for change in ops["changed"]:
+            if not isinstance(change, dict) or change.get("id") is None:
+                raise ValueError("Beep alterado sem id")
+            existing = conn.execute(
+                'SELECT start, "end", word FROM session_beeps WHERE video_hash = ? AND id = ?',
+                (video_hash, change["id"]),
+            ).fetchone()
+            if existing is None:
+                raise SessionConflict(version, f"Beep inexistente: {change['id']}")
+            start, end, word = existing
+            row = _beep_row([change.get("start", start), change.get("end", end), change.get("word", word)])
+            conn.execute(
+                'UPDATE session_beeps SET start = ?, "end" = ?, word = ? WHERE id = ?',
+                (*row, change["id"]),
+            )
+            if row[0] != start:
+                self._reposition(conn, "session_beeps", video_hash, change["id"], row[0])
+        for beep in ops["added"]:
+            if isinstance(beep, dict):
+                beep = [beep.get("start"), beep.get("end"), beep.get("word")]
+            if not isinstance(beep, (list, tuple)) or len(beep) < 2:
+                raise ValueError("Beep adicionado inválido")
+            row = _beep_row(beep)
+            position = self._position_for(conn, "session_beeps", video_hash, row[0])
+            conn.execute(
+                'INSERT INTO session_beeps (video_hash, position, start, "end", word) VALUES (?, ?, ?, ?, ?)',
+                (video_hash, position, *row),
+            )
+
+    def _sync_subtitles(self, conn: sqlite3.Connection, video_hash: str, subtitles: Sequence[dict]) -> None:
+        self._sync_rows(
+            conn,
+            "session_subtitles",
+            ("subtitle_id", *_SUBTITLE_FIELDS, "extra"),
+            video_hash,
+            [_subtitle_row(subtitle) for subtitle in subtitles],
+        )
+
+    def _sync_beeps(self, conn: sqlite3.Connection, video_hash: str, beeps: Sequence[Sequence]) -> None:
+        self._sync_rows(
+            conn,
+            "session_beeps",
+            ("start", "end", "word"),
+            video_hash,
+            [_beep_row(beep) for beep in beeps if isinstance(beep, (list, tuple)) and len(beep) >= 2],
+        )
+
+    def delete(self, video_hash: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM edit_sessions WHERE video_hash = ?", (video_hash,))
+        return cursor.rowcount > 0
+
+    def delete_older_than(self, max_age_seconds: float) -> int:
+        """Remove sessões sem alteração há mais de ``max_age_seconds``."""
+        return len(self.expire(max_age_seconds))
+
+    def expire(self, max_age_seconds: float) -> list:
+        """Como :meth:`delete_older_than`, devolvendo os ``video_hash`` removidos."""
+        cutoff = time.time() - max_age_seconds
+        with self._transaction() as conn:
+            expired = [
+                row[0]
+                for row in conn.execute("SELECT video_hash FROM edit_sessions WHERE updated_at < ?", (cutoff,))
+            ]
+            conn.execute("DELETE FROM edit_sessions WHERE updated_at < ?", (cutoff,))
+        return expired
+
+    # Leitura ---------------------------------------------------------------
+
+    def exists(self, video_hash: str) -> bool:
+        row = self._conn().execute("SELECT 1 FROM edit_sessions WHERE video_hash = ?", (video_hash,)).fetchone()
+        return row is not None
+
+    def video_path(self, video_hash: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT video_path FROM edit_sessions WHERE video_hash = ?", (video_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def version(self, video_hash: str) -> Optional[int]:
+        row = self._conn().execute(
+            "SELECT version FROM edit_sessions WHERE video_hash = ?", (video_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def revision(self, video_hash: str) -> Optional[Tuple[int, float]]:
+        """``(version, created_at)``: identifica o estado da sessão.
+
+        ``version`` recomeça em 1 quando a sessão é recriada (novo preview do
+        mesmo vídeo); junto com ``created_at`` o par nunca se repete.
+        """
+        row = self._conn().execute(
+            "SELECT version, created_at FROM edit_sessions WHERE video_hash = ?", (video_hash,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _snapshot(self, video_hash: str) -> Optional[tuple]:
+        """Metadados, legendas e beeps lidos numa mesma transação."""
+        conn = self._conn()
+        # Transação de leitura: metadados e linhas do mesmo instante
+        conn.execute("BEGIN")
+        try:
+            meta = conn.execute(
+                """
+                SELECT video_path, filename, duration, forbidden_words, version, created_at
+                FROM edit_sessions WHERE video_hash = ?
+                """,
+                (video_hash,),
+            ).fetchone()
+            if meta is None:
+                return None
+            subtitles = conn.execute(
+                """
+                SELECT subtitle_id, start, "end", text, raw_text, confidence, extra
+                FROM session_subtitles WHERE video_hash = ? ORDER BY position, id
+                """,
+                (video_hash,),
+            ).fetchall()
+            beeps = conn.execute(
+                'SELECT id, start, "end", word FROM session_beeps WHERE video_hash = ? ORDER BY position, id',
+                (video_hash,),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return meta, subtitles, beeps
+
+    @staticmethod
+    def _session_fields(video_hash: str, meta: Sequence) -> dict:
+        video_path, filename, duration, forbidden_words, version, created_at = meta
+        return {
+            "video_hash": video_hash,
+            "video_path": video_path,
+            "video_info": {"filename": filename, "duration": duration},
+            "forbidden_words": json.loads(forbidden_words) if forbidden_words else [],
+            "version": version,
+            "created_at": created_at,
+        }
+
+    def load(self, video_hash: str) -> Optional[dict]:
+        """Sessão completa no formato do antigo ``session_<hash>.json``.
+
+        Inclui também ``version`` e ``created_at`` (ver :meth:`revision`) e
+        ``beep_ids``, os ids dos beeps na mesma ordem de ``beep_intervals``.
+        """
+        snapshot = self._snapshot(video_hash)
+        if snapshot is None:
+            return None
+        meta, subtitles, beeps = snapshot
+        session_data = self._session_fields(video_hash, meta)
+        session_data["subtitles"] = [_subtitle_from_row(row) for row in subtitles]
+        session_data["beep_intervals"] = [_beep_from_row(row[1:]) for row in beeps]
+        session_data["beep_ids"] = [row[0] for row in beeps]
+        return session_data
+
+    def load_columnar(self, video_hash: str) -> Optional[dict]:
+        """Sessão com legendas e beeps em colunas (listas paralelas).
+
+        ``subtitles`` vira ``{"id": [...], "start": [...], "end": [...],
+        "text": [...], "raw_text": [...], "confidence": [...]}`` (valor
+        ausente = ``None``), mais ``extra`` só se alguma legenda tiver campos
+        adicionais; ``beep_intervals`` vira ``{"id", "start", "end", "word"}``.
+        Evita repetir os nomes dos campos em cada item.
+        """
+        snapshot = self._snapshot(video_hash)
+        if snapshot is None:
+            return None
+        meta, subtitles, beeps = snapshot
+        session_data = self._session_fields(video_hash, meta)
+        ids, starts, ends, texts, raw_texts, confidences, extras = (
+            [list(column) for column in zip(*subtitles)] if subtitles else ([] for _ in range(7))
+        )
+        columns = {
+            "id": [json.loads(value) if value is not None else None for value in ids],
+            "start": starts,
+            "end": ends,
+            "text": texts,
+            "raw_text": raw_texts,
+            "confidence": confidences,
+        }
+        if any(extras):
+            columns["extra"] = [json.loads(value) if value else None for value in extras]
+        session_data["subtitles"] = columns
+        beep_ids, beep_starts, beep_ends, words = (
+            [list(column) for column in zip(*beeps)] if beeps else ([] for _ in range(4))
+        )
+        session_data["beep_intervals"] = {"id": beep_ids, "start": beep_starts, "end": beep_ends, "word": words}
+        return session_data
+
+    # Migração --------------------------------------------------------------
+
+    def import_json(self, path: os.PathLike) -> Optional[dict]:
+        """Importa um ``session_<hash>.json`` antigo e remove o arquivo."""
+        source = Path(path)
+        try:
+            with source.open("r", encoding="utf-8") as f:
+                session_data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.save(session_data)
+        try:
+            source.unlink()
+        except OSError:
+            logger.warning("Sessão importada, mas o arquivo antigo ficou: %s", source)
+        logger.info("Sessão migrada do JSON para o banco: %s", source.name)
+        return self.load(session_data["video_hash"])
+
+
+_store: Optional[SQLiteSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SQLiteSessionStore:
+    """Instância compartilhada do armazenamento em ``settings.session_store_path``."""
+    global _store
+    path = Path(settings.session_store_path)
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = SQLiteSessionStore(path)
+        return _store
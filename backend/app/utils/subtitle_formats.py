@@ -0,0 +1,112 @@
+"""Exportação das legendas para arquivos SRT e ASS (trilhas de legenda "soft")."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence, Tuple
+
+SUBTITLE_FORMATS = ("srt", "ass")
+
+_ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 960
+PlayResY: 540
+WrapStyle: 0
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,{font},{font_size},{primary},{primary},{back},{back},0,0,0,0,100,100,0,0,3,2,0,{alignment},20,20,20,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+_NAMED_COLOURS = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "yellow": (255, 255, 0),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+}
+
+
+def _split_seconds(seconds: float) -> tuple[int, int, int, int]:
+    millis = max(0, int(round(float(seconds) * 1000)))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return hours, minutes, secs, millis
+
+
+def format_srt_timestamp(seconds: float) -> str:
+    hours, minutes, secs, millis = _split_seconds(seconds)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def format_ass_timestamp(seconds: float) -> str:
+    hours, minutes, secs, millis = _split_seconds(seconds)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{millis // 10:02d}"
+
+
+def _ass_colour(value: str | None, default: tuple[int, int, int, int]) -> str:
+    """Converte ``#rrggbb``, ``rgba(r,g,b,a)`` ou nome simples para ``&HAABBGGRR``."""
+    red, green, blue, alpha = default
+    if value:
+        raw = value.strip().lower()
+        if raw.startswith("#") and len(raw) == 7:
+            red, green, blue = (int(raw[i:i + 2], 16) for i in (1, 3, 5))
+            alpha = 0
+        elif raw.startswith("rgb"):
+            parts = [p.strip() for p in raw[raw.find("(") + 1:raw.rfind(")")].split(",")]
+            try:
+                red, green, blue = (int(float(p)) for p in parts[:3])
+                opacity = float(parts[3]) if len(parts) > 3 else 1.0
+                alpha = int(round((1.0 - max(0.0, min(1.0, opacity))) * 255))
+            except (ValueError, IndexError):
+                pass
+        elif raw in _NAMED_COLOURS:
+            red, green, blue = _NAMED_COLOURS[raw]
+            alpha = 0
+    return f"&H{alpha:02X}{blue:02X}{green:02X}{red:02X}"
+
+
+def write_srt(subtitles: Sequence[Tuple[float, float, str]], path: str | Path) -> Path:
+    """Grava as legendas em SRT (UTF-8)."""
+    target = Path(path)
+    blocks = []
+    for number, (start, end, text) in enumerate(subtitles, start=1):
+        blocks.append(
+            f"{number}\n{format_srt_timestamp(start)} --> {format_srt_timestamp(end)}\n"
+            f"{str(text).strip()}\n"
+        )
+    target.write_text("\n".join(blocks), encoding="utf-8")
+    return target
+
+
+def write_ass(
+    subtitles: Sequence[Tuple[float, float, str]],
+    path: str | Path,
+    *,
+    font: str = "Arial",
+    font_size: int = 24,
+    font_color: str | None = "white",
+    bg_color: str | None = "rgba(0,0,0,0.8)",
+    position: str = "bottom",
+) -> Path:
+    """Grava as legendas em ASS preservando cor, fundo e posição configurados."""
+    target = Path(path)
+    header = _ASS_HEADER.format(
+        font=font,
+        font_size=int(font_size),
+        primary=_ass_colour(font_color, (255, 255, 255, 0)),
+        back=_ass_colour(bg_color, (0, 0, 0, 0x33)),
+        alignment=8 if position == "top" else 2,
+    )
+    lines = [header]
+    for start, end, text in subtitles:
+        escaped = str(text).strip().replace("\n", "\\N").replace("{", "(").replace("}", ")")
+        lines.append(
+            f"Dialogue: 0,{format_ass_timestamp(start)},{format_ass_timestamp(end)},Default,,0,0,0,,{escaped}\n"
+        )
+    target.write_text("".join(lines), encoding="utf-8")
+    return target
@@ -0,0 +1,128 @@
+"""Sprites de miniaturas e pôster gerados na ingestão, numa só decodificação.
+
+Ficam em ``thumbs/<hash>/`` ao lado do upload: folhas ``sprite_NNN.jpg``,
+o ``index.json`` que as descreve e o ``poster.jpg`` usado no histórico. O
+hover da linha do tempo carrega uma folha de poucas dezenas de KB em vez de
+buscar quadros no vídeo inteiro.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict
+
+try:
+    from app.config import settings
+    from app.services.ffmpeg import extract_thumbnails, probe_media
+except ImportError:  # pragma: no cover - fallback for script execution
+    from config import settings
+    from services.ffmpeg import extract_thumbnails, probe_media
+
+logger = logging.getLogger(__name__)
+
+TILE_WIDTH = 160
+TILE_HEIGHT = 90
+SPRITE_COLUMNS = 5
+SPRITE_ROWS = 5
+THUMBNAIL_INDEX = "index.json"
+POSTER_NAME = "poster.jpg"
+_THUMB_FILE_RE = re.compile(r"^(index\.json|poster\.jpg|sprite_\d{3}\.jpg)$")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+_jobs: Dict[str, Future] = {}
+_jobs_lock = Lock()
+
+
+def thumbnails_dir_for(video_hash: str, directory: str | os.PathLike) -> Path:
+    return Path(directory) / "thumbs" / video_hash
+
+
+def build_thumbnails(video_path: str | os.PathLike, target: str | os.PathLike) -> Path:
+    """Gera sprites, índice e pôster de ``video_path`` em ``target``."""
+    target = Path(target)
+    interval = settings.thumbnail_interval
+    duration = probe_media(video_path).duration or 0.0
+    # Pôster: um pouco depois do início, evitando telas pretas de abertura
+    poster_time = min(5.0, duration * 0.1)
+
+    staging = target.with_name(f"{target.name}.partial-{uuid.uuid4().hex[:8]}")
+    try:
+        extract_thumbnails(
+            video_path,
+            staging,
+            interval=interval,
+            tile_width=TILE_WIDTH,
+            tile_height=TILE_HEIGHT,
+            columns=SPRITE_COLUMNS,
+            rows=SPRITE_ROWS,
+            poster_time=poster_time,
+        )
+        sheets = sorted(p.name for p in staging.glob("sprite_*.jpg"))
+        per_sheet = SPRITE_COLUMNS * SPRITE_ROWS
+        index = {
+            "interval": interval,
+            "count": min(max(1, math.ceil(duration / interval)), len(sheets) * per_sheet),
+            "tile_width": TILE_WIDTH,
+            "tile_height": TILE_HEIGHT,
+            "columns": SPRITE_COLUMNS,
+            "rows": SPRITE_ROWS,
+            "sheets": sheets,
+            "poster": POSTER_NAME if (staging / POSTER_NAME).exists() else None,
+        }
+        with (staging / THUMBNAIL_INDEX).open("w", encoding="utf-8") as f:
+            json.dump(index, f)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+    logger.info("Miniaturas prontas: %s (%d folhas)", target, len(sheets))
+    return target
+
+
+def _build_logged(video_path: str, target: Path) -> Path:
+    try:
+        return build_thumbnails(video_path, target)
+    except Exception:
+        logger.exception("Falha ao gerar miniaturas de %s", video_path)
+        raise
+
+
+def start_thumbnails(video_hash: str, video_path: str | os.PathLike) -> Future | None:
+    """Agenda a geração das miniaturas; o hash é o conteúdo, então só uma vez."""
+    if settings.thumbnail_interval <= 0:
+        return None
+    target = thumbnails_dir_for(video_hash, Path(video_path).parent)
+    with _jobs_lock:
+        job = _jobs.get(video_hash)
+        if job is not None and not job.done():
+            return job
+        if (target / THUMBNAIL_INDEX).exists():
+            return None
+        job = _executor.submit(_build_logged, str(video_path), target)
+        _jobs[video_hash] = job
+    job.add_done_callback(lambda _job: _forget_job(video_hash, _job))
+    return job
+
+
+def _forget_job(video_hash: str, job: Future) -> None:
+    with _jobs_lock:
+        if _jobs.get(video_hash) is job:
+            _jobs.pop(video_hash, None)
+
+
+def thumbnail_file(video_hash: str, directory: str | os.PathLike, filename: str) -> Path | None:
+    """Arquivo ``filename`` das miniaturas da sessão, se já foi gerado."""
+    if not _THUMB_FILE_RE.match(filename):
+        return None
+    candidate = thumbnails_dir_for(video_hash, directory) / filename
+    return candidate if candidate.exists() else None
@@ -1,7 +1,11 @@
 import whisper
+import whisper.transcribe
 import os
+import threading
 from threading import Lock
 
+import tqdm
+
 # Cache global para modelo Whisper (economiza tempo de carregamento)
 _whisper_model = None
 _model_lock = Lock()
@@ -26,20 +30,56 @@ def get_whisper_model(model_name: str = "large"):
         print(f"[Whisper] Modelo '{model_name}' carregado com sucesso em cache")
         return _whisper_model
 
-def transcribe_audio(audio_path):
-    """Transcreve o áudio usando Whisper e retorna o texto e os tempos."""
+# O Whisper não tem callback de progresso: o avanço sai da barra tqdm que ele
+# atualiza a cada janela decodificada. A barra é trocada uma única vez por uma
+# que repassa a fração ao callback da thread atual (transcrições simultâneas
+# não se misturam).
+_progress_hook = threading.local()
+
+
+class _ReportingTqdm(tqdm.tqdm):
+    def update(self, n=1):
+        result = super().update(n)
+        callback = getattr(_progress_hook, "callback", None)
+        if callback is not None and self.total:
+            callback(min(1.0, self.n / self.total))
+        return result
+
+
+class _TqdmModule:
+    tqdm = _ReportingTqdm
+
+    def __getattr__(self, name):
+        return getattr(tqdm, name)
+
+
+def _install_progress_hook():
+    if not isinstance(getattr(whisper.transcribe, "tqdm", None), _TqdmModule):
+        whisper.transcribe.tqdm = _TqdmModule()
+
+
+def transcribe_audio(audio_path, on_progress=None):
+    """Transcreve o áudio usando Whisper e retorna o texto e os tempos.
+
+    ``on_progress`` recebe a fração do áudio já decodificada.
+    """
     if not os.path.exists(audio_path):
         print(f"Erro: O arquivo {audio_path} não foi encontrado.")
         return None
     
     try:
         model = get_whisper_model("large")
-        transcribed_result = model.transcribe(
-            audio_path,
-            verbose=False,
-            word_timestamps=True,
-            task="transcribe",
-        )
+        _install_progress_hook()
+        _progress_hook.callback = on_progress
+        try:
+            transcribed_result = model.transcribe(
+                audio_path,
+                verbose=False,
+                word_timestamps=True,
+                task="transcribe",
+            )
+        finally:
+            _progress_hook.callback = None
         return transcribed_result
     except Exception as e:
         print(f"Erro ao transcrever o áudio: {e}")
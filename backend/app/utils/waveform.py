@@ -0,0 +1,152 @@
+"""Picos de forma de onda (min/max) em múltiplas resoluções para o editor de beeps.
+
+Calculado uma vez a partir do WAV extraído no upload e salvo ao lado da
+sessão como ``waveform_<hash>.bin``. Formato (little-endian)::
+
+    cabeçalho  "TWWF" | versão u8 | bits u8 (8) | níveis u16 |
+               sample_rate u32 | samples_per_peak do nível 0 u32
+    contagens  níveis × u32 (picos em cada nível, do mais fino ao mais grosso)
+    dados      por nível, pares (min, max) int8 intercalados
+
+Cada nível agrupa o dobro de amostras do anterior. O canal é a mistura de
+todos os canais (min e max entre eles), que é o que o editor desenha.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WAVEFORM_MAGIC = b"TWWF"
+WAVEFORM_VERSION = 1
+BASE_SAMPLES_PER_PEAK = 256
+# O nível mais grosso cabe na largura de uma tela
+COARSEST_PEAKS = 1024
+
+_FILE_HEADER = struct.Struct("<4sBBHII")
+# Resposta de um nível: magic, versão, bits, zoom, níveis, reservado, taxa, amostras/pico, picos
+_LEVEL_HEADER = struct.Struct("<4sBBHHHIII")
+_READ_PEAKS_PER_CHUNK = 4096
+
+
+def waveform_path_for(video_hash: str, directory: str | os.PathLike) -> Path:
+    return Path(directory) / f"waveform_{video_hash}.bin"
+
+
+def _read_base_peaks(wav_path: Path, samples_per_peak: int) -> tuple[np.ndarray, int]:
+    """Lê o WAV em blocos e devolve (N, 2) int16 com min/max de cada janela."""
+    with wave.open(str(wav_path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Somente WAV PCM de 16 bits é suportado")
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        chunks: list[np.ndarray] = []
+        pending = np.empty((0, channels), dtype=np.int16)
+        frames_per_read = samples_per_peak * _READ_PEAKS_PER_CHUNK
+        while True:
+            raw = wav.readframes(frames_per_read)
+            if not raw:
+                break
+            frames = np.frombuffer(raw, dtype="<i2").reshape(-1, channels)
+            if len(pending):
+                frames = np.concatenate([pending, frames])
+            whole = len(frames) - len(frames) % samples_per_peak
+            if whole:
+                windows = frames[:whole].reshape(-1, samples_per_peak * channels)
+                chunks.append(np.stack([windows.min(axis=1), windows.max(axis=1)], axis=1))
+            pending = frames[whole:]
+        if len(pending):
+            flat = pending.reshape(-1)
+            chunks.append(np.array([[flat.min(), flat.max()]], dtype=np.int16))
+    if not chunks:
+        return np.zeros((0, 2), dtype=np.int16), sample_rate
+    return np.concatenate(chunks), sample_rate
+
+
+def _halve(peaks: np.ndarray) -> np.ndarray:
+    """Junta pares de picos vizinhos (o último sozinho, se a contagem for ímpar)."""
+    if len(peaks) % 2:
+        peaks = np.concatenate([peaks, peaks[-1:]])
+    pairs = peaks.reshape(-1, 2, 2)
+    return np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+
+
+def build_waveform_peaks(
+    wav_path: str | os.PathLike,
+    output_path: str | os.PathLike,
+    *,
+    samples_per_peak: int = BASE_SAMPLES_PER_PEAK,
+) -> Path:
+    """Calcula a pirâmide de picos de ``wav_path`` e grava em ``output_path``."""
+    base, sample_rate = _read_base_peaks(Path(wav_path), samples_per_peak)
+    levels = [base]
+    while len(levels[-1]) > COARSEST_PEAKS:
+        levels.append(_halve(levels[-1]))
+
+    target = Path(output_path)
+    partial = target.with_name(target.name + ".partial")
+    with partial.open("wb") as f:
+        f.write(_FILE_HEADER.pack(WAVEFORM_MAGIC, WAVEFORM_VERSION, 8, len(levels), sample_rate, samples_per_peak))
+        f.write(struct.pack(f"<{len(levels)}I", *(len(level) for level in levels)))
+        for level in levels:
+            # int16 -> int8 preservando o sinal (>> 8 arredonda para baixo)
+            f.write((level >> 8).astype(np.int8).tobytes())
+    os.replace(partial, target)
+    logger.info("Forma de onda salva em %s (%d níveis)", target, len(levels))
+    return target
+
+
+@dataclass(frozen=True)
+class WaveformLevel:
+    zoom: int
+    zoom_levels: int
+    sample_rate: int
+    samples_per_peak: int
+    peaks: bytes
+
+    def to_bytes(self) -> bytes:
+        header = _LEVEL_HEADER.pack(
+            WAVEFORM_MAGIC,
+            WAVEFORM_VERSION,
+            8,
+            self.zoom,
+            self.zoom_levels,
+            0,
+            self.sample_rate,
+            self.samples_per_peak,
+            len(self.peaks) // 2,
+        )
+        return header + self.peaks
+
+
+def read_waveform_level(path: str | os.PathLike, zoom: int) -> WaveformLevel:
+    """Lê um nível do arquivo: ``zoom=0`` é a visão geral, cada +1 dobra o detalhe.
+
+    Valores acima do nível mais fino são limitados a ele.
+    """
+    with open(path, "rb") as f:
+        magic, version, _bits, level_count, sample_rate, base_samples = _FILE_HEADER.unpack(
+            f.read(_FILE_HEADER.size)
+        )
+        if magic != WAVEFORM_MAGIC or version != WAVEFORM_VERSION:
+            raise ValueError("Arquivo de forma de onda inválido")
+        counts = struct.unpack(f"<{level_count}I", f.read(4 * level_count))
+        zoom = max(0, min(int(zoom), level_count - 1))
+        # Níveis gravados do mais fino ao mais grosso; zoom 0 é o último
+        level_index = level_count - 1 - zoom
+        f.seek(2 * sum(counts[:level_index]), os.SEEK_CUR)
+        peaks = f.read(2 * counts[level_index])
+    return WaveformLevel(
+        zoom=zoom,
+        zoom_levels=level_count,
+        sample_rate=sample_rate,
+        samples_per_peak=base_samples << level_index,
+        peaks=peaks,
+    )
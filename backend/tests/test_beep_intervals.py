@@ -0,0 +1,67 @@
+import importlib
+import sys
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+beep_module = importlib.import_module("utils.beep_intervals")
+BeepIntervalIndex = beep_module.BeepIntervalIndex
+
+
+def test_intervals_are_sorted_merged_and_padded():
+    index = BeepIntervalIndex.from_intervals(
+        [(5.0, 6.0, "abelha"), (1.0, 2.0), (1.5, 3.0), (9.0, 8.0), ("x", 1)],
+        pad_seconds=0.1,
+        clip_duration=5.9,
+    )
+
+    assert list(index) == [(0.9, 3.1), (4.9, 5.9)]
+
+
+def test_gain_envelope_matches_naive_mask_loop():
+    intervals = [(0.5, 0.7), (0.65, 1.0), (2.0, 2.25), (3.9, 4.0)]
+    index = BeepIntervalIndex.from_intervals(intervals)
+    t = np.linspace(0.0, 4.5, 2000)
+
+    expected = np.ones_like(t)
+    for start, end in intervals:
+        expected[(t >= start) & (t <= end)] = 0.12
+
+    envelope = index.gain_envelope(t, 0.12)
+    np.testing.assert_allclose(envelope, expected)
+
+    buffer = np.empty_like(t)
+    assert index.gain_envelope(t, 0.12, out=buffer) is buffer
+
+
+def test_empty_index_keeps_unit_gain():
+    index = BeepIntervalIndex.from_intervals([])
+
+    assert len(index) == 0
+    assert index.gain_envelope(1.0, 0.0).tolist() == [1.0]
+    assert not index.contains(np.array([0.0, 1.0])).any()
+
+
+def test_beep_signal_uses_cached_tables_and_merges_overlaps():
+    table = beep_module.get_tone_table(1000, 0.4)
+    assert beep_module.get_tone_table(1000, 0.4) is table
+
+    index = BeepIntervalIndex.from_intervals([(1.0, 1.2), (1.1, 1.5), (3.0, 3.01)], min_duration=0.05)
+    assert list(index) == [(1.0, 1.5), (3.0, 3.05)]
+
+    fps = table.fps
+    t = np.arange(0, 4 * fps) / fps
+    signal = beep_module.render_beep_signal(index, t, table)
+
+    assert signal.dtype == np.float32
+    assert not signal[t < 1.0].any()
+    assert not signal[(t > 1.5) & (t < 3.0)].any()
+
+    steady = (t > 1.05) & (t < 1.45)
+    expected = 0.4 * np.sin(2 * np.pi * 1000 * t[steady])
+    np.testing.assert_allclose(signal[steady], expected, atol=1e-5)
+    assert np.abs(signal).max() <= 0.4 + 1e-6
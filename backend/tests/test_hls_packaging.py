@@ -0,0 +1,42 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+hls_packaging = importlib.import_module("utils.hls_packaging")
+
+
+def _fake_package_hls(source, output_dir, segment_seconds):
+    directory = Path(output_dir)
+    directory.mkdir(parents=True)
+    (directory / "init.mp4").write_bytes(b"init")
+    (directory / "seg_00000.m4s").write_bytes(b"seg")
+    (directory / "index.m3u8").write_text("#EXTM3U\n", encoding="utf-8")
+    return directory / "index.m3u8"
+
+
+def test_package_is_served_only_while_it_matches_the_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(hls_packaging, "package_hls", _fake_package_hls)
+    video = tmp_path / "final_abc.mp4"
+    video.write_bytes(b"render 1")
+
+    assert hls_packaging.hls_file_if_ready(video, "index.m3u8") is None
+    playlist = hls_packaging.package_media(video)
+
+    assert playlist == tmp_path / "hls" / "final_abc" / "index.m3u8"
+    assert hls_packaging.hls_file_if_ready(video, "seg_00000.m4s").read_bytes() == b"seg"
+    assert hls_packaging.hls_file_if_ready(video, "../final_abc.mp4") is None
+    assert hls_packaging.hls_file_if_ready(video, "source.json") is None
+
+    # Nova renderização: o pacote antigo deixa de ser servido até ser refeito
+    video.write_bytes(b"render 2, maior")
+    os.utime(video, ns=(1, 1))
+    assert hls_packaging.hls_file_if_ready(video, "index.m3u8") is None
+
+    hls_packaging.package_media(video)
+    assert hls_packaging.hls_file_if_ready(video, "index.m3u8") is not None
+    assert [p.name for p in (tmp_path / "hls").iterdir()] == ["final_abc"]
@@ -0,0 +1,106 @@
+import importlib
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+media_delivery = importlib.import_module("utils.media_delivery")
+
+
+def _client(path: Path, etag: str):
+    app = Flask(__name__)
+
+    @app.route("/media")
+    def media():
+        from flask import request
+
+        return media_delivery.send_media(
+            path, mimetype="video/mp4", etag=etag, immutable=request.args.get("v") == etag
+        )
+
+    return app.test_client()
+
+
+def test_range_conditional_and_cache_headers(tmp_path):
+    video = tmp_path / "final_abc.mp4"
+    video.write_bytes(bytes(range(256)) * 4)
+    etag = media_delivery.content_etag("abc", "original")
+    client = _client(video, etag)
+
+    full = client.get("/media")
+    assert full.status_code == 200
+    assert full.headers["ETag"] == f'"{etag}"'
+    assert full.headers["Accept-Ranges"] == "bytes"
+    assert "no-cache" in full.headers["Cache-Control"]
+    assert "private" in full.headers["Cache-Control"]
+
+    partial = client.get("/media", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.headers["Content-Range"] == "bytes 100-199/1024"
+    assert partial.data == video.read_bytes()[100:200]
+
+    assert client.get("/media", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+
+    # If-Range com ETag antigo: o cliente recebe o arquivo inteiro
+    stale = client.get("/media", headers={"Range": "bytes=0-9", "If-Range": '"outro"'})
+    assert stale.status_code == 200
+
+    versioned = client.get(f"/media?v={etag}")
+    cache_control = versioned.headers["Cache-Control"]
+    assert "immutable" in cache_control and "max-age=31536000" in cache_control
+
+
+def test_final_output_etag_follows_render_manifest(tmp_path):
+    output = tmp_path / "final_abc.mp4"
+    output.write_bytes(b"video")
+    manifest = tmp_path / "final_abc.mp4.render.json"
+
+    manifest.write_text('{"video": "v1", "audio": "a1"}', encoding="utf-8")
+    first = media_delivery.final_output_etag(output)
+    manifest.write_text('{"video": "v1", "audio": "a2"}', encoding="utf-8")
+
+    assert media_delivery.final_output_etag(output) != first
+
+    # Mesmo manifesto, bytes reescritos por outra renderização: ETag novo
+    second = media_delivery.final_output_etag(output)
+    output.write_bytes(b"video re-rendered")
+    assert media_delivery.final_output_etag(output) != second
+
+
+def test_front_server_modes_return_internal_redirect_after_auth(tmp_path, monkeypatch):
+    media_root = tmp_path / "uploads"
+    media_root.mkdir()
+    video = media_root / "final_abc.mp4"
+    video.write_bytes(b"video")
+    etag = media_delivery.content_etag("abc")
+    monkeypatch.setattr(media_delivery.settings, "media_accel_root", media_root)
+    monkeypatch.setattr(media_delivery.settings, "media_accel_prefix", "/protected-media/")
+
+    app = Flask(__name__)
+
+    @app.route("/download")
+    def download():
+        return media_delivery.send_media(
+            video, mimetype="video/mp4", etag=etag, as_attachment=True, download_name="vídeo.mp4"
+        )
+
+    client = app.test_client()
+
+    monkeypatch.setattr(media_delivery.settings, "media_delivery", "x-accel")
+    accel = client.get("/download")
+    assert accel.status_code == 200
+    assert accel.headers["X-Accel-Redirect"] == "/protected-media/final_abc.mp4"
+    assert accel.data == b""
+    assert "filename*=UTF-8''v%C3%ADdeo.mp4" in accel.headers["Content-Disposition"]
+    assert client.get("/download", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+
+    monkeypatch.setattr(media_delivery.settings, "media_delivery", "x-sendfile")
+    sendfile = client.get("/download")
+    assert sendfile.headers["X-Sendfile"] == str(video.resolve())
+
+    monkeypatch.setattr(media_delivery.settings, "media_delivery", "direct")
+    assert client.get("/download").data == b"video"
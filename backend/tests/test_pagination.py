@@ -0,0 +1,136 @@
+import importlib
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import sqlalchemy
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+db_config = importlib.import_module("database.db_config")
+db = db_config.db
+User = importlib.import_module("models.user_model").User
+VideoTask = importlib.import_module("models.video_model").VideoTask
+pagination = importlib.import_module("utils.pagination")
+video_routes = importlib.import_module("routes.video_routes")
+user_routes = importlib.import_module("routes.user_management_routes")
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'tasks.db'}",
+        JWT_SECRET_KEY="teste",
+    )
+    JWTManager(app)
+    db.init_app(app)
+    app.register_blueprint(video_routes.videos_bp, url_prefix="/api")
+    with app.app_context():
+        db.create_all()
+        user = User("ana", "ana@example.com", "secret")
+        db.session.add(user)
+        db.session.commit()
+        # Vários vídeos no mesmo instante: o id desempata
+        base = datetime(2024, 1, 1)
+        for i in range(7):
+            db.session.add(VideoTask(
+                video_hash=f"h{i}", user_id=user.id, original_filename=f"{i}.mp4",
+                created_at=base + timedelta(minutes=i // 3), is_deleted=(i == 5),
+            ))
+        db.session.commit()
+        app.config["TOKEN"] = create_access_token(identity=user.id)
+        pagination.invalidate_counts()
+        yield app
+        db.session.remove()
+
+
+def _get(client, app, query):
+    response = client.get(f"/api/videos{query}", headers={"Authorization": f"Bearer {app.config['TOKEN']}"})
+    return response.status_code, response.get_json()
+
+
+def test_cursor_pages_cover_history_without_repeats(app):
+    client = app.test_client()
+    seen, cursor = [], ""
+    while True:
+        status, data = _get(client, app, f"?limit=2&fields=video_hash,filename{cursor}")
+        assert status == 200
+        assert all(set(video) == {"video_hash", "filename"} for video in data["videos"])
+        seen += [video["video_hash"] for video in data["videos"]]
+        if data["next_cursor"] is None:
+            break
+        cursor = f"&cursor={data['next_cursor']}"
+
+    assert seen == ["h6", "h4", "h3", "h2", "h1", "h0"]
+    # Sem limit/cursor continua vindo o histórico inteiro, completo
+    status, data = _get(client, app, "?include_total=1")
+    assert [video["video_hash"] for video in data["videos"]] == seen
+    assert data["total"] == 6 and "can_resume" in data["videos"][0]
+
+
+def test_invalid_fields_and_cursor_are_rejected(app):
+    client = app.test_client()
+    assert _get(client, app, "?fields=video_hash,senha")[0] == 400
+    assert _get(client, app, "?cursor=nao-e-cursor")[0] == 400
+
+
+def test_count_is_cached_until_invalidated(app):
+    query = VideoTask.query.filter_by(is_deleted=False)
+    assert pagination.cached_count(("videos", "x"), query) == 6
+    VideoTask.query.filter_by(video_hash="h0").update({"is_deleted": True})
+    db.session.commit()
+    assert pagination.cached_count(("videos", "x"), query) == 6
+    pagination.invalidate_counts("videos")
+    assert pagination.cached_count(("videos", "x"), query) == 5
+
+
+def test_history_query_uses_composite_index(app):
+    cursor = pagination.encode_cursor(datetime(2024, 1, 1, 0, 1), 4)
+    query = VideoTask.query.filter_by(user_id="u", is_deleted=False)
+    query = query.filter(
+        sqlalchemy.tuple_(VideoTask.created_at, VideoTask.id) < sqlalchemy.tuple_(*pagination.decode_cursor(cursor))
+    ).order_by(VideoTask.created_at.desc(), VideoTask.id.desc()).limit(3)
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    with db.engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(sqlalchemy.text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_video_tasks_user_history" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_add_missing_indexes_on_existing_table(app):
+    with db.engine.begin() as conn:
+        conn.execute(sqlalchemy.text("DROP INDEX ix_video_tasks_user_history"))
+    assert db_config.add_missing_indexes() == ["ix_video_tasks_user_history"]
+    assert db_config.add_missing_indexes() == []
+
+
+def test_users_keep_page_mode_unless_cursor_is_requested(app):
+    app.register_blueprint(user_routes.users_bp, url_prefix="/api")
+    with app.app_context():
+        admin = User("root", "root@example.com", "secret", role="admin")
+        db.session.add(admin)
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=admin.id)}"}
+    client = app.test_client()
+
+    # Sem page/cursor/limit: a resposta de sempre, por página
+    data = client.get("/api/users?per_page=1", headers=headers).get_json()
+    assert data["pagination"] == {
+        "page": 1, "pages": 2, "per_page": 1, "total": 2, "has_next": True, "has_prev": False,
+    }
+    second = client.get("/api/users?page=2&per_page=1", headers=headers).get_json()
+    assert second["pagination"]["has_prev"] and len(second["users"]) == 1
+
+    cursor_page = client.get("/api/users?limit=1&fields=username", headers=headers).get_json()
+    assert cursor_page["users"] == [{"username": "root"}]
+    assert cursor_page["pagination"]["next_cursor"] and "page" not in cursor_page["pagination"]
+    rest = client.get(
+        f"/api/users?cursor={cursor_page['pagination']['next_cursor']}&fields=username", headers=headers
+    ).get_json()
+    assert rest["users"] == [{"username": "ana"}] and rest["pagination"]["next_cursor"] is None
@@ -0,0 +1,34 @@
+import importlib
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+preview_proxy = importlib.import_module("utils.preview_proxy")
+
+
+def test_proxy_is_served_only_after_background_transcode(tmp_path, monkeypatch):
+    source = tmp_path / "upload_abc_video.mp4"
+    source.write_bytes(b"original")
+    transcoded = []
+
+    def fake_transcode(video_path, output_path, height):
+        transcoded.append((Path(video_path).name, height))
+        Path(output_path).write_bytes(b"proxy")
+
+    monkeypatch.setattr(preview_proxy, "transcode_preview_proxy", fake_transcode)
+    monkeypatch.setattr(preview_proxy.settings, "preview_proxy_height", 480)
+
+    assert preview_proxy.get_ready_proxy("abc", source) is None
+    preview_proxy.start_preview_proxy("abc", source).result(timeout=5)
+
+    ready = preview_proxy.get_ready_proxy("abc", source)
+    assert ready == tmp_path / "proxy_abc.mp4"
+    assert ready.read_bytes() == b"proxy"
+    assert list(tmp_path.glob("*.partial*")) == []
+
+    # Proxy existente não é gerado de novo
+    assert preview_proxy.start_preview_proxy("abc", source) is None
+    assert transcoded == [("upload_abc_video.mp4", 480)]
@@ -0,0 +1,95 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+progress_eta = importlib.import_module("utils.progress_eta")
+progress_tracker = importlib.import_module("utils.progress_tracker")
+
+
+def test_estimate_remaining_blends_history_with_observed_rate():
+    assert progress_eta.estimate_remaining(0.0, 0.0, None) is None
+    # Sem avanço visível vale só a previsão
+    assert progress_eta.estimate_remaining(2.0, 0.0, 10.0) == pytest.approx(8.0)
+    # Sem histórico vale só o ritmo observado
+    assert progress_eta.estimate_remaining(5.0, 0.5, None) == pytest.approx(5.0)
+    # Metade do caminho: metade de cada
+    assert progress_eta.estimate_remaining(5.0, 0.5, 20.0) == pytest.approx(10.0)
+
+
+def test_subrange_maps_and_clamps_fraction():
+    seen = []
+    callback = progress_eta.subrange(seen.append, 0.2, 0.6)
+    callback(0.5)
+    callback(2.0)
+    assert seen == [pytest.approx(0.4), pytest.approx(0.6)]
+    assert progress_eta.subrange(None, 0, 1) is None
+
+
+def test_stage_timings_keep_moving_average_per_machine(tmp_path):
+    path = tmp_path / "timings.json"
+    timings = progress_eta.StageTimings(path)
+    assert timings.real_time_factor("transcribing") is None
+
+    timings.record("transcribing", 10.0, 100.0)
+    timings.record("transcribing", 20.0, 100.0)
+
+    assert timings.real_time_factor("transcribing") == pytest.approx(0.13)
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert stored[f"{timings.machine}:transcribing"]["samples"] == 2
+    # Outra instância (outro worker) lê o mesmo arquivo
+    assert progress_eta.StageTimings(path).real_time_factor("transcribing") == pytest.approx(0.13)
+
+
+def test_moviepy_logger_reports_bar_fraction():
+    seen = []
+    logger = progress_eta.MoviePyProgressLogger(seen.append, bar="t")
+    for _ in logger.iter_bar(chunk=range(2)):
+        pass
+    assert seen == []
+    for _ in logger.iter_bar(t=range(4)):
+        pass
+    assert seen == [0.0, 0.25, 0.5, 0.75, 1.0]
+
+
+def test_stage_progress_publishes_band_and_eta(tmp_path, monkeypatch):
+    timings = progress_eta.StageTimings(tmp_path / "timings.json")
+    timings.record("transcribing", 30.0, 60.0)
+    timings.record("censoring", 6.0, 60.0)
+    monkeypatch.setattr(progress_eta, "PUBLISH_INTERVAL_SECONDS", 0)
+
+    with progress_eta.StageProgress(
+        "eta", "transcribing", "Transcrevendo", 15, 90,
+        media_seconds=60.0, following=("censoring",), timings=timings,
+    ) as stage:
+        first = progress_tracker.get_progress("eta")
+        stage.update(0.5)
+        halfway = progress_tracker.get_progress("eta")
+
+    assert first["progress"] == 15
+    # Previsão: 30 s da transcrição + 6 s da censura
+    assert first["eta_seconds"] == pytest.approx(36.0, abs=0.2)
+    assert halfway["progress"] == pytest.approx(52.5)
+    assert 0 < halfway["eta_seconds"] < first["eta_seconds"]
+    assert timings.real_time_factor("transcribing") < 0.5
+    progress_tracker.cleanup_progress("eta")
+
+
+def test_stage_progress_skips_timing_on_error_or_discard(tmp_path):
+    timings = progress_eta.StageTimings(tmp_path / "timings.json")
+
+    with pytest.raises(RuntimeError):
+        with progress_eta.StageProgress("eta-error", "rendering_video", "m", 10, 95, media_seconds=5, timings=timings):
+            raise RuntimeError("falhou")
+    with progress_eta.StageProgress("eta-cached", "rendering_video", "m", 10, 95, media_seconds=5, timings=timings) as stage:
+        stage.discard_timing()
+
+    assert timings.real_time_factor("rendering_video") is None
+    progress_tracker.cleanup_progress("eta-error")
+    progress_tracker.cleanup_progress("eta-cached")
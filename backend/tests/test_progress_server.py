@@ -0,0 +1,78 @@
+import asyncio
+import importlib
+import time
+
+import jwt
+
+progress_server = importlib.import_module("app.progress_server")
+progress_store = importlib.import_module("app.utils.progress_store")
+auth_tokens = importlib.import_module("app.utils.auth_tokens")
+
+
+def _token(secret, token_type="access"):
+    claims = {"sub": "user-1", "type": token_type, "exp": int(time.time()) + 60}
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+async def _request(port, target, headers=""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    await writer.drain()
+    return reader, writer
+
+
+def test_async_server_validates_jwt_and_pushes_events(tmp_path):
+    store = progress_store.SQLiteProgressStore(tmp_path / "progress.db")
+    secret = progress_server.settings.jwt_secret_key
+
+    async def scenario():
+        server = progress_server.ProgressServer(store, lambda video_hash, user_id: video_hash != "alheio")
+        tcp_server = await server.start("127.0.0.1", 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            reader, _ = await _request(port, "/api/video_progress/abc")
+            assert (await reader.read()).startswith(b"HTTP/1.1 401")
+
+            refresh = _token(secret, "refresh")
+            reader, _ = await _request(port, "/api/video_progress/abc", f"Authorization: Bearer {refresh}\r\n")
+            assert (await reader.read()).startswith(b"HTTP/1.1 401")
+
+            # O token de acesso não vale na URL; o ticket de outro vídeo também não
+            reader, _ = await _request(port, f"/api/video_progress/abc?token={_token(secret)}")
+            assert (await reader.read()).startswith(b"HTTP/1.1 401")
+            ticket = auth_tokens.create_stream_ticket("user-1", "abc")
+            reader, _ = await _request(port, f"/api/video_progress/outro?ticket={ticket}")
+            assert (await reader.read()).startswith(b"HTTP/1.1 401")
+
+            # Ticket válido, vídeo de outro usuário: a sessão não existe para ele
+            other = auth_tokens.create_stream_ticket("user-1", "alheio")
+            reader, _ = await _request(port, f"/api/video_progress/alheio?ticket={other}")
+            assert (await reader.read()).startswith(b"HTTP/1.1 404")
+
+            # O EventSource abre com o ticket; o de cabeçalho segue abaixo
+            ticket_reader, _ = await _request(port, f"/api/video_progress/abc?ticket={ticket}")
+            assert (await ticket_reader.readuntil(b"\r\n\r\n")).startswith(b"HTTP/1.1 200")
+
+            reader, _ = await _request(port, "/api/video_progress/abc", f"Authorization: Bearer {_token(secret)}\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 200") and b"text/event-stream" in head
+            assert (await reader.readuntil(b"\n\n")).startswith(b"retry:")
+            assert b'"stage": "unknown"' in await reader.readuntil(b"\n\n")
+
+            state = {"stage": "transcribing", "progress": 40, "message": "a", "error": None}
+            await asyncio.to_thread(store.append, "abc", state, 32)
+            event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)
+            assert b"id: 1\n" in event and b'"progress": 40' in event
+
+            done = {"stage": "completed", "progress": 100, "message": "b", "error": None}
+            await asyncio.to_thread(store.append, "abc", done, 32)
+            assert b'"progress": 100' in await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)
+            # Estado final encerra a conexão
+            assert await asyncio.wait_for(reader.read(), 2) == b""
+            assert server.subscriber_count == 0
+        finally:
+            server.close()
+            tcp_server.close()
+            await tcp_server.wait_closed()
+
+    asyncio.run(scenario())
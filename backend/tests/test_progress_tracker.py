@@ -0,0 +1,101 @@
+import importlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+progress_tracker = importlib.import_module("utils.progress_tracker")
+
+
+def _event_ids(events):
+    return [int(line[4:]) for event in events for line in event.splitlines() if line.startswith("id: ")]
+
+
+def test_update_progress_creates_unknown_session_without_deadlock():
+    worker = threading.Thread(target=progress_tracker.update_progress, args=("fresh", "transcribing", 40, "msg"))
+    worker.start()
+    worker.join(timeout=2)
+
+    assert not worker.is_alive()
+    assert progress_tracker.get_progress("fresh")["progress"] == 40
+    progress_tracker.cleanup_progress("fresh")
+
+
+def test_subscriber_wakes_on_change_and_stops_when_completed():
+    progress_tracker.initialize_progress("live")
+    stream = progress_tracker.stream_progress("live", heartbeat_seconds=0.05)
+    assert next(stream).startswith("retry:")
+    assert '"stage": "starting"' in next(stream)
+
+    # Sem mudanças, só heartbeats
+    assert next(stream) == ": heartbeat\n\n"
+
+    def publish():
+        time.sleep(0.1)
+        progress_tracker.update_progress("live", "transcribing", 40, "Transcrevendo")
+        progress_tracker.update_progress("live", "completed", 100, "Pronto")
+
+    threading.Thread(target=publish).start()
+    events = [event for event in stream if event != ": heartbeat\n\n"]
+    assert '"progress": 40' in events[0]
+    assert '"progress": 100' in events[-1]
+    progress_tracker.cleanup_progress("live")
+
+
+def test_last_event_id_replays_buffered_events():
+    progress_tracker.initialize_progress("replay")
+    progress_tracker.update_progress("replay", "extracting_audio", 10, "a")
+    progress_tracker.update_progress("replay", "transcribing", 40, "b")
+    progress_tracker.update_progress("replay", "completed", 100, "c")
+
+    first_id = _event_ids(list(progress_tracker.stream_progress("replay")))[0]
+    replayed = list(progress_tracker.stream_progress("replay", first_id - 2))
+    assert _event_ids(replayed) == [first_id - 1, first_id]
+
+    # O cliente já viu o evento final: nada a reenviar
+    assert list(progress_tracker.stream_progress("replay", first_id)) == [
+        f"retry: {progress_tracker.RETRY_MILLISECONDS}\n\n"
+    ]
+    progress_tracker.cleanup_progress("replay")
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    progress_tracker.update_progress("stale", "rendering_video", 40, "x")
+    progress_tracker._channels["stale"].last_activity -= progress_tracker.IDLE_EVICT_SECONDS + 1
+    monkeypatch.setattr(progress_tracker, "_last_eviction", 0.0)
+
+    progress_tracker.update_progress("other", "starting", 0, "y")
+
+    assert progress_tracker.get_progress("stale")["stage"] == "unknown"
+    progress_tracker.cleanup_progress("other")
+
+
+def test_sqlite_backend_shares_progress_between_workers(tmp_path, monkeypatch):
+    progress_store = importlib.import_module("utils.progress_store")
+    db_path = tmp_path / "progress.db"
+    monkeypatch.setattr(progress_store.settings, "progress_backend", "sqlite")
+    monkeypatch.setattr(progress_store.settings, "progress_db_path", db_path)
+    # Outro worker: conexão própria com o mesmo arquivo
+    other_worker = progress_store.SQLiteProgressStore(db_path)
+
+    other_worker.append("shared", {"stage": "transcribing", "progress": 40, "message": "a", "error": None}, keep=32)
+    assert progress_tracker.get_progress("shared")["progress"] == 40
+
+    stream = progress_tracker.stream_progress("shared", heartbeat_seconds=5)
+    next(stream)
+    assert '"progress": 40' in next(stream)
+
+    started = time.monotonic()
+    other_worker.append("shared", {"stage": "completed", "progress": 100, "message": "b", "error": None}, keep=32)
+    assert '"progress": 100' in next(stream)
+    assert time.monotonic() - started < 1.0
+
+    # Ids vêm do banco: Last-Event-ID vale em qualquer worker
+    assert _event_ids(list(progress_tracker.stream_progress("shared", 0))) == [1, 2]
+
+    progress_tracker.cleanup_progress("shared")
+    assert other_worker.latest("shared") is None
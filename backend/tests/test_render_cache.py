@@ -0,0 +1,52 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+render_cache = importlib.import_module("utils.render_cache")
+
+
+def _write(path: Path, size: int, mtime: float) -> Path:
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_budget_evicts_least_recently_used_entries(tmp_path):
+    cache_dir = tmp_path / "render_cache"
+    cache_dir.mkdir()
+    oldest = _write(cache_dir / "a.mp4", 40, 1_000)
+    _write(cache_dir / "b.mp4", 40, 2_000)
+    _write(cache_dir / "c.mp4", 40, 3_000)
+
+    # Um acerto em "a" o torna o mais recente
+    output = tmp_path / "final_x.mp4"
+    assert render_cache.fetch_cached_render("a", output, ".mp4", cache_dir=cache_dir)
+    assert output.read_bytes() == oldest.read_bytes()
+
+    removed = render_cache.enforce_render_cache_budget(80, cache_dir=cache_dir)
+
+    assert removed == 1
+    assert sorted(p.name for p in cache_dir.iterdir()) == ["a.mp4", "c.mp4"]
+
+
+def test_store_keeps_new_entry_and_skips_outputs_over_budget(tmp_path):
+    cache_dir = tmp_path / "render_cache"
+    output = tmp_path / "final_x.mp4"
+    output.write_bytes(b"v" * 50)
+
+    entry = render_cache.store_render("k1", output, ".mp4", cache_dir=cache_dir, max_bytes=60)
+    assert entry is not None and entry.read_bytes() == output.read_bytes()
+
+    other = tmp_path / "final_y.mp4"
+    other.write_bytes(b"w" * 50)
+    render_cache.store_render("k2", other, ".mp4", cache_dir=cache_dir, max_bytes=60)
+    assert [p.name for p in cache_dir.iterdir()] == ["k2.mp4"]
+
+    big = tmp_path / "final_z.mp4"
+    big.write_bytes(b"z" * 100)
+    assert render_cache.store_render("k3", big, ".mp4", cache_dir=cache_dir, max_bytes=60) is None
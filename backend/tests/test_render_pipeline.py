@@ -0,0 +1,233 @@
+import importlib
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+pipeline = importlib.import_module("utils.render_pipeline")
+SubtitleRenderingOptions = importlib.import_module(
+    "utils.CreateVideoWinthSubtitles"
+).SubtitleRenderingOptions
+MediaInfo = importlib.import_module("services.ffmpeg").MediaInfo
+
+
+@pytest.fixture()
+def fake_renderers(monkeypatch):
+    calls = []
+
+    def fake_create_video(video_path, subtitles, output_video_path, subtitle_options, **kwargs):
+        calls.append(("video", kwargs.get("include_audio", True)))
+        Path(output_video_path).write_bytes(b"video")
+
+    def fake_render_audio(video_path, output_audio_path, **kwargs):
+        calls.append(("audio", len(kwargs.get("beep_intervals") or [])))
+        Path(output_audio_path).write_bytes(b"audio")
+
+    def fake_mux(video_source, audio_source, output_path, audio_codec="copy", on_progress=None):
+        calls.append(("mux", audio_codec if audio_source is not None else None))
+        Path(output_path).write_bytes(b"muxed")
+
+    def fake_mux_soft(
+        video_source, audio_source, subtitle_file, output_path, subtitle_codec, audio_codec="copy", on_progress=None
+    ):
+        calls.append(("soft", subtitle_codec, Path(subtitle_file).read_text(encoding="utf-8")))
+        Path(output_path).write_bytes(b"soft")
+
+    monkeypatch.setattr(pipeline, "create_video_with_subtitles", fake_create_video)
+    monkeypatch.setattr(pipeline, "render_censored_audio", fake_render_audio)
+    monkeypatch.setattr(pipeline, "mux_streams", fake_mux)
+    monkeypatch.setattr(pipeline, "mux_soft_subtitles", fake_mux_soft)
+    monkeypatch.setattr(pipeline, "can_copy_audio_to_mp4", lambda path: True)
+    monkeypatch.setattr(pipeline, "probe_media", lambda path: MediaInfo("h264", "aac", (), 3.0, 25.0))
+    monkeypatch.setattr(pipeline.settings, "render_segment_cache", False)
+    monkeypatch.setattr(pipeline.settings, "render_cache_max_bytes", 0)
+    return calls
+
+
+def test_render_strategy_follows_changed_tracks(tmp_path, fake_renderers):
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"source")
+    output = tmp_path / "final_abc.mp4"
+    options = SubtitleRenderingOptions(font_path="")
+    subtitles = [(0.0, 1.0, "ola"), (1.0, 2.0, "mundo")]
+
+    def render(subs, beeps):
+        fake_renderers.clear()
+        return pipeline.render_final_output(
+            str(source), subs, str(output), options, beep_intervals=beeps
+        )
+
+    assert render(subtitles, [(0.2, 0.4)]) == pipeline.STRATEGY_FULL
+    assert pipeline.manifest_path_for(output).exists()
+
+    assert render(subtitles, [(0.2, 0.4)]) == pipeline.STRATEGY_REUSED
+    assert fake_renderers == []
+
+    assert render(subtitles, [(0.2, 0.4), (1.2, 1.4)]) == pipeline.STRATEGY_AUDIO_ONLY
+    assert fake_renderers == [("audio", 2), ("mux", "copy")]
+
+    assert render(subtitles[:1], []) == pipeline.STRATEGY_VIDEO_ONLY
+    assert fake_renderers == [("video", False), ("mux", "copy")]
+
+    assert list(tmp_path.glob("*.tmp-*")) == []
+
+
+def test_output_options_from_subtitle_config():
+    default = pipeline.OutputOptions.from_subtitle_config({"fontSize": 24})
+    assert (default.mode, default.extension, default.mimetype) == ("burn", ".mp4", "video/mp4")
+
+    soft_mp4 = pipeline.OutputOptions.from_subtitle_config(
+        {"renderMode": "soft", "subtitleFormat": "ass"}
+    )
+    assert soft_mp4.subtitle_codec == "mov_text"
+
+    soft_mkv = pipeline.OutputOptions.from_subtitle_config(
+        {"renderMode": "soft", "container": "mkv", "subtitleFormat": "ass"}
+    )
+    assert (soft_mkv.extension, soft_mkv.subtitle_codec) == (".mkv", "ass")
+
+    with pytest.raises(ValueError):
+        pipeline.OutputOptions.from_subtitle_config({"renderMode": "hologram"})
+
+
+def test_encoder_profile_selection_and_write_options():
+    default = pipeline.OutputOptions.from_subtitle_config({})
+    assert default.encoder_profile == pipeline.settings.encoder_profile
+
+    draft = pipeline.OutputOptions.from_subtitle_config({"encoderProfile": "Draft"})
+    assert (draft.encoder.preset, draft.encoder.crf, draft.encoder.fps) == ("ultrafast", 28, None)
+
+    write_options = importlib.import_module("utils.CreateVideoWinthSubtitles").encoder_write_options(
+        draft.encoder
+    )
+    assert write_options["preset"] == "ultrafast"
+    assert write_options["threads"] is None
+    assert write_options["ffmpeg_params"] == ["-crf", "28", "-movflags", "+faststart"]
+
+    with pytest.raises(ValueError):
+        pipeline.OutputOptions.from_subtitle_config({"encoderProfile": "lossless"})
+
+
+def test_soft_subtitles_copy_video_and_skip_audio_without_beeps(tmp_path, fake_renderers):
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"source")
+    output = tmp_path / "final_abc.mp4"
+    options = SubtitleRenderingOptions(font_path="")
+    soft = pipeline.OutputOptions.from_subtitle_config({"renderMode": "soft"})
+
+    strategy = pipeline.render_final_output(
+        str(source), [(1.5, 62.25, "ola")], str(output), options, output_options=soft
+    )
+
+    assert strategy == pipeline.STRATEGY_SOFT
+    assert [call[:2] for call in fake_renderers] == [("soft", "mov_text")]
+    assert "00:00:01,500 --> 00:01:02,250" in fake_renderers[0][2]
+
+
+def test_render_cache_serves_identical_output_of_another_session(tmp_path, fake_renderers, monkeypatch):
+    cache_dir = tmp_path / "render_cache"
+    monkeypatch.setattr(pipeline.settings, "render_cache_max_bytes", 10_000)
+    monkeypatch.setattr(pipeline.settings, "upload_dir", tmp_path)
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"source")
+    options = SubtitleRenderingOptions(font_path="")
+    subtitles = [(0.0, 1.0, "ola")]
+
+    def render(name):
+        fake_renderers.clear()
+        return pipeline.render_final_output(
+            str(source), subtitles, str(tmp_path / name), options,
+            beep_intervals=[(0.2, 0.4)], source_hash="abc123",
+        )
+
+    assert render("final_a.mp4") == pipeline.STRATEGY_FULL
+    assert len(list(cache_dir.iterdir())) == 1
+
+    assert render("final_b.mp4") == pipeline.STRATEGY_CACHED
+    assert fake_renderers == []
+    assert (tmp_path / "final_b.mp4").read_bytes() == (tmp_path / "final_a.mp4").read_bytes()
+    assert render("final_b.mp4") == pipeline.STRATEGY_REUSED
+
+
+def test_segmented_render_of_source_without_audio(tmp_path, fake_renderers, monkeypatch):
+    def fake_segments(video_path, subtitles, output_video_path, subtitle_options, **kwargs):
+        fake_renderers.append(("segments", kwargs["workers"]))
+        Path(output_video_path).write_bytes(b"segments")
+        return SimpleNamespace(rendered=2, reused=0)
+
+    monkeypatch.setattr(pipeline, "render_video_segments", fake_segments)
+    monkeypatch.setattr(pipeline, "probe_media", lambda path: MediaInfo("h264", None, (), 3.0, 25.0))
+    monkeypatch.setattr(pipeline, "can_copy_audio_to_mp4", lambda path: False)
+    monkeypatch.setattr(pipeline.settings, "render_segment_cache", True)
+    source = tmp_path / "silent.mp4"
+    source.write_bytes(b"source")
+    output = tmp_path / "final_abc.mp4"
+
+    strategy = pipeline.render_final_output(
+        str(source), [(0.0, 1.0, "ola")], str(output), SubtitleRenderingOptions(font_path=""),
+        beep_intervals=[(0.2, 0.4)],
+    )
+
+    assert strategy == pipeline.STRATEGY_FULL
+    assert fake_renderers == [("segments", 1), ("mux", None)]
+    assert output.read_bytes() == b"muxed"
+    assert list(tmp_path.glob("*.tmp-*")) == []
+
+
+def test_silent_source_and_manifest_lifecycle(tmp_path, fake_renderers, monkeypatch):
+    monkeypatch.setattr(pipeline, "probe_media", lambda path: MediaInfo("h264", None, (), 3.0, 25.0))
+    source = tmp_path / "silent.mp4"
+    source.write_bytes(b"source")
+    output = tmp_path / "final_abc.mp4"
+    options = SubtitleRenderingOptions(font_path="")
+    subtitles = [(0.0, 1.0, "ola")]
+
+    def render(subs, beeps, **kwargs):
+        fake_renderers.clear()
+        return pipeline.render_final_output(
+            str(source), subs, str(output), options, beep_intervals=beeps, **kwargs
+        )
+
+    assert render(subtitles, [(0.2, 0.4)]) == pipeline.STRATEGY_FULL
+    # Só os beeps mudaram numa origem muda: nada a refazer
+    assert render(subtitles, [(0.5, 0.7)]) == pipeline.STRATEGY_REUSED
+    assert fake_renderers == []
+
+    soft = pipeline.OutputOptions.from_subtitle_config({"renderMode": "soft"})
+    assert render(subtitles, [(0.2, 0.4)], output_options=soft) == pipeline.STRATEGY_SOFT
+    assert [call[:2] for call in fake_renderers] == [("soft", "mov_text")]
+
+    def failing_render(*args, **kwargs):
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(pipeline, "create_video_with_subtitles", failing_render)
+    with pytest.raises(RuntimeError):
+        render([(0.0, 2.0, "outra")], [])
+    # Saída antiga sem manifesto: a próxima renderização não a reaproveita
+    assert not pipeline.manifest_path_for(output).exists()
+    assert list(tmp_path.glob("*.partial")) == []
+
+
+def test_video_fingerprint_tracks_render_method(tmp_path, monkeypatch):
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"source")
+    options = SubtitleRenderingOptions(font_path="")
+    subtitles = [(0.0, 1.0, "ola")]
+    monkeypatch.setattr(pipeline.settings, "render_segment_cache", False)
+
+    def fingerprint(**config):
+        output_options = pipeline.OutputOptions.from_subtitle_config(config)
+        return pipeline.video_fingerprint(str(source), subtitles, options, output_options=output_options)
+
+    single = fingerprint()
+    parallel = fingerprint(parallel=True)
+    assert parallel != single
+
+    # Cache de segmentos e paralelo cortam e encodam os mesmos trechos
+    monkeypatch.setattr(pipeline.settings, "render_segment_cache", True)
+    assert fingerprint() == parallel
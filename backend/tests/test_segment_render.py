@@ -0,0 +1,94 @@
+import importlib
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+segment_render = importlib.import_module("utils.segment_render")
+
+
+def test_plan_segments_cuts_on_keyframes_aligned_to_output_grid():
+    keyframes = [0.0, 9.97, 20.02, 30.0, 41.5, 50.0]
+
+    segments = segment_render.plan_segments(
+        keyframes, 60.0, segment_count=3, min_seconds=5.0, fps=24
+    )
+
+    assert [(s.start, s.end) for s in segments] == [
+        (0.0, 20.0),
+        (20.0, 41.5),
+        (41.5, 60.0),
+    ]
+    assert sum(s.duration for s in segments) == 60.0
+
+
+def test_plan_segments_falls_back_to_single_segment_for_short_videos():
+    segments = segment_render.plan_segments(
+        [0.0, 2.0, 4.0], 6.0, segment_count=8, min_seconds=20.0
+    )
+
+    assert [(s.start, s.end) for s in segments] == [(0.0, 6.0)]
+
+
+def test_slice_subtitles_splits_entries_straddling_the_boundary():
+    subtitles = [(0.0, 4.0, "antes"), (9.0, 12.0, "atravessa"), (15.0, 16.0, "depois")]
+    first = segment_render.Segment(index=0, start=0.0, end=10.0)
+    second = segment_render.Segment(index=1, start=10.0, end=20.0)
+
+    assert segment_render.slice_subtitles(subtitles, first) == [
+        (0.0, 4.0, "antes"),
+        (9.0, 10.0, "atravessa"),
+    ]
+    assert segment_render.slice_subtitles(subtitles, second) == [
+        (0.0, 2.0, "atravessa"),
+        (5.0, 6.0, "depois"),
+    ]
+
+
+def test_segment_cache_rerenders_only_segments_touched_by_an_edit(tmp_path, monkeypatch):
+    rendered = []
+
+    def fake_create_video(video_path, subtitles, output_video_path, subtitle_options, **kwargs):
+        rendered.append(kwargs["subclip"])
+        Path(output_video_path).write_bytes(b"segment")
+
+    monkeypatch.setattr(segment_render, "create_video_with_subtitles", fake_create_video)
+    monkeypatch.setattr(
+        segment_render, "probe_media", lambda path: type("Info", (), {"duration": 90.0, "fps": 24.0})()
+    )
+    monkeypatch.setattr(segment_render, "probe_keyframes", lambda path: [0.0, 30.0, 60.0])
+    monkeypatch.setattr(
+        segment_render,
+        "concat_files",
+        lambda paths, output: Path(output).write_bytes(b"".join(Path(p).read_bytes() for p in paths)),
+    )
+
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"source")
+    cache_dir = tmp_path / "segments"
+    options = importlib.import_module("utils.CreateVideoWinthSubtitles").SubtitleRenderingOptions(
+        font_path=""
+    )
+
+    def render(subtitles):
+        rendered.clear()
+        return segment_render.render_video_segments(
+            str(source),
+            subtitles,
+            str(tmp_path / "out.mp4"),
+            options,
+            workers=1,
+            cache_dir=cache_dir,
+            segment_seconds=30.0,
+            min_segment_seconds=10.0,
+        )
+
+    first = render([(5.0, 8.0, "ola"), (65.0, 70.0, "mundo")])
+    assert (first.segments, first.rendered) == (3, 3)
+
+    second = render([(5.0, 8.0, "ola"), (65.0, 70.0, "mundo!")])
+    assert (second.segments, second.rendered) == (3, 1)
+    assert rendered == [(60.0, 90.0)]
+    assert len(list(cache_dir.glob("seg_*.mp4"))) == 3
@@ -0,0 +1,106 @@
+import gzip
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+session_cache = importlib.import_module("utils.session_cache")
+session_store = importlib.import_module("utils.session_store")
+
+
+def _session(count=200):
+    return {
+        "video_hash": "abc123",
+        "video_path": "uploads/upload_abc123.mp4",
+        "subtitles": [{"id": i, "start": float(i), "end": i + 0.9, "text": f"linha {i}"} for i in range(count)],
+        "video_info": {"filename": "video.mp4", "duration": float(count)},
+        "forbidden_words": ["merda"],
+        "beep_intervals": [[0.2, 0.4, "merda"]],
+    }
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_cache, "_cache", session_cache.SessionResponseCache(1024**2))
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session())
+    return store
+
+
+def _get(store, form="full", headers=None):
+    app = Flask(__name__)
+    with app.test_request_context(headers=headers or {}):
+        return session_cache.send_session(store, "abc123", form)
+
+
+def test_send_session_compresses_and_revalidates(store):
+    first = _get(store, headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["Vary"]
+    payload = json.loads(gzip.decompress(first.get_data()))
+    assert payload["data"]["version"] == 1
+    assert len(payload["data"]["subtitles"]) == 200
+
+    etag = first.headers["ETag"]
+    cached = session_cache.get_session_cache().get("abc123", "full", store.revision("abc123"), "gzip")
+    assert cached == first.get_data()
+    assert _get(store, headers={"If-None-Match": etag}).status_code == 304
+
+    # Cada codificação tem o seu ETag; o base da revisão também revalida
+    identity = _get(store)
+    assert identity.headers["ETag"] == etag.replace('-gz"', '"')
+    assert etag.endswith('-gz"')
+    base_revalidated = _get(store, headers={"If-None-Match": identity.headers["ETag"], "Accept-Encoding": "gzip"})
+    assert base_revalidated.status_code == 304
+    assert base_revalidated.headers["ETag"] == identity.headers["ETag"]
+
+    # Uma edição muda a revisão: o ETag antigo deixa de valer
+    store.update("abc123", forbidden_words=["droga"])
+    fresh = _get(store, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and "Content-Encoding" not in fresh.headers
+    assert fresh.headers["ETag"] != etag
+    assert json.loads(fresh.get_data())["data"]["forbidden_words"] == ["droga"]
+
+
+def test_columnar_form_has_its_own_etag(store):
+    full = _get(store)
+    columnar = _get(store, form="columnar")
+    assert full.headers["ETag"] != columnar.headers["ETag"]
+    data = json.loads(columnar.get_data())["data"]
+    assert data["subtitles"]["text"][:2] == ["linha 0", "linha 1"]
+    assert len(columnar.get_data()) < len(full.get_data())
+    assert _get(store, headers={"If-None-Match": columnar.headers["ETag"]}).status_code == 200
+
+
+def test_recreated_session_does_not_reuse_old_etag(store):
+    etag = _get(store).headers["ETag"]
+    store.delete("abc123")
+    assert _get(store) is None
+    store.save(_session(count=3))
+    store._conn().execute("UPDATE edit_sessions SET created_at = created_at + 1")
+
+    again = _get(store, headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert len(json.loads(again.get_data())["data"]["subtitles"]) == 3
+
+
+def test_cache_evicts_least_recently_used_within_budget():
+    cache = session_cache.SessionResponseCache(10)
+    cache.put("a", "full", (1, 0.0), "identity", b"12345")
+    cache.put("b", "full", (1, 0.0), "identity", b"12345")
+    assert cache.get("a", "full", (1, 0.0), "identity") == b"12345"
+    cache.put("c", "full", (1, 0.0), "identity", b"123")
+    assert cache.get("b", "full", (1, 0.0), "identity") is None
+    assert cache.get("a", "full", (1, 0.0), "identity") == b"12345"
+    # Revisão nova substitui a anterior da mesma sessão
+    cache.put("a", "full", (2, 0.0), "identity", b"1")
+    assert cache.get("a", "full", (1, 0.0), "identity") is None
+    assert cache._size == 4
@@ -0,0 +1,213 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+session_store = importlib.import_module("utils.session_store")
+
+
+def _session(video_hash="abc123", count=3):
+    return {
+        "video_hash": video_hash,
+        "video_path": f"uploads/upload_{video_hash}.mp4",
+        "subtitles": [
+            {"id": i, "start": float(i), "end": i + 0.9, "text": f"linha {i}", "raw_text": f"linha {i}", "confidence": 0.5}
+            for i in range(count)
+        ],
+        "video_info": {"filename": "video.mp4", "duration": float(count)},
+        "forbidden_words": ["merda"],
+        "beep_intervals": [[0.2, 0.4, "merda"], [1.2, 1.3]],
+    }
+
+
+def _rows(store, table):
+    return store._conn().execute(f"SELECT id, position FROM {table} ORDER BY position").fetchall()
+
+
+def test_save_and_load_round_trip_session_format(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    data = _session()
+    data["subtitles"][1]["speaker"] = "A"
+    data["subtitles"][2] = {"id": "novo", "start": 2.0, "end": 2.5, "text": "sem extras"}
+
+    store.save(data)
+
+    loaded = store.load("abc123")
+    assert loaded.pop("version") == 1
+    assert loaded.pop("created_at") == store.revision("abc123")[1]
+    assert len(loaded.pop("beep_ids")) == 2
+    assert loaded == data
+    assert store.exists("abc123") and not store.exists("outro")
+    assert store.video_path("abc123") == "uploads/upload_abc123.mp4"
+    assert store.load("outro") is None
+
+
+def test_update_rewrites_only_changed_rows(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session(count=4))
+    before = _rows(store, "session_subtitles")
+
+    edited = store.load("abc123")["subtitles"]
+    edited[1]["text"] = "editada"
+    del edited[3]
+    assert store.update("abc123", subtitles=edited, forbidden_words=["droga"])
+
+    # Linhas inalteradas mantêm a identidade; a excedente sai
+    assert _rows(store, "session_subtitles") == before[:3]
+    loaded = store.load("abc123")
+    assert [s["text"] for s in loaded["subtitles"]] == ["linha 0", "editada", "linha 2"]
+    assert loaded["forbidden_words"] == ["droga"]
+    assert loaded["beep_intervals"] == [[0.2, 0.4, "merda"], [1.2, 1.3]]
+    assert not store.update("outro", subtitles=[])
+
+
+def test_delete_and_age_cleanup_cascade_rows(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session("velha"))
+    store.save(_session("nova"))
+    store._conn().execute("UPDATE edit_sessions SET updated_at = 0 WHERE video_hash = 'velha'")
+
+    assert store.delete_older_than(3600) == 1
+    assert store.load("velha") is None
+    assert store.delete("nova")
+    assert not store.delete("nova")
+    assert store._conn().execute("SELECT COUNT(*) FROM session_subtitles").fetchone()[0] == 0
+    assert store._conn().execute("SELECT COUNT(*) FROM session_beeps").fetchone()[0] == 0
+
+
+def test_import_json_migrates_legacy_file(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    legacy = tmp_path / "session_abc123.json"
+    legacy.write_text(json.dumps(_session()), encoding="utf-8")
+
+    imported = store.import_json(legacy)
+    assert {k: v for k, v in imported.items() if k not in ("version", "created_at", "beep_ids")} == _session()
+    assert not legacy.exists()
+    assert store.import_json(tmp_path / "session_ausente.json") is None
+
+
+def test_update_checks_expected_version(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session())
+
+    assert store.update("abc123", forbidden_words=["a"], expected_version=1) == 2
+    with pytest.raises(session_store.SessionConflict) as conflict:
+        store.update("abc123", forbidden_words=["b"], expected_version=1)
+    assert conflict.value.current_version == 2
+    assert store.load("abc123")["forbidden_words"] == ["a"]
+
+
+def test_apply_patch_touches_only_edited_items(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session(count=3))
+    beep_ids = store.load("abc123")["beep_ids"]
+
+    version = store.apply_patch(
+        "abc123",
+        subtitles={
+            "added": [{"id": 10, "start": 1.5, "end": 1.8, "text": "nova"}],
+            "changed": [{"id": 2, "text": "editada"}],
+            "deleted": [0],
+        },
+        beep_intervals={"added": [{"start": 0.1, "end": 0.15, "word": "manual"}], "deleted": [beep_ids[1]]},
+        expected_version=1,
+    )
+
+    loaded = store.load("abc123")
+    assert version == loaded["version"] == 2
+    assert [s["id"] for s in loaded["subtitles"]] == [1, 10, 2]
+    # Alteração parcial mantém os demais campos
+    assert loaded["subtitles"][2] == {
+        "id": 2, "start": 2.0, "end": 2.9, "text": "editada", "raw_text": "linha 2", "confidence": 0.5,
+    }
+    assert loaded["beep_intervals"] == [[0.1, 0.15, "manual"], [0.2, 0.4, "merda"]]
+    assert loaded["beep_ids"][1] == beep_ids[0]
+
+
+def test_apply_patch_conflicts_roll_back_whole_edit(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session(count=2))
+
+    with pytest.raises(session_store.SessionConflict):
+        store.apply_patch("abc123", subtitles={"changed": [{"id": 0, "text": "x"}]}, expected_version=5)
+    with pytest.raises(session_store.SessionConflict):
+        store.apply_patch("abc123", subtitles={"changed": [{"id": 0, "text": "x"}], "deleted": [99]})
+    with pytest.raises(ValueError):
+        store.apply_patch("abc123", subtitles={"added": [{"start": 1.0, "end": 2.0, "text": "sem id"}]})
+
+    loaded = store.load("abc123")
+    assert loaded["version"] == 1
+    assert loaded["subtitles"][0]["text"] == "linha 0"
+    assert store.apply_patch("outro", subtitles={"deleted": [1]}) is None
+
+
+def test_repeated_inserts_at_same_point_keep_order(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session(count=2))
+
+    for i in range(80):
+        store.apply_patch(
+            "abc123", subtitles={"added": [{"id": 100 + i, "start": 0.5 + i * 0.001, "end": 0.6, "text": str(i)}]}
+        )
+
+    ids = [s["id"] for s in store.load("abc123")["subtitles"]]
+    assert ids == [0, *range(100, 180), 1]
+    # Um salvamento completo devolve as posições inteiras
+    subtitles = store.load("abc123")["subtitles"]
+    store.update("abc123", subtitles=subtitles)
+    assert [s["id"] for s in store.load("abc123")["subtitles"]] == ids
+
+
+def test_patched_start_moves_item_past_its_neighbours(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    store.save(_session(count=4))
+    beep_ids = store.load("abc123")["beep_ids"]
+
+    store.apply_patch(
+        "abc123",
+        subtitles={"changed": [{"id": 0, "start": 2.5, "end": 2.8}, {"id": 3, "start": 0.1}]},
+        beep_intervals={"changed": [{"id": beep_ids[0], "start": 1.5, "end": 1.6}]},
+    )
+    loaded = store.load("abc123")
+    assert [s["id"] for s in loaded["subtitles"]] == [3, 1, 2, 0]
+    assert [s["start"] for s in loaded["subtitles"]] == [0.1, 1.0, 2.0, 2.5]
+    assert loaded["beep_intervals"] == [[1.2, 1.3], [1.5, 1.6, "merda"]]
+    assert store.load_columnar("abc123")["subtitles"]["start"] == [0.1, 1.0, 2.0, 2.5]
+
+    # Mudança que não cruza vizinhos não move o item
+    positions = _rows(store, "session_subtitles")
+    store.apply_patch("abc123", subtitles={"changed": [{"id": 1, "start": 1.2}]})
+    assert _rows(store, "session_subtitles") == positions
+
+
+def test_load_columnar_returns_parallel_arrays(tmp_path):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    data = _session(count=2)
+    data["subtitles"][1] = {"id": "b", "start": 1.0, "end": 1.5, "text": "sem extras"}
+    store.save(data)
+
+    columnar = store.load_columnar("abc123")
+    assert columnar["subtitles"] == {
+        "id": [0, "b"],
+        "start": [0.0, 1.0],
+        "end": [0.9, 1.5],
+        "text": ["linha 0", "sem extras"],
+        "raw_text": ["linha 0", None],
+        "confidence": [0.5, None],
+    }
+    assert columnar["beep_intervals"]["start"] == [0.2, 1.2]
+    assert columnar["beep_intervals"]["word"] == ["merda", None]
+    assert columnar["version"] == 1 and columnar["forbidden_words"] == ["merda"]
+
+    data["subtitles"][1]["speaker"] = "A"
+    store.save(data)
+    assert store.load_columnar("abc123")["subtitles"]["extra"] == [None, {"speaker": "A"}]
+    store.save({**data, "subtitles": [], "beep_intervals": []})
+    assert store.load_columnar("abc123")["subtitles"]["start"] == []
+    assert store.load_columnar("outro") is None
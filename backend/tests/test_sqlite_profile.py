@@ -0,0 +1,126 @@
+import importlib
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+db_config = importlib.import_module("database.db_config")
+user_model = importlib.import_module("models.user_model")
+db_manager = importlib.import_module("database.db_manager")
+sqlite_profile = importlib.import_module("database.sqlite_profile")
+
+
+@pytest.fixture()
+def manager_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_PATH", str(tmp_path / "manager.db"))
+    db_manager.create_db()
+    yield
+    db_manager.close_conn()
+
+
+def test_db_manager_reuses_tuned_connection_per_thread(manager_db):
+    with db_manager.get_conn() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == sqlite_profile.settings.sqlite_busy_timeout_ms
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        first = conn
+    with db_manager.get_conn() as conn:
+        assert conn is first
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db_manager._thread_conn()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+
+def test_db_manager_rolls_back_failed_block(manager_db):
+    with pytest.raises(RuntimeError):
+        with db_manager.get_conn() as conn:
+            conn.execute("INSERT INTO users (username, password_hash) VALUES ('x', 'y')")
+            raise RuntimeError("falhou")
+    assert db_manager.get_user_by_username("x") is None
+
+
+def test_concurrent_writes_and_reads_do_not_lock(manager_db):
+    owner = db_manager.create_user("dono", "senha")
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(40):
+                db_manager.save_video_data(owner, f"{worker}-{i}", "v.mp4")
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db_manager.close_conn()
+
+    def reader():
+        try:
+            for _ in range(80):
+                db_manager.list_owned_videos(owner)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db_manager.close_conn()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(3)]
+    threads += [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(db_manager.list_owned_videos(owner)) == 120
+
+
+def test_init_database_applies_profile_and_pool(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    assert db_config.init_database(app)
+    with app.app_context():
+        with db_config.db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            # O perfil não liga chaves estrangeiras: token_blacklist não tem cascata
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 0
+        assert db_config.db.engine.pool.size() == sqlite_profile.settings.db_pool_size
+        db_config.db.session.remove()
+
+
+def test_user_with_revoked_token_can_still_be_deleted(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    assert db_config.init_database(app)
+    db = db_config.db
+    with app.app_context():
+        user = user_model.User("ana", "ana@example.com", "secret")
+        db.session.add(user)
+        db.session.commit()
+        # Um logout deixa o token revogado apontando para o usuário
+        db.session.add(user_model.TokenBlacklist(
+            jti="abc", token_type="access", user_id=user.id, expires_at=datetime.utcnow(),
+        ))
+        db.session.commit()
+
+        db.session.delete(user)
+        db.session.commit()
+        assert user_model.User.query.count() == 0
+        db.session.remove()
+
+
+def test_memory_uri_is_not_pooled():
+    assert not sqlite_profile.is_sqlite_file_uri("sqlite://")
+    assert not sqlite_profile.is_sqlite_file_uri("sqlite:///:memory:")
+    assert not sqlite_profile.is_sqlite_file_uri("postgresql://localhost/textwaves")
+    assert sqlite_profile.is_sqlite_file_uri("sqlite:////tmp/textwaves.db")
@@ -0,0 +1,46 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+thumbnails = importlib.import_module("utils.thumbnails")
+
+
+def test_sprites_index_and_poster_are_built_once(tmp_path, monkeypatch):
+    source = tmp_path / "upload_abc_video.mp4"
+    source.write_bytes(b"original")
+    calls = []
+
+    def fake_extract(video_path, output_dir, *, interval, poster_time, **layout):
+        calls.append((interval, poster_time, layout["columns"], layout["rows"]))
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True)
+        for name in ("sprite_001.jpg", "sprite_002.jpg", "poster.jpg"):
+            (output_dir / name).write_bytes(b"jpg")
+
+    monkeypatch.setattr(thumbnails, "extract_thumbnails", fake_extract)
+    monkeypatch.setattr(thumbnails, "probe_media", lambda path: SimpleNamespace(duration=180.0))
+    monkeypatch.setattr(thumbnails.settings, "thumbnail_interval", 5.0)
+
+    thumbnails.start_thumbnails("abc", source).result(timeout=5)
+
+    index_file = thumbnails.thumbnail_file("abc", tmp_path, "index.json")
+    index = json.loads(index_file.read_text(encoding="utf-8"))
+    assert index["count"] == 36
+    assert index["sheets"] == ["sprite_001.jpg", "sprite_002.jpg"]
+    assert index["poster"] == "poster.jpg"
+    assert calls == [(5.0, 5.0, 5, 5)]
+    assert list((tmp_path / "thumbs").glob("*.partial-*")) == []
+
+    # Conteúdo identificado pelo hash: não é gerado de novo
+    assert thumbnails.start_thumbnails("abc", source) is None
+    assert len(calls) == 1
+
+    assert thumbnails.thumbnail_file("abc", tmp_path, "poster.jpg") is not None
+    assert thumbnails.thumbnail_file("abc", tmp_path, "../session_abc.json") is None
+    assert thumbnails.thumbnail_file("abc", tmp_path, "sprite_003.jpg") is None
@@ -0,0 +1,103 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+import sqlalchemy
+from flask import Flask
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+db_config = importlib.import_module("database.db_config")
+db = db_config.db
+User = importlib.import_module("models.user_model").User
+video_model = importlib.import_module("models.video_model")
+session_store = importlib.import_module("utils.session_store")
+VideoTask = video_model.VideoTask
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    store = session_store.SQLiteSessionStore(tmp_path / "sessions.db")
+    monkeypatch.setattr(video_model, "get_session_store", lambda: store)
+    monkeypatch.setattr(video_model.settings, "base_dir", tmp_path)
+    return store
+
+
+@pytest.fixture()
+def app(tmp_path, store):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'tasks.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User("ana", "ana@example.com", "secret")
+        db.session.add(user)
+        db.session.commit()
+        VideoTask.create_or_reset(video_hash="abc", user_id=user.id, filename="a.mp4", session_path="s.json")
+        yield app
+        db.session.remove()
+
+
+def _task():
+    db.session.expire_all()
+    return VideoTask.query.filter_by(video_hash="abc").one()
+
+
+def test_to_dict_reads_columns_without_touching_disk(app, monkeypatch):
+    VideoTask.mark_session_saved("abc")
+    VideoTask.mark_completed("abc", "uploads/final_abc.mp4")
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("to_dict não deve consultar o disco")
+
+    monkeypatch.setattr(Path, "exists", no_stat)
+    data = _task().to_dict()
+    assert data["final_available"] is True and data["can_resume"] is True
+
+
+def test_cleanup_marks_removed_artifacts(app):
+    VideoTask.mark_session_saved("abc")
+    VideoTask.mark_completed("abc", "uploads/final_abc.mkv")
+
+    # Um MP4 antigo removido não afeta o MKV atual
+    VideoTask.mark_artifacts_removed(final_names={"final_abc.mp4"})
+    assert _task().final_available
+
+    shown = _task().updated_at
+    VideoTask.mark_artifacts_removed(final_names={"final_abc.mkv"}, session_hashes={"abc"})
+    task = _task()
+    assert not task.final_available and not task.can_resume
+    # Contabilidade de arquivos não muda a data exibida no histórico
+    assert task.updated_at == shown
+
+
+def test_reconcile_fixes_drift(app, store, tmp_path):
+    VideoTask.mark_completed("abc", "uploads/final_abc.mp4")
+    shown = _task().updated_at
+    assert VideoTask.reconcile_artifacts() == 1
+    assert not _task().final_available
+    assert _task().updated_at == shown
+
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "final_abc.mp4").write_bytes(b"video")
+    store.save({"video_hash": "abc", "video_path": "uploads/upload_abc.mp4", "subtitles": []})
+    assert VideoTask.reconcile_artifacts() == 1
+    task = _task()
+    assert task.final_available and task.can_resume
+    assert VideoTask.reconcile_artifacts() == 0
+
+
+def test_add_missing_columns_upgrades_old_table(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'old.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as conn:
+            conn.execute(sqlalchemy.text("ALTER TABLE video_tasks DROP COLUMN can_resume"))
+        assert db_config.add_missing_columns() == ["video_tasks.can_resume"]
+        assert db_config.add_missing_columns() == []
+        db.session.remove()
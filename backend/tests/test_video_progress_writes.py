@@ -0,0 +1,103 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+db = importlib.import_module("database.db_config").db
+User = importlib.import_module("models.user_model").User
+video_model = importlib.import_module("models.video_model")
+VideoTask = video_model.VideoTask
+data_routes = importlib.import_module("routes.data_routes")
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    # Intervalo longo: só as gravações explícitas acontecem durante o teste
+    monkeypatch.setattr(video_model.settings, "progress_flush_seconds", 60.0)
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'tasks.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User("ana", "ana@example.com", "secret")
+        db.session.add(user)
+        db.session.commit()
+        VideoTask.create_or_reset(video_hash="abc", user_id=user.id, filename="a.mp4", session_path="s.json")
+        yield app
+        db.session.remove()
+
+
+def _stored(column):
+    db.session.expire_all()
+    return getattr(VideoTask.query.filter_by(video_hash="abc").one(), column)
+
+
+def test_intermediate_progress_is_coalesced_until_flush(app):
+    VideoTask.record_progress("abc", stage="extracting_audio", progress=10, message="a")
+    VideoTask.record_progress("abc", stage="transcribing", progress=40)
+    assert _stored("stage") == "uploading"
+
+    VideoTask.flush_progress()
+    assert (_stored("stage"), _stored("progress"), _stored("message")) == ("transcribing", 40.0, "a")
+
+
+def test_terminal_states_are_written_immediately_and_win(app):
+    VideoTask.record_progress("abc", stage="finalizing", progress=90)
+    VideoTask.mark_completed("abc", "uploads/final_abc.mp4")
+    assert _stored("status") == "completed"
+
+    # Um lote atrasado mais antigo não sobrescreve a conclusão
+    stale = {"stage": "finalizing", "progress": 90.0, "updated_at": video_model.datetime(2000, 1, 1)}
+    video_model._progress_buffer.add("abc", stale)
+    VideoTask.flush_progress()
+    assert _stored("stage") == "completed"
+
+    VideoTask.record_progress("abc", stage="completed", progress=100, status="preview_ready")
+    assert _stored("status") == "preview_ready"
+
+
+def test_buffered_progress_survives_session_save(app):
+    VideoTask.record_progress("abc", stage="transcribing", progress=60, message="a")
+    # Gravar a sessão no meio do processamento não invalida o lote pendente
+    VideoTask.mark_session_saved("abc")
+    VideoTask.flush_progress()
+    assert (_stored("stage"), _stored("progress"), _stored("can_resume")) == ("transcribing", 60.0, True)
+
+
+def test_progress_stream_opens_before_the_task_exists(app):
+    app.config.update(JWT_SECRET_KEY="teste")
+    JWTManager(app)
+    app.register_blueprint(data_routes.data_bp, url_prefix="/api")
+    other = User("bia", "bia@example.com", "secret")
+    db.session.add(other)
+    db.session.commit()
+    owner = {"Authorization": f"Bearer {create_access_token(identity=VideoTask.query.one().user_id)}"}
+    stranger = {"Authorization": f"Bearer {create_access_token(identity=other.id)}"}
+    client = app.test_client()
+
+    def stream(video_hash, headers):
+        ticket = client.post(f"/api/progress_ticket/{video_hash}", headers=headers)
+        if ticket.status_code != 200:
+            return ticket.status_code
+        response = client.get(f"/api/video_progress/{video_hash}?ticket={ticket.get_json()['ticket']}", buffered=False)
+        response.close()
+        return response.status_code
+
+    # Upload ainda em andamento: o registro "novo" não existe, mas o stream abre
+    assert stream("novo", stranger) == 200
+    assert stream("abc", owner) == 200
+    assert stream("abc", stranger) == 404
+
+    assert client.get("/api/video_progress/abc").status_code == 401
+    # O token de acesso não é aceito na URL
+    assert client.get(f"/api/video_progress/abc?token={owner['Authorization'][7:]}").status_code == 401
+    ticket = client.post("/api/progress_ticket/novo", headers=stranger).get_json()["ticket"]
+    assert client.get(f"/api/video_progress/abc?ticket={ticket}").status_code == 401
+    assert client.delete("/api/video_progress/abc", headers=stranger).status_code == 404
@@ -0,0 +1,49 @@
+import importlib
+import struct
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+waveform = importlib.import_module("utils.waveform")
+
+
+def _write_wav(path: Path, samples: np.ndarray, sample_rate: int = 8000) -> None:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_peak_pyramid_levels_and_binary_layout(tmp_path, monkeypatch):
+    monkeypatch.setattr(waveform, "COARSEST_PEAKS", 4)
+    samples = np.zeros((100 * 16 + 5, 2), dtype=np.int16)
+    samples[16 * 10 + 3, 0] = 32767  # pico positivo no 11º bloco, canal esquerdo
+    samples[16 * 90, 1] = -32768  # pico negativo no 91º bloco, canal direito
+    wav_path = tmp_path / "audio.wav"
+    _write_wav(wav_path, samples)
+
+    output = waveform.build_waveform_peaks(wav_path, tmp_path / "waveform_abc.bin", samples_per_peak=16)
+
+    finest = waveform.read_waveform_level(output, 99)
+    assert (finest.zoom_levels, finest.zoom, finest.samples_per_peak) == (6, 5, 16)
+    peaks = np.frombuffer(finest.peaks, dtype=np.int8).reshape(-1, 2)
+    assert len(peaks) == 101  # 100 blocos completos + o resto
+    assert tuple(peaks[10]) == (0, 127)
+    assert tuple(peaks[90]) == (-128, 0)
+
+    overview = waveform.read_waveform_level(output, 0)
+    assert overview.samples_per_peak == 16 * 32
+    overview_peaks = np.frombuffer(overview.peaks, dtype=np.int8).reshape(-1, 2)
+    assert len(overview_peaks) == 4
+    assert overview_peaks[:, 1].max() == 127 and overview_peaks[:, 0].min() == -128
+
+    header = overview.to_bytes()[:24]
+    magic, _version, bits, zoom, levels, _reserved, rate, spp, count = struct.unpack("<4sBBHHHIII", header)
+    assert (magic, bits, zoom, levels, rate, spp, count) == (b"TWWF", 8, 0, 6, 8000, 512, 4)
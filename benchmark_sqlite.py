@@ -0,0 +1,166 @@
+"""Benchmark de concorrência do SQLite: padrão x perfil de desempenho.
+
+Simula o progresso dos vídeos: threads gravando o estado de vários vídeos
+enquanto outras leem (listagem e polling de progresso). Compara:
+
+- padrão: uma conexão nova por operação, journal de rollback, synchronous=FULL
+  (como ``db_manager.get_conn`` antes do perfil)
+- perfil: conexão reaproveitada por thread com WAL, synchronous=NORMAL,
+  busy_timeout, cache/mmap e temp_store em memória
+
+Uso:
+    python benchmark_sqlite.py [--seconds 5] [--writers 4] [--readers 8]
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, 'backend/app')
+
+from database.sqlite_profile import apply_sqlite_pragmas
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    video_hash TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    progress REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+VIDEOS = 50
+
+
+def _default_connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+class _PerCall:
+    """Conexão aberta e fechada a cada operação (comportamento anterior)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def run(self, sql, params=(), write=False):
+        conn = _default_connect(self.path)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+            if write:
+                conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+
+class _Tuned:
+    """Uma conexão por thread com o perfil aplicado."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def run(self, sql, params=(), write=False):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            apply_sqlite_pragmas(conn)
+            self.local.conn = conn
+        rows = conn.execute(sql, params).fetchall()
+        if write:
+            conn.commit()
+        return rows
+
+    def close(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+
+def _run(label, backend_cls, seconds, writers, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        setup = sqlite3.connect(path)
+        setup.execute(SCHEMA)
+        setup.executemany(
+            "INSERT INTO progress VALUES (?, 'uploading', 0, ?)",
+            [(f"video{i}", time.time()) for i in range(VIDEOS)],
+        )
+        setup.commit()
+        setup.close()
+
+        backend = backend_cls(path)
+        counts = {"writes": 0, "reads": 0, "locked": 0}
+        lock = threading.Lock()
+        stop = time.monotonic() + seconds
+
+        def worker(is_writer, n):
+            done = locked = 0
+            i = n
+            try:
+                while time.monotonic() < stop:
+                    try:
+                        if is_writer:
+                            backend.run(
+                                "UPDATE progress SET stage = ?, progress = ?, updated_at = ? WHERE video_hash = ?",
+                                ("transcribing", i % 100, time.time(), f"video{i % VIDEOS}"),
+                                write=True,
+                            )
+                        else:
+                            backend.run("SELECT * FROM progress WHERE video_hash = ?", (f"video{i % VIDEOS}",))
+                            backend.run("SELECT video_hash, stage, progress FROM progress ORDER BY updated_at DESC LIMIT 20")
+                        done += 1
+                    except sqlite3.OperationalError:
+                        locked += 1
+                    i += 1
+            finally:
+                backend.close()
+                with lock:
+                    counts["writes" if is_writer else "reads"] += done
+                    counts["locked"] += locked
+
+        threads = [threading.Thread(target=worker, args=(True, n)) for n in range(writers)]
+        threads += [threading.Thread(target=worker, args=(False, n)) for n in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    print(f"\n{label}")
+    print("-" * 60)
+    print(f"   Escritas/s: {counts['writes'] / seconds:10.0f}")
+    print(f"   Leituras/s: {counts['reads'] / seconds:10.0f}")
+    print(f"   'database is locked': {counts['locked']}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f" BENCHMARK SQLITE ({args.writers} escritores, {args.readers} leitores, {args.seconds:.0f}s)")
+    print("=" * 60)
+
+    default = _run("Padrão (conexão por chamada, journal de rollback)", _PerCall, args.seconds, args.writers, args.readers)
+    tuned = _run("Perfil (WAL, synchronous=NORMAL, conexão por thread)", _Tuned, args.seconds, args.writers, args.readers)
+
+    print("\nGanho do perfil")
+    print("-" * 60)
+    for key, name in (("writes", "Escritas"), ("reads", "Leituras")):
+        ratio = tuned[key] / default[key] if default[key] else float("inf")
+        print(f"   {name}: {ratio:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -99,15 +99,23 @@ const Projeto = () => {
   }, []);
 
   const startProgressStream = useCallback(
-    (hash) => {
+    async (hash) => {
       if (!hash) {
         return;
       }
 
       stopProgressStream();
       try {
+        // EventSource não envia cabeçalhos: um ticket curto, só deste vídeo, vai na URL
+        const ticketResponse = await apiCall(`${API_BASE}/api/progress_ticket/${hash}`, {
+          method: "POST",
+        });
+        if (!ticketResponse.ok) {
+          throw new Error(`Ticket de progresso recusado (${ticketResponse.status})`);
+        }
+        const { ticket } = await ticketResponse.json();
         const source = new EventSource(
-          `${API_BASE}/api/video_progress/${hash}`
+          `${API_BASE}/api/video_progress/${hash}?ticket=${encodeURIComponent(ticket)}`
         );
         progressSourceRef.current = source;
 
@@ -133,7 +141,7 @@ const Projeto = () => {
         console.error("Não foi possível iniciar monitoramento de progresso:", streamError);
       }
     },
-    [stopProgressStream]
+    [apiCall, stopProgressStream]
   );
 
   const handleFileChange = (event) => {
@@ -58,15 +58,23 @@ const VideoPreview = () => {
   }, [videoHash, progressData]);
 
   // Função para monitorar progresso via SSE
-  const monitorProgress = useCallback((sessionHash) => {
+  const monitorProgress = useCallback(async (sessionHash) => {
     try {
       if (progressSourceRef.current) {
         progressSourceRef.current.close();
         progressSourceRef.current = null;
       }
 
+      // EventSource não envia cabeçalhos: um ticket curto, só deste vídeo, vai na URL
+      const ticketResponse = await apiCall(`${API_BASE}/api/progress_ticket/${sessionHash}`, {
+        method: "POST",
+      });
+      if (!ticketResponse.ok) {
+        throw new Error(`Ticket de progresso recusado (${ticketResponse.status})`);
+      }
+      const { ticket } = await ticketResponse.json();
       const eventSource = new EventSource(
-        `${API_BASE}/api/video_progress/${sessionHash}`
+        `${API_BASE}/api/video_progress/${sessionHash}?ticket=${encodeURIComponent(ticket)}`
       );
       progressSourceRef.current = eventSource;
 
@@ -93,7 +101,7 @@ const VideoPreview = () => {
     } catch (error) {
       console.error("Erro ao monitorar progresso:", error);
     }
-  }, []);
+  }, [apiCall]);
 
   // Carregar sessão existente via hash (reintenta enquanto processamento estiver em andamento)
   const loadExistingSession = useCallback(